@@ -0,0 +1,151 @@
+"""Typed quiz and lab structures, response parsing and slide conversion."""
+
+from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+
+from gemini_content_generator import SlideContent, SlideType
+
+logger = logging.getLogger(__name__)
+
+PENDING_TEXT = "Will be added in the next iteration."
+
+
+@dataclass
+class QuizQuestion:
+    question: str
+    options: List[str]
+    correct_answer: str
+    explanation: Optional[str] = None
+
+
+@dataclass
+class LabExercise:
+    title: str
+    objectives: List[str] = field(default_factory=list)
+    tools: List[str] = field(default_factory=list)
+    steps: List[str] = field(default_factory=list)
+    expected_outcomes: List[str] = field(default_factory=list)
+    discussion_questions: List[str] = field(default_factory=list)
+
+
+def _extract_json(text: str, opening: str, closing: str):
+    """Parse the outermost JSON array/object in a model response"""
+    start = text.find(opening)
+    end = text.rfind(closing) + 1
+    if start == -1 or end <= start:
+        raise ValueError(f"No JSON {'array' if opening == '[' else 'object'} in response")
+    return json.loads(text[start:end])
+
+
+def _strings(value) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    return [str(item) for item in value or [] if item]
+
+
+def parse_quiz(text: str) -> List[QuizQuestion]:
+    """Parse multiple choice questions, dropping malformed ones"""
+    data = _extract_json(text, '[', ']')
+    if isinstance(data, dict):
+        data = data.get("questions", [])
+
+    questions = []
+    for item in data:
+        if not isinstance(item, dict) or not item.get("question"):
+            continue
+        options = _strings(item.get("options"))
+        if len(options) < 2:
+            continue
+        answer = str(item.get("correct_answer", ""))
+        if answer not in options:
+            logger.warning(f"Correct answer of '{item['question']}' is not one of its options")
+        questions.append(QuizQuestion(
+            question=str(item["question"]),
+            options=options,
+            correct_answer=answer,
+            explanation=item.get("explanation")
+        ))
+
+    if not questions:
+        raise ValueError("Response contains no valid quiz questions")
+    return questions
+
+
+def parse_lab(text: str) -> LabExercise:
+    """Parse a lab exercise"""
+    data = _extract_json(text, '{', '}')
+    lab = LabExercise(
+        title=str(data.get("title") or "Lab Exercise"),
+        objectives=_strings(data.get("objectives")),
+        tools=_strings(data.get("tools")),
+        steps=_strings(data.get("steps")),
+        expected_outcomes=_strings(data.get("expected_outcomes")),
+        discussion_questions=_strings(data.get("discussion_questions"))
+    )
+    if not lab.steps and not lab.objectives:
+        raise ValueError("Response contains no lab objectives or steps")
+    return lab
+
+
+def quiz_lines(questions: List[Dict]) -> List[Tuple[str, int]]:
+    """Get (text, level) body lines of a quiz slide"""
+    lines = []
+    for i, question in enumerate(questions, 1):
+        lines.append((f"Q{i}: {question['question']}", 0))
+        lines.extend((f"□ {option}", 1) for option in question.get("options", []))
+    return lines
+
+
+def lab_lines(lab: Dict) -> List[Tuple[str, int]]:
+    """Get (text, level) body lines of a lab slide"""
+    lines = []
+    sections = [
+        ("Objectives:", lab.get("objectives", []), "•"),
+        ("Required Tools:", lab.get("tools", []), "•"),
+        ("Steps:", lab.get("steps", []), None),
+        ("Expected Outcomes:", lab.get("expected_outcomes", []), "•")
+    ]
+    for heading, items, marker in sections:
+        if not items:
+            continue
+        lines.append((heading, 0))
+        lines.extend(
+            (f"{marker} {item}" if marker else f"{i}. {item}", 1)
+            for i, item in enumerate(items, 1)
+        )
+    return lines
+
+
+def _bullets(lines: List[Tuple[str, int]]) -> Dict:
+    """Split leveled lines into the bullet_points and bullet_levels of a slide"""
+    if not lines:
+        return {"bullet_points": None, "bullet_levels": None}
+    return {"bullet_points": [text for text, _ in lines], "bullet_levels": [level for _, level in lines]}
+
+
+def quiz_slide(section: str, questions: Optional[List[QuizQuestion]]) -> SlideContent:
+    """Create a QUIZ slide; without questions it is a placeholder"""
+    data = [asdict(question) for question in questions or []]
+    return SlideContent(
+        title=f"Knowledge Check: {section}",
+        main_content="Answer the following questions:" if data else PENDING_TEXT,
+        slide_type=SlideType.QUIZ,
+        **_bullets(quiz_lines(data)),
+        notes="\n".join(f"Q{i}: {q['correct_answer']}" for i, q in enumerate(data, 1)) or None,
+        interactive_elements={"questions": data}
+    )
+
+
+def lab_slide(section: str, lab: Optional[LabExercise]) -> SlideContent:
+    """Create a LAB slide; without a lab it is a placeholder"""
+    data = asdict(lab) if lab else {}
+    return SlideContent(
+        title=f"Lab: {data.get('title', section)}",
+        main_content=f"Hands-on exercise for {section}" if data else PENDING_TEXT,
+        slide_type=SlideType.LAB,
+        **_bullets(lab_lines(data)),
+        notes="\n".join(f"Discuss: {q}" for q in data.get("discussion_questions", [])) or None,
+        interactive_elements=data or None
+    )
@@ -0,0 +1,362 @@
+"""Build farm: nodes claim (module, lesson, section) work items from a shared queue, one merge step assembles the decks.
+
+The queue is a directory of lock files on a shared filesystem, or a SQLite file (job_queue.JobQueue)
+as a stand-in on one machine, so no broker is needed:
+
+    python build_farm.py submit --queue /shared/farm --module comprehensive --lesson "Data Analytics"
+    python build_farm.py work --queue /shared/farm          (on every node)
+    python build_farm.py merge --queue /shared/farm --build <id>
+"""
+
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple, Union
+import argparse
+import json
+import logging
+import os
+import re
+import socket
+import threading
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+from build_manifest import BuildManifest, content_hash
+from client_pool import ClientPool, api_keys_from_env
+from deck_merge import SlideMerger, remove_all_slides
+from gemini_content_generator import GeminiContentGenerator
+from job_queue import JobQueue, Job, RUNNING, DONE, FAILED
+from quota_scheduler import SHARED_QUOTA
+from slide_generator import EnhancedSlideGenerator
+from template_cache import TemplateCache
+
+logger = logging.getLogger(__name__)
+
+
+class LockFileQueue:
+    """Work queue in a shared directory; an item belongs to whoever creates its lock file first
+
+    Claimed items hold their lock while running; a lock not renewed within lease seconds is taken
+    over, so items of a crashed node are built again. Same interface as job_queue.JobQueue.
+    """
+
+    def __init__(self, root: str, lease: float = 900.0):
+        self.root = root
+        self.lease = lease
+        for name in ("items", "claims", "done", "failed"):
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+
+    def _path(self, kind: str, job_id: str) -> str:
+        return os.path.join(self.root, kind, f"{job_id}.lock" if kind == "claims" else f"{job_id}.json")
+
+    @staticmethod
+    def _write(path: str, data: Dict) -> None:
+        # Written under a temporary name so readers on other nodes never see a partial file
+        temp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    @staticmethod
+    def _read(path: str) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _ids(self, kind: str) -> List[str]:
+        suffix = ".lock" if kind == "claims" else ".json"
+        return sorted(name[:-len(suffix)] for name in os.listdir(os.path.join(self.root, kind))
+                      if name.endswith(suffix))
+
+    def submit(self, module: str, lesson_title: str, **options) -> Job:
+        """Queue a work item; ids sort by submission time"""
+        job_id = f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}"
+        job = Job(job_id, module, lesson_title, options, created=time.time())
+        self._write(self._path("items", job_id), job.to_dict())
+        return job
+
+    def claim(self, worker: str) -> Optional[Job]:
+        """Lock the oldest unclaimed item for worker and return it, or None if nothing is left"""
+        finished = set(self._ids("done")) | set(self._ids("failed"))
+        claimed = set(self._ids("claims"))
+        for job_id in self._ids("items"):
+            if job_id in finished:
+                continue
+            lock_path = self._path("claims", job_id)
+            if job_id in claimed and not self._take_over(job_id, worker):
+                continue
+            try:
+                # O_EXCL makes creating the lock the atomic claim
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({"worker": worker, "started": time.time()}, f)
+            return self.get(job_id)
+        return None
+
+    def _take_over(self, job_id: str, worker: str) -> bool:
+        """Remove the lock of an unfinished item whose lease ran out; True if this worker removed it"""
+        lock_path = self._path("claims", job_id)
+        try:
+            age = time.time() - os.path.getmtime(lock_path)
+        except FileNotFoundError:
+            return True
+        if age < self.lease or os.path.exists(self._path("done", job_id)) or os.path.exists(self._path("failed", job_id)):
+            return False
+        # Only one of several nodes noticing the expired lease can rename it away
+        stale_path = f"{lock_path}.{uuid.uuid4().hex[:8]}.stale"
+        try:
+            os.rename(lock_path, stale_path)
+        except FileNotFoundError:
+            return False
+        # The holder may have renewed the lock between the check and the rename: put it back, unless a
+        # third node has claimed the item meanwhile (link fails where rename would overwrite its lock)
+        if time.time() - os.path.getmtime(stale_path) < self.lease:
+            try:
+                os.link(stale_path, lock_path)
+            except FileExistsError:
+                logger.warning(f"Lock of item {job_id} was renewed while another node claimed it")
+            os.remove(stale_path)
+            return False
+        os.remove(stale_path)
+        logger.warning(f"Lease of item {job_id} expired after {age:.0f}s, {worker} takes it over")
+        return True
+
+    def renew(self, job_id: str) -> None:
+        """Extend the lease of a claimed item"""
+        os.utime(self._path("claims", job_id))
+
+    def finish(self, job_id: str, output_path: str) -> None:
+        """Mark an item as done with the path of its fragment"""
+        job = self.get(job_id)
+        job.status, job.output_path, job.finished = DONE, output_path, time.time()
+        self._write(self._path("done", job_id), job.to_dict())
+
+    def fail(self, job_id: str, error: str) -> None:
+        """Mark an item as failed"""
+        job = self.get(job_id)
+        job.status, job.error, job.finished = FAILED, error, time.time()
+        self._write(self._path("failed", job_id), job.to_dict())
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get an item with its current state"""
+        for kind in ("done", "failed"):
+            data = self._read(self._path(kind, job_id))
+            if data is not None:
+                return Job(**data)
+        data = self._read(self._path("items", job_id))
+        if data is None:
+            return None
+        job = Job(**data)
+        claim = self._read(self._path("claims", job_id))
+        if claim is not None:
+            job.status, job.worker, job.started = RUNNING, claim["worker"], claim["started"]
+        return job
+
+    def list(self, status: Optional[str] = None, limit: Optional[int] = 50) -> List[Job]:
+        """Get the newest items, optionally only those in one state (limit None: all)"""
+        jobs = []
+        for job_id in reversed(self._ids("items")):
+            job = self.get(job_id)
+            if job is not None and (not status or job.status == status):
+                jobs.append(job)
+                if limit is not None and len(jobs) >= limit:
+                    break
+        return jobs
+
+
+WorkQueue = Union[LockFileQueue, JobQueue]
+
+
+def open_queue(location: str) -> WorkQueue:
+    """Open a SQLite queue for a .sqlite/.db file, else a lock-file queue in the directory"""
+    if location.endswith((".sqlite", ".db")):
+        os.makedirs(os.path.dirname(os.path.abspath(location)), exist_ok=True)
+        return JobQueue(location)
+    return LockFileQueue(location)
+
+
+def farm_directory(location: str) -> str:
+    """Get the shared directory for fragments, manifests and decks of a queue location"""
+    if location.endswith((".sqlite", ".db")):
+        return os.path.dirname(os.path.abspath(location))
+    return location
+
+
+def submit_build(queue: WorkQueue, generator: GeminiContentGenerator, modules: List[str], lesson_title: str) -> str:
+    """Queue one work item per section of every module's deck; returns the build id"""
+    build_id = uuid.uuid4().hex[:8]
+    count = 0
+    for module in modules:
+        sections = generator.lesson_sections(module)
+        for position, section in enumerate(sections):
+            queue.submit(module, lesson_title, build=build_id, section=section,
+                         position=position, sections=len(sections))
+        count += len(sections)
+    logger.info(f"Submitted build {build_id}: {count} sections of {len(modules)} modules")
+    return build_id
+
+
+class FarmWorker:
+    """Claims work items and renders each section as a deck fragment in the farm directory"""
+
+    def __init__(self, queue: WorkQueue, farm_dir: str, generator: GeminiContentGenerator,
+                 template_path: str, name: Optional[str] = None):
+        self.queue = queue
+        self.farm_dir = farm_dir
+        self.generator = generator
+        self.template_path = template_path
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.templates = TemplateCache()
+        for name in ("fragments", "manifests"):
+            os.makedirs(os.path.join(farm_dir, name), exist_ok=True)
+
+    def run(self, poll_interval: float = 5.0, exit_when_idle: bool = False) -> int:
+        """Build items until the queue is empty (exit_when_idle) or forever; returns the number built"""
+        built = 0
+        while True:
+            job = self.queue.claim(self.name)
+            if job is None:
+                if exit_when_idle:
+                    return built
+                time.sleep(poll_interval)
+                continue
+
+            logger.info(f"{self.name} building '{job.options['section']}' of {job.module} ({job.id})")
+            try:
+                self.queue.finish(job.id, self.build(job))
+                built += 1
+            except Exception as e:
+                logger.error(f"Error building item {job.id}: {str(e)}", exc_info=True)
+                self.queue.fail(job.id, str(e))
+
+    def build(self, job: Job) -> str:
+        """Generate and render the section of a work item; returns the fragment path"""
+        section = job.options["section"]
+        # One manifest per module section, so whichever node claims it next reuses its unchanged slides
+        manifest_name = content_hash(f"{job.module}\0{section}")
+        self.generator.build_manifest = BuildManifest(
+            os.path.join(self.farm_dir, "manifests", f"{manifest_name}.json")
+        )
+
+        with self._heartbeat(job.id):
+            slides = self.generator.generate_section_slides(job.module, section)
+
+            slide_generator = EnhancedSlideGenerator(
+                self.template_path, template_data=self.templates.get(self.template_path)
+            )
+            remove_all_slides(slide_generator.presentation)
+            slide_generator.render_slides(slide_generator.paginator.paginate_slides(slides))
+
+            fragment_path = os.path.join(self.farm_dir, "fragments", f"{job.id}.pptx")
+            temp_path = f"{fragment_path}.{self.name}.tmp"
+            slide_generator.save_presentation(temp_path)
+            os.replace(temp_path, fragment_path)
+        return fragment_path
+
+    @contextmanager
+    def _heartbeat(self, job_id: str):
+        """Renew the item's lease while the block runs"""
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.queue.lease / 3):
+                try:
+                    self.queue.renew(job_id)
+                except Exception as e:
+                    logger.error(f"Error renewing lease of item {job_id}: {str(e)}")
+
+        thread = threading.Thread(target=beat, name=f"lease-{job_id}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+def build_status(queue: WorkQueue, build_id: str) -> Dict[str, int]:
+    """Count the items of a build per state"""
+    return dict(Counter(job.status for job in queue.list(limit=None) if job.options.get("build") == build_id))
+
+
+def merge_build(queue: WorkQueue, build_id: str, template_path: str, output_dir: str) -> List[str]:
+    """Assemble the deck of every module whose sections are all done; returns the deck paths"""
+    decks: Dict[Tuple[str, str], List[Job]] = {}
+    for job in queue.list(limit=None):
+        if job.options.get("build") == build_id:
+            decks.setdefault((job.module, job.lesson_title), []).append(job)
+    if not decks:
+        raise ValueError(f"No items for build {build_id}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    clean_name = lambda s: re.sub(r'[^\w\s-]', '', s).strip().replace(' ', '_')
+    paths = []
+    for (module, lesson_title), jobs in decks.items():
+        jobs.sort(key=lambda job: job.options["position"])
+        pending = [job for job in jobs if job.status != DONE]
+        if pending or len(jobs) != jobs[0].options["sections"]:
+            logger.warning(f"Skipping {module} / {lesson_title}: {len(pending)} of "
+                           f"{jobs[0].options['sections']} sections not done")
+            continue
+
+        slide_generator = EnhancedSlideGenerator(template_path)
+        slide_generator.add_intro_slides()
+        merger = SlideMerger(slide_generator.presentation)
+        for job in jobs:
+            merger.merge(job.output_path)
+
+        output_path = os.path.join(output_dir, f"{clean_name(module)}_{clean_name(lesson_title)}_{build_id}.pptx")
+        slide_generator.save_presentation(output_path)
+        paths.append(output_path)
+        logger.info(f"Merged {len(jobs)} sections into {output_path}")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build decks on several nodes from a shared work queue")
+    parser.add_argument("command", choices=["submit", "work", "merge", "status"])
+    parser.add_argument("--queue", required=True, help="shared directory, or a .sqlite file on one machine")
+    parser.add_argument("--template", default="template.pptx")
+    parser.add_argument("--module", action="append", help="module to build (repeatable, default: comprehensive)")
+    parser.add_argument("--lesson", default="Comprehensive Data Analytics in Cybersecurity")
+    parser.add_argument("--build", help="build id printed by submit")
+    parser.add_argument("--exit-when-idle", action="store_true", help="stop working once the queue is empty")
+    parser.add_argument("--output-dir", help="where merged decks go (default: <farm>/decks)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    load_dotenv()
+    queue = open_queue(args.queue)
+    farm_dir = farm_directory(args.queue)
+
+    if args.command in ("merge", "status") and not args.build:
+        parser.error(f"{args.command} needs --build")
+    if args.command == "status":
+        print(json.dumps(build_status(queue, args.build)))
+        return
+    if args.command == "merge":
+        for path in merge_build(queue, args.build, args.template, args.output_dir or os.path.join(farm_dir, "decks")):
+            print(path)
+        return
+
+    api_keys = api_keys_from_env()
+    if not api_keys:
+        raise ValueError("Please set Gemini_API_KEY in your .env file")
+    client_pool = ClientPool(api_keys)
+    # More keys bring more quota to share
+    SHARED_QUOTA.ensure_capacity(client_pool.capacity)
+    generator = GeminiContentGenerator(client_pool)
+    if args.command == "submit":
+        print(submit_build(queue, generator, args.module or ["comprehensive"], args.lesson))
+    else:
+        FarmWorker(queue, farm_dir, generator, args.template).run(exit_when_idle=args.exit_when_idle)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Build manifest for incremental lesson plan generation."""
+
+from typing import Dict, Optional, Set
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+
+from gemini_content_generator import SlideContent
+from plan_store import slide_to_dict, slide_from_dict
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def content_hash(text: str) -> str:
+    """Get a short stable hash of a prompt template or source string"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+class BuildManifest:
+    """Maps each generated slide to the topic and prompt template it was built from"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self.used: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self._reused: Set[str] = set()
+        self._missed: Set[str] = set()
+        self._load()
+
+    def _load(self):
+        """Load an existing manifest, starting empty if it is missing or outdated"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                logger.info(f"Ignoring build manifest with version {data.get('version')}")
+                return
+            self.entries = data.get("entries", {})
+            logger.info(f"Loaded build manifest with {len(self.entries)} slides from {self.path}")
+        except Exception as e:
+            logger.error(f"Error loading build manifest, rebuilding all slides: {str(e)}")
+            self.entries = {}
+
+    @staticmethod
+    def key(kind: str, source: str, template: str) -> str:
+        """Get the dependency key of a slide"""
+        return content_hash(f"{kind}\0{source}\0{content_hash(template)}")
+
+    def get(self, kind: str, source: str, template: str) -> Optional[SlideContent]:
+        """Get the cached slide if neither its source nor its template changed
+
+        Each slide counts once per build, e.g. when a draft plan is restored and then refined.
+        """
+        key = self.key(kind, source, template)
+        entry = self.entries.get(key)
+        if entry is None:
+            if key not in self._missed:
+                self._missed.add(key)
+                self.misses += 1
+            return None
+        if key not in self._reused:
+            self._reused.add(key)
+            self.hits += 1
+        self.used.add(key)
+        return slide_from_dict(entry["slide"])
+
+    def put(self, kind: str, source: str, template: str, slide: SlideContent):
+        """Record a freshly generated slide"""
+        key = self.key(kind, source, template)
+        self.entries[key] = {
+            "kind": kind,
+            "source": source,
+            "template": content_hash(template),
+            "slide": slide_to_dict(slide)
+        }
+        self.used.add(key)
+
+    def save(self, prune: bool = True):
+        """Write the manifest, dropping slides not used by the last build"""
+        if prune:
+            self.entries = {key: entry for key, entry in self.entries.items() if key in self.used}
+
+        # A temporary name per writer, so builds sharing a manifest directory never write the same file
+        temp_path = f"{self.path}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+        logger.info(f"Build manifest saved: {self.hits} slides reused, {self.misses} regenerated")
+        self.used.clear()
+        self._reused.clear()
+        self._missed.clear()
+        self.hits = self.misses = 0
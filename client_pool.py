@@ -0,0 +1,208 @@
+"""Pool of Gemini API keys, each with its own client, rate limiter and health, so calls spread over several quotas."""
+
+from typing import Dict, List, Optional, Sequence, Set, Union
+import logging
+import os
+import threading
+import time
+
+import google.generativeai as genai
+from google.ai import generativelanguage as glm
+
+from model_client import DeadlineExceeded
+from quota_scheduler import QuotaScheduler
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'gemini-pro'
+
+# Errors after which the request is retried on another key
+AUTH_ERRORS = (401, 403)
+RATE_ERRORS = (429, 503)
+
+
+def api_keys_from_env(*names: str) -> List[str]:
+    """Read API keys from the environment; every variable may hold several, comma-separated"""
+    keys = []
+    for name in names or ("Gemini_API_KEYS", "Gemini_API_KEY", "GEMINI_API_KEY"):
+        for key in (os.getenv(name) or "").split(","):
+            key = key.strip()
+            if key and key not in keys:
+                keys.append(key)
+    return keys
+
+
+class NoHealthyKey(RuntimeError):
+    """Raised when every key of a pool is disabled"""
+
+
+class KeySlot:
+    """One API key with its own client, request limiter and health state"""
+
+    def __init__(self, api_key: str, max_concurrent: int, requests_per_minute: Optional[int]):
+        self.name = f"key ...{api_key[-4:]}"
+        # A client per key instead of the process-wide one genai.configure() sets up
+        self.client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+        self.limiter = QuotaScheduler(max_concurrent, requests_per_minute)
+        self.in_flight = 0  # picked calls, waiting for the limiter or sent
+        self.calls = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.disabled = False
+        self._models = {}
+
+    def model(self, model_name: str, system_instruction: Optional[str]):
+        """Get a model bound to this key's client, one per system instruction"""
+        model = self._models.get(system_instruction)
+        if model is None:
+            model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+            # The SDK has no public way to give a model its own client; it creates one lazily in _client
+            if not hasattr(model, '_client'):
+                raise RuntimeError(f"google-generativeai {genai.__version__} does not support per-key clients, "
+                                   f"see requirements.txt for the supported version")
+            model._client = self.client
+            model = self._models.setdefault(system_instruction, model)
+        return model
+
+    @property
+    def load(self) -> float:
+        return self.in_flight / max(1, self.limiter.max_concurrent)
+
+    def available(self, now: float) -> bool:
+        return not self.disabled and now >= self.cooldown_until
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "errors": self.errors,
+            "cooling_down": max(0.0, self.cooldown_until - time.monotonic()),
+            "disabled": self.disabled
+        }
+
+
+class ClientPool:
+    """Model-like front for several API keys: each call goes to the least loaded healthy key
+
+    Keys answering with rate or auth errors are cooled down or disabled and the call moves on to
+    another key. Pools keep no global state, so pools with different keys can coexist in one process.
+    """
+
+    def __init__(self, api_keys: Union[str, Sequence[str]], model_name: str = DEFAULT_MODEL,
+                 max_concurrent_per_key: int = 4, requests_per_minute_per_key: Optional[int] = None,
+                 cooldown: float = 30.0, max_failures: int = 3):
+        if isinstance(api_keys, str):
+            api_keys = api_keys.split(",")
+        api_keys = list(dict.fromkeys(key.strip() for key in api_keys if key and key.strip()))
+        if not api_keys:
+            raise ValueError("At least one API key is required")
+
+        self.model_name = model_name
+        self.cooldown = cooldown
+        self.max_failures = max_failures
+        self.slots = [KeySlot(key, max_concurrent_per_key, requests_per_minute_per_key) for key in api_keys]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    @property
+    def capacity(self) -> int:
+        """Concurrent requests all keys together allow"""
+        return sum(slot.limiter.max_concurrent for slot in self.slots)
+
+    def generate_content(self, contents, **kwargs):
+        return self._generate(contents, None, kwargs)
+
+    def with_system_instruction(self, system_instruction: str) -> "PoolSession":
+        """Get a model-like session sending the given static instructions with every call"""
+        return PoolSession(self, system_instruction)
+
+    def _generate(self, contents, system_instruction: Optional[str], kwargs: dict):
+        """Send one call, moving to another key after rate or auth errors"""
+        timeout = (kwargs.get("request_options") or {}).get("timeout")
+        deadline = time.monotonic() + timeout if timeout else None
+        tried: Set[KeySlot] = set()
+
+        while True:
+            slot = self._pick(tried, deadline)
+            try:
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None:
+                    kwargs["request_options"] = dict(kwargs["request_options"], timeout=remaining)
+                with slot.limiter.slot(slot.name, timeout=remaining):
+                    response = slot.model(self.model_name, system_instruction).generate_content(contents, **kwargs)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                tried.add(slot)
+                if not self._record_failure(slot, e) or len(tried) == len(self.slots):
+                    raise
+                logger.warning(f"Retrying call on another key after {slot.name} failed: {str(e)}")
+                continue
+            finally:
+                with self._lock:
+                    slot.in_flight -= 1
+
+            with self._lock:
+                slot.calls += 1
+                slot.consecutive_failures = 0
+            return response
+
+    def _pick(self, tried: Set[KeySlot], deadline: Optional[float]) -> KeySlot:
+        """Reserve the least loaded usable key, waiting while every untried key cools down"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                candidates = [slot for slot in self.slots if slot not in tried and not slot.disabled]
+                if not candidates:
+                    raise NoHealthyKey("No usable API key left in the pool")
+                ready = [slot for slot in candidates if slot.available(now)]
+                if ready:
+                    slot = min(ready, key=lambda slot: (slot.load, slot.calls))
+                    slot.in_flight += 1
+                    return slot
+                wait = min(slot.cooldown_until for slot in candidates) - now
+
+            if deadline is not None and now + wait >= deadline:
+                raise DeadlineExceeded("All API keys are cooling down past the call deadline")
+            logger.info(f"All API keys are cooling down, waiting {wait:.1f}s")
+            time.sleep(wait)
+
+    def _record_failure(self, slot: KeySlot, error: Exception) -> bool:
+        """Update the key's health; returns whether another key may succeed with the same call"""
+        code = getattr(error, 'code', None)
+        with self._lock:
+            slot.errors += 1
+            slot.consecutive_failures += 1
+            if code in AUTH_ERRORS or "API key not valid" in str(error):
+                slot.disabled = True
+                logger.error(f"Disabled {slot.name}: {str(error)}")
+                return True
+            if code in RATE_ERRORS:
+                slot.cooldown_until = time.monotonic() + self.cooldown
+                return True
+            if slot.consecutive_failures >= self.max_failures:
+                slot.cooldown_until = time.monotonic() + self.cooldown
+                logger.warning(f"{slot.name} failed {slot.consecutive_failures} times in a row, "
+                               f"pausing it for {self.cooldown:.0f}s")
+            # Other errors are about the request itself, not the key
+            return False
+
+    def stats(self) -> Dict[str, Dict]:
+        """Get calls, errors and health per key"""
+        with self._lock:
+            return {slot.name: slot.stats() for slot in self.slots}
+
+
+class PoolSession:
+    """Calls through a pool with a fixed system instruction"""
+
+    def __init__(self, pool: ClientPool, system_instruction: str):
+        self.pool = pool
+        self.system_instruction = system_instruction
+        self.model_name = pool.model_name
+
+    def generate_content(self, contents, **kwargs):
+        return self.pool._generate(contents, self.system_instruction, kwargs)
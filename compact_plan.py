@@ -0,0 +1,338 @@
+"""Compact slotted representations of SlideContent and LessonPlan."""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import json
+import sys
+
+from gemini_content_generator import SlideContent, LessonPlan, SlideType
+
+MAGIC = b'CAPL'
+FORMAT_VERSION = 2  # 2: bullet levels
+
+# Interactive element values: tuple of strings, or a JSON string for anything else
+InteractiveValue = Union[Tuple[str, ...], str]
+
+
+class StringPool:
+    """Interns strings and string tuples so repeated text is stored once"""
+
+    def __init__(self):
+        self._tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def text(self, value: Optional[str]) -> Optional[str]:
+        return sys.intern(value) if value is not None else None
+
+    def texts(self, values: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+        if values is None:
+            return None
+        key = tuple(self.text(str(value)) for value in values)
+        return self._tuples.setdefault(key, key)
+
+
+@dataclass(frozen=True, slots=True)
+class CompactSlide:
+    title: str
+    main_content: str
+    slide_type: SlideType
+    bullet_points: Optional[Tuple[str, ...]] = None
+    notes: Optional[str] = None
+    interactive_elements: Optional[Tuple[Tuple[str, InteractiveValue], ...]] = None
+    layout_hint: Optional[str] = None
+    bullet_levels: Optional[Tuple[int, ...]] = None
+
+    @classmethod
+    def from_slide(cls, content: SlideContent, pool: Optional[StringPool] = None) -> 'CompactSlide':
+        """Create a compact slide, sharing strings through the pool"""
+        pool = pool or StringPool()
+        interactive = None
+        if content.interactive_elements is not None:
+            items = []
+            for key, value in content.interactive_elements.items():
+                if isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value):
+                    items.append((pool.text(key), pool.texts(value)))
+                else:
+                    items.append((pool.text(key), pool.text(json.dumps(value, sort_keys=True))))
+            interactive = tuple(items)
+
+        return cls(
+            title=pool.text(content.title),
+            main_content=pool.text(content.main_content),
+            slide_type=content.slide_type,
+            bullet_points=pool.texts(content.bullet_points),
+            notes=pool.text(content.notes),
+            interactive_elements=interactive,
+            layout_hint=pool.text(content.layout_hint),
+            bullet_levels=tuple(content.bullet_levels) if content.bullet_levels is not None else None
+        )
+
+    def to_slide(self) -> SlideContent:
+        """Expand back into a mutable SlideContent"""
+        interactive = None
+        if self.interactive_elements is not None:
+            interactive = {
+                key: list(value) if isinstance(value, tuple) else json.loads(value)
+                for key, value in self.interactive_elements
+            }
+        return SlideContent(
+            title=self.title,
+            main_content=self.main_content,
+            slide_type=self.slide_type,
+            bullet_points=list(self.bullet_points) if self.bullet_points is not None else None,
+            notes=self.notes,
+            interactive_elements=interactive,
+            layout_hint=self.layout_hint,
+            bullet_levels=list(self.bullet_levels) if self.bullet_levels is not None else None
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CompactLessonPlan:
+    title: str
+    description: str
+    learning_objectives: Tuple[str, ...]
+    slides: Tuple[CompactSlide, ...]
+    practical_activities: Optional[str] = None  # JSON
+    assessment: Optional[str] = None  # JSON
+
+    @classmethod
+    def from_lesson_plan(cls, lesson_plan: LessonPlan) -> 'CompactLessonPlan':
+        """Create a compact lesson plan; all slides share one string pool"""
+        pool = StringPool()
+        return cls(
+            title=pool.text(lesson_plan.title),
+            description=pool.text(lesson_plan.description),
+            learning_objectives=pool.texts(lesson_plan.learning_objectives),
+            slides=tuple(CompactSlide.from_slide(slide, pool) for slide in lesson_plan.slides),
+            practical_activities=_to_json(lesson_plan.practical_activities),
+            assessment=_to_json(lesson_plan.assessment)
+        )
+
+    def to_lesson_plan(self) -> LessonPlan:
+        """Expand back into a mutable LessonPlan"""
+        return LessonPlan(
+            title=self.title,
+            description=self.description,
+            learning_objectives=list(self.learning_objectives),
+            slides=[slide.to_slide() for slide in self.slides],
+            practical_activities=_from_json(self.practical_activities),
+            assessment=_from_json(self.assessment)
+        )
+
+    def to_bytes(self) -> bytes:
+        """Serialize to the compact binary format"""
+        encoder = _Encoder()
+        encoder.string(self.title)
+        encoder.string(self.description)
+        encoder.strings(self.learning_objectives)
+        encoder.string(self.practical_activities)
+        encoder.string(self.assessment)
+        encoder.slides(self.slides)
+        return encoder.finish()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'CompactLessonPlan':
+        """Deserialize from the compact binary format"""
+        decoder = _Decoder(data)
+        return cls(
+            title=decoder.string(),
+            description=decoder.string(),
+            learning_objectives=decoder.strings(),
+            practical_activities=decoder.string(),
+            assessment=decoder.string(),
+            slides=decoder.slides()
+        )
+
+
+def encode_slides(slides: List[SlideContent]) -> bytes:
+    """Serialize a list of slides to the compact binary format (e.g. for worker IPC)"""
+    pool = StringPool()
+    encoder = _Encoder()
+    encoder.slides([CompactSlide.from_slide(slide, pool) for slide in slides])
+    return encoder.finish()
+
+
+def decode_slides(data: bytes) -> List[SlideContent]:
+    """Deserialize slides written by encode_slides"""
+    return [slide.to_slide() for slide in _Decoder(data).slides()]
+
+
+def deep_sizeof(obj, _seen=None) -> int:
+    """Approximate memory footprint of an object graph, counting shared objects once"""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen or isinstance(obj, (SlideType, type(None), bool)):
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    elif hasattr(obj, '__slots__'):
+        size += sum(deep_sizeof(getattr(obj, name), seen) for name in obj.__slots__ if hasattr(obj, name))
+    return size
+
+
+def _to_json(value) -> Optional[str]:
+    return sys.intern(json.dumps(value, sort_keys=True)) if value is not None else None
+
+
+def _from_json(value: Optional[str]):
+    return json.loads(value) if value is not None else None
+
+
+class _Encoder:
+    """Writes a string table followed by varint references into it"""
+
+    def __init__(self):
+        self._index: Dict[str, int] = {}
+        self._strings: List[str] = []
+        self._body = bytearray()
+
+    def _varint(self, value: int, out: bytearray = None):
+        out = self._body if out is None else out
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+
+    def string(self, value: Optional[str]):
+        # 0 encodes None, n encodes string table entry n - 1
+        if value is None:
+            self._varint(0)
+            return
+        if value not in self._index:
+            self._index[value] = len(self._strings)
+            self._strings.append(value)
+        self._varint(self._index[value] + 1)
+
+    def strings(self, values: Optional[Iterable[str]]):
+        if values is None:
+            self._varint(0)
+            return
+        values = list(values)
+        self._varint(len(values) + 1)
+        for value in values:
+            self.string(value)
+
+    def integers(self, values: Optional[Iterable[int]]):
+        if values is None:
+            self._varint(0)
+            return
+        values = list(values)
+        self._varint(len(values) + 1)
+        for value in values:
+            self._varint(value)
+
+    def slides(self, slides: Iterable[CompactSlide]):
+        slides = list(slides)
+        self._varint(len(slides))
+        for slide in slides:
+            self.string(slide.title)
+            self.string(slide.main_content)
+            self.string(slide.slide_type.value)
+            self.strings(slide.bullet_points)
+            self.string(slide.notes)
+            if slide.interactive_elements is None:
+                self._varint(0)
+            else:
+                self._varint(len(slide.interactive_elements) + 1)
+                for key, value in slide.interactive_elements:
+                    self.string(key)
+                    if isinstance(value, tuple):
+                        self._varint(0)
+                        self.strings(value)
+                    else:
+                        self._varint(1)
+                        self.string(value)
+            self.string(slide.layout_hint)
+            self.integers(slide.bullet_levels)
+
+    def finish(self) -> bytes:
+        header = bytearray(MAGIC)
+        header.append(FORMAT_VERSION)
+        self._varint(len(self._strings), header)
+        for value in self._strings:
+            encoded = value.encode('utf-8')
+            self._varint(len(encoded), header)
+            header += encoded
+        return bytes(header + self._body)
+
+
+class _Decoder:
+    """Reads data written by _Encoder"""
+
+    def __init__(self, data: bytes):
+        if data[:4] != MAGIC:
+            raise ValueError("Not a compact lesson plan payload")
+        if data[4] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported compact format version: {data[4]}")
+        self._data = memoryview(data)
+        self._pos = 5
+        self._strings = []
+        for _ in range(self._varint()):
+            length = self._varint()
+            value = bytes(self._data[self._pos:self._pos + length]).decode('utf-8')
+            self._strings.append(sys.intern(value))
+            self._pos += length
+        self._tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+    def _varint(self) -> int:
+        result = 0
+        shift = 0
+        while True:
+            byte = self._data[self._pos]
+            self._pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def string(self) -> Optional[str]:
+        ref = self._varint()
+        return self._strings[ref - 1] if ref else None
+
+    def strings(self) -> Optional[Tuple[str, ...]]:
+        count = self._varint()
+        if not count:
+            return None
+        values = tuple(self.string() for _ in range(count - 1))
+        return self._tuples.setdefault(values, values)
+
+    def integers(self) -> Optional[Tuple[int, ...]]:
+        count = self._varint()
+        if not count:
+            return None
+        return tuple(self._varint() for _ in range(count - 1))
+
+    def slides(self) -> Tuple[CompactSlide, ...]:
+        slides = []
+        for _ in range(self._varint()):
+            title = self.string()
+            main_content = self.string()
+            slide_type = SlideType(self.string())
+            bullet_points = self.strings()
+            notes = self.string()
+            interactive = None
+            count = self._varint()
+            if count:
+                items = []
+                for _ in range(count - 1):
+                    key = self.string()
+                    is_json = self._varint()
+                    items.append((key, self.string() if is_json else self.strings()))
+                interactive = tuple(items)
+            slides.append(CompactSlide(
+                title=title,
+                main_content=main_content,
+                slide_type=slide_type,
+                bullet_points=bullet_points,
+                notes=notes,
+                interactive_elements=interactive,
+                layout_hint=self.string(),
+                bullet_levels=self.integers()
+            ))
+        return tuple(slides)
@@ -0,0 +1,192 @@
+"""Parallel per-section deck assembly and fast slide merging."""
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from copy import deepcopy
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+import logging
+import os
+import re
+
+from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.packuri import PackURI
+
+from gemini_content_generator import SlideContent, SlideType
+from compact_plan import encode_slides, decode_slides
+from pagination import is_continuation
+
+logger = logging.getLogger(__name__)
+
+# Relationships re-created by add_slide() or handled separately
+SKIPPED_RELTYPES = {RT.SLIDE_LAYOUT, RT.NOTES_SLIDE}
+
+R_NAMESPACE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+
+def split_sections(slides: List[SlideContent]) -> List[Tuple[int, List[SlideContent]]]:
+    """Split paginated slides into (1-based number of the first slide, slides) sections at each TITLE slide
+
+    Continuation pages keep the number of the slide they were split from and stay in its section.
+    """
+    sections = []
+    number = 0
+    for content in slides:
+        if is_continuation(content) and sections:
+            sections[-1][1].append(content)
+            continue
+        number += 1
+        if not sections or content.slide_type == SlideType.TITLE:
+            sections.append((number, []))
+        sections[-1][1].append(content)
+    return sections
+
+
+def remove_all_slides(presentation) -> None:
+    """Remove every slide from a presentation (e.g. the template's sample slides)"""
+    slide_id_list = presentation.slides._sldIdLst
+    for slide_id in list(slide_id_list):
+        presentation.part.drop_rel(slide_id.rId)
+        slide_id_list.remove(slide_id)
+
+
+def build_section(template_path: str, payload: bytes, start_index: int,
+                  template_data: Optional[bytes] = None) -> bytes:
+    """Build one section (compact-encoded slides) as a standalone deck and return its bytes"""
+    # Imported here to avoid a circular import with slide_generator
+    from slide_generator import EnhancedSlideGenerator
+
+    generator = EnhancedSlideGenerator(template_path, template_data=template_data)
+    remove_all_slides(generator.presentation)
+    generator.render_slides(decode_slides(payload), start_index)
+
+    stream = BytesIO()
+    generator.presentation.save(stream)
+    return stream.getvalue()
+
+
+def build_sections_parallel(template_path: str, sections: List[Tuple[int, List[SlideContent]]],
+                            max_workers: Optional[int] = None,
+                            executor: Optional[Executor] = None,
+                            template_data: Optional[bytes] = None) -> List[bytes]:
+    """Build all sections in worker processes, keeping section order
+
+    A long-running caller passes its own executor so the worker processes stay warm between decks,
+    and template_data so they use its in-memory template rather than re-reading the file.
+    """
+    if executor is not None:
+        return _submit_sections(executor, template_path, sections, template_data)
+
+    max_workers = max_workers or min(len(sections), os.cpu_count() or 1)
+    logger.info(f"Building {len(sections)} sections with {max_workers} worker processes")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return _submit_sections(executor, template_path, sections, template_data)
+
+
+def _submit_sections(executor: Executor, template_path: str, sections: List[Tuple[int, List[SlideContent]]],
+                     template_data: Optional[bytes] = None) -> List[bytes]:
+    futures = [
+        executor.submit(build_section, template_path, encode_slides(slides), start_index, template_data)
+        for start_index, slides in sections
+    ]
+    return [future.result() for future in futures]
+
+
+class SlideMerger:
+    """Copies slides with their parts and relationships into a target deck"""
+
+    def __init__(self, presentation):
+        self.presentation = presentation
+        self.package = presentation.part.package
+        # Layout lookup is done once instead of per slide
+        self.layouts_by_name = {layout.name: layout for layout in presentation.slide_layouts}
+        self._adopted: Dict[int, object] = {}
+        self._reserved = set()
+
+    def merge(self, source) -> int:
+        """Append all slides of a source deck (Presentation, path or bytes)"""
+        if isinstance(source, (bytes, bytearray)):
+            source = Presentation(BytesIO(source))
+        elif isinstance(source, str):
+            source = Presentation(source)
+
+        self._adopted.clear()
+        count = 0
+        for slide in source.slides:
+            self.copy_slide(slide)
+            count += 1
+        return count
+
+    def copy_slide(self, source_slide):
+        """Copy one slide, its shapes, related parts and notes"""
+        layout = self.layouts_by_name.get(source_slide.slide_layout.name)
+        if layout is None:
+            logger.warning(f"Layout '{source_slide.slide_layout.name}' not in target, using first layout")
+            layout = self.presentation.slide_layouts[0]
+
+        new_slide = self.presentation.slides.add_slide(layout)
+
+        # Re-create relationships and remember how rIds were renamed
+        rid_map = {}
+        for rel in list(source_slide.part.rels.values()):
+            if rel.reltype in SKIPPED_RELTYPES:
+                continue
+            if rel.is_external:
+                rid_map[rel.rId] = new_slide.part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+            elif rel.reltype == RT.IMAGE:
+                _, new_rid = new_slide.part.get_or_add_image_part(BytesIO(rel.target_part.blob))
+                rid_map[rel.rId] = new_rid
+            else:
+                target = self._adopt_part(rel.target_part)
+                rid_map[rel.rId] = new_slide.part.relate_to(target, rel.reltype)
+
+        # Replace the layout's placeholder shapes with the source shape tree
+        new_tree = new_slide.shapes._spTree
+        for element in list(new_tree):
+            new_tree.remove(element)
+        for element in source_slide.shapes._spTree:
+            new_tree.append(deepcopy(element))
+        self._remap_rids(new_tree, rid_map)
+
+        if source_slide.has_notes_slide:
+            notes_text = source_slide.notes_slide.notes_text_frame.text
+            if notes_text:
+                new_slide.notes_slide.notes_text_frame.text = notes_text
+
+        return new_slide
+
+    def _adopt_part(self, part):
+        """Move a foreign part (and its own related parts) into the target package"""
+        key = id(part)
+        if key in self._adopted:
+            return self._adopted[key]
+
+        template = re.sub(r'\d*(\.\w+)$', r'%d\1', str(part.partname), count=1)
+        part.partname = self._next_partname(template)
+        part._package = self.package
+        self._adopted[key] = part
+
+        for rel in part.rels.values():
+            if not rel.is_external:
+                self._adopt_part(rel.target_part)
+        return part
+
+    def _next_partname(self, template: str) -> PackURI:
+        """Get a free partname, including names reserved by parts not yet related"""
+        used = {str(part.partname) for part in self.package.iter_parts()} | self._reserved
+        number = 1
+        while template % number in used:
+            number += 1
+        self._reserved.add(template % number)
+        return PackURI(template % number)
+
+    @staticmethod
+    def _remap_rids(element, rid_map: Dict[str, str]) -> None:
+        """Rewrite r:id/r:embed/r:link references after relationships were re-created"""
+        if not rid_map:
+            return
+        for node in element.iter():
+            for name, value in node.attrib.items():
+                if name.startswith(f"{{{R_NAMESPACE}}}") and value in rid_map:
+                    node.set(name, rid_map[value])
@@ -0,0 +1,330 @@
+"""Long-running deck build service: an asyncio HTTP front over a SQLite job queue and warm workers.
+
+Endpoints:
+    POST /jobs                {"module": ..., "lesson_title": ..., "parallel": false} -> 202 with the job
+    GET  /jobs                newest jobs (?status=queued|running|done|failed)
+    GET  /jobs/<id>           job state, with live progress while it runs
+    GET  /jobs/<id>/deck      the finished .pptx
+    GET  /health              queue counts and worker state
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, parse_qs
+import argparse
+import asyncio
+import json
+import logging
+import os
+
+from dotenv import load_dotenv
+
+from client_pool import ClientPool, api_keys_from_env
+from gemini_content_generator import GeminiContentGenerator
+from job_queue import JobQueue, Job, DONE, RUNNING
+from plan_store import plan_path_for
+from quota_scheduler import BATCH, SHARED_QUOTA
+from slide_generator import EnhancedSlideGenerator
+from template_cache import TemplateCache
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY = 64 * 1024
+# Seconds a running job stays claimed without a heartbeat; renewed every third of it
+JOB_LEASE = 60.0
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 409: "Conflict", 500: "Internal Server Error"}
+
+
+class DeckWorker:
+    """Builds one deck at a time with a content generator (model client, manifest, chart renderer) kept warm"""
+
+    def __init__(self, name: str, client_pool: ClientPool, template_path: str, output_dir: str,
+                 templates: TemplateCache, section_pool: Optional[ProcessPoolExecutor] = None):
+        self.name = name
+        self.template_path = template_path
+        self.output_dir = output_dir
+        self.templates = templates
+        self.section_pool = section_pool
+        self.job: Optional[Job] = None
+        # Manifest per worker, since concurrent builds would overwrite each other's file
+        self.generator = GeminiContentGenerator(
+            client_pool,
+            manifest_path=os.path.join(output_dir, f"build_manifest.{name}.json"),
+            priority=BATCH
+        )
+
+    def build(self, job: Job) -> str:
+        """Generate the deck of a job and return its path"""
+        self.job = job
+        try:
+            output_path = os.path.join(self.output_dir, f"{job.id}.pptx")
+            lesson_plan = self.generator.generate_lesson_plan(
+                job.module, job.lesson_title, plan_path=plan_path_for(output_path)
+            )
+
+            slide_generator = EnhancedSlideGenerator(
+                self.template_path,
+                progress=self.generator.progress,
+                template_data=self.templates.get(self.template_path)
+            )
+            slide_generator.generate_lesson_slides(
+                lesson_plan, parallel=bool(job.options.get("parallel")), executor=self.section_pool
+            )
+            # Written under a temporary name so a download never sees a half-written deck
+            temp_path = f"{output_path}.tmp"
+            slide_generator.save_presentation(temp_path)
+            os.replace(temp_path, output_path)
+
+            self.generator.model.usage.save_report(os.path.splitext(output_path)[0] + ".usage.json")
+            return output_path
+        finally:
+            self.job = None
+
+    def progress(self) -> Optional[Dict]:
+        """Get the progress snapshot of the running job, if any"""
+        if self.job is None:
+            return None
+        return asdict(self.generator.progress.snapshot())
+
+
+class DeckServer:
+    """Serves the job API and hands queued jobs to idle workers"""
+
+    def __init__(self, queue: JobQueue, workers: List[DeckWorker], poll_interval: float = 2.0):
+        self.queue = queue
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=len(workers), thread_name_prefix="deck-worker")
+        self._wakeup: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Queue] = None
+        # Running builds, referenced so they are not garbage-collected and can be awaited on shutdown
+        self._builds: Set[asyncio.Task] = set()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080) -> None:
+        """Serve until cancelled"""
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Queue()
+        for worker in self.workers:
+            self._idle.put_nowait(worker)
+
+        server = await asyncio.start_server(self._handle, host, port)
+        logger.info(f"Deck server listening on http://{host}:{port} with {len(self.workers)} workers")
+        dispatcher = asyncio.create_task(self._dispatch())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            dispatcher.cancel()
+            if self._builds:
+                logger.info(f"Waiting for {len(self._builds)} running builds to finish")
+            await asyncio.gather(dispatcher, *self._builds, return_exceptions=True)
+            self._executor.shutdown(wait=False)
+
+    async def _dispatch(self) -> None:
+        """Give the oldest queued job to the next idle worker"""
+        while True:
+            worker = await self._idle.get()
+            job = None
+            while job is None:
+                self._wakeup.clear()
+                try:
+                    job = await asyncio.to_thread(self.queue.claim, worker.name)
+                except Exception as e:
+                    logger.error(f"Error claiming a job: {str(e)}")
+                if job is None:
+                    # Jobs may also be queued by other processes sharing the database, hence the poll
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+            build = asyncio.create_task(self._run(worker, job))
+            self._builds.add(build)
+            build.add_done_callback(self._builds.discard)
+
+    async def _run(self, worker: DeckWorker, job: Job) -> None:
+        logger.info(f"Worker {worker.name} building job {job.id}: {job.module} / {job.lesson_title}")
+        loop = asyncio.get_running_loop()
+        heartbeat = asyncio.create_task(self._renew(job.id))
+        try:
+            output_path = await loop.run_in_executor(self._executor, worker.build, job)
+            await asyncio.to_thread(self.queue.finish, job.id, output_path)
+            logger.info(f"Job {job.id} done: {output_path}")
+        except Exception as e:
+            logger.error(f"Error building job {job.id}: {str(e)}", exc_info=True)
+            await asyncio.to_thread(self.queue.fail, job.id, str(e))
+        finally:
+            heartbeat.cancel()
+            self._idle.put_nowait(worker)
+
+    async def _renew(self, job_id: str) -> None:
+        """Keep the job's lease while it builds, so other servers on the same database leave it alone"""
+        while True:
+            await asyncio.sleep(self.queue.lease / 3)
+            try:
+                await asyncio.to_thread(self.queue.renew, job_id)
+            except Exception as e:
+                logger.error(f"Error renewing lease of job {job_id}: {str(e)}")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer one HTTP request and close the connection"""
+        try:
+            method, target, body = await self._read_request(reader)
+            status, content_type, payload = await self._route(method, target, body)
+        except ValueError as e:
+            status, content_type, payload = 400, "application/json", self._json({"error": str(e)})
+        except Exception as e:
+            logger.error(f"Error handling request: {str(e)}", exc_info=True)
+            status, content_type, payload = 500, "application/json", self._json({"error": "internal error"})
+
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: close\r\n\r\n")
+        try:
+            writer.write(head.encode('latin-1') + payload)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+        """Read the request line, headers and body"""
+        request_line = (await reader.readline()).decode('latin-1').split()
+        if len(request_line) != 3:
+            raise ValueError("Malformed request line")
+        method, target, _ = request_line
+
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode('latin-1').strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY:
+            raise ValueError("Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, body
+
+    async def _route(self, method: str, target: str, body: bytes) -> Tuple[int, str, bytes]:
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts == ["health"] and method == "GET":
+            counts = await asyncio.to_thread(self.queue.counts)
+            busy = [worker.name for worker in self.workers if worker.job is not None]
+            return self._ok({"jobs": counts, "workers": len(self.workers), "busy": busy})
+
+        if parts == ["jobs"]:
+            if method == "POST":
+                return await self._submit(body)
+            if method == "GET":
+                status = parse_qs(url.query).get("status", [None])[0]
+                jobs = await asyncio.to_thread(self.queue.list, status)
+                return self._ok({"jobs": [self._job_view(job) for job in jobs]})
+            return self._error(405, "Use GET or POST")
+
+        if parts[:1] == ["jobs"] and len(parts) in (2, 3) and method == "GET":
+            job = await asyncio.to_thread(self.queue.get, parts[1])
+            if job is None:
+                return self._error(404, f"No job {parts[1]}")
+            if len(parts) == 2:
+                return self._ok(self._job_view(job))
+            if parts[2] == "deck":
+                if job.status != DONE:
+                    return self._error(409, f"Job {job.id} is {job.status}")
+                with open(job.output_path, 'rb') as f:
+                    data = await asyncio.to_thread(f.read)
+                return 200, "application/vnd.openxmlformats-officedocument.presentationml.presentation", data
+
+        return self._error(404, "Not found")
+
+    async def _submit(self, body: bytes) -> Tuple[int, str, bytes]:
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            raise ValueError("Body must be JSON")
+        module, lesson_title = request.get("module"), request.get("lesson_title")
+        if not isinstance(module, str) or not isinstance(lesson_title, str) or not module or not lesson_title:
+            raise ValueError("module and lesson_title are required")
+
+        job = await asyncio.to_thread(
+            self.queue.submit, module, lesson_title, parallel=bool(request.get("parallel", False))
+        )
+        self._wakeup.set()
+        return 202, "application/json", self._json(self._job_view(job))
+
+    def _job_view(self, job: Job) -> Dict:
+        view = job.to_dict()
+        view.pop("output_path")
+        if job.status == DONE:
+            view["deck_url"] = f"/jobs/{job.id}/deck"
+        if job.status == RUNNING:
+            worker = next((worker for worker in self.workers if worker.job and worker.job.id == job.id), None)
+            if worker is not None:
+                view["progress"] = worker.progress()
+        return view
+
+    @staticmethod
+    def _json(data) -> bytes:
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    def _ok(self, data) -> Tuple[int, str, bytes]:
+        return 200, "application/json", self._json(data)
+
+    def _error(self, status: int, message: str) -> Tuple[int, str, bytes]:
+        return status, "application/json", self._json({"error": message})
+
+
+def create_server(api_keys: List[str], template_path: str = "template.pptx", output_dir: str = "presentations",
+                  workers: int = 2, section_workers: int = 0, lease: float = JOB_LEASE) -> DeckServer:
+    """Set up the queue and warm workers; section_workers > 0 keeps a process pool for parallel section builds"""
+    os.makedirs(output_dir, exist_ok=True)
+    # Jobs of a server that stopped mid-build are taken over once their lease runs out
+    queue = JobQueue(os.path.join(output_dir, "jobs.sqlite"), lease=lease)
+    # All workers share one set of API keys and the process-wide quota
+    client_pool = ClientPool(api_keys)
+    # More keys bring more quota to share
+    SHARED_QUOTA.ensure_capacity(client_pool.capacity)
+    templates = TemplateCache()
+    section_pool = ProcessPoolExecutor(max_workers=section_workers) if section_workers else None
+    deck_workers = [
+        DeckWorker(f"worker-{i}", client_pool, template_path, output_dir, templates, section_pool)
+        for i in range(1, workers + 1)
+    ]
+    return DeckServer(queue, deck_workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve deck builds over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=2, help="decks built at the same time")
+    parser.add_argument("--section-workers", type=int, default=0,
+                        help="warm worker processes shared by jobs submitted with parallel=true "
+                             "(0: each such job starts its own pool)")
+    parser.add_argument("--template", default="template.pptx")
+    parser.add_argument("--output-dir", default="presentations")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    load_dotenv()
+    api_keys = api_keys_from_env()
+    if not api_keys:
+        raise ValueError("Please set Gemini_API_KEY in your .env file")
+    if not os.path.exists(args.template):
+        raise FileNotFoundError(f"Template file not found: {args.template}")
+
+    server = create_server(api_keys, args.template, args.output_dir, args.workers, args.section_workers)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        logger.info("Deck server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.dml.color import RGBColor
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 from gemini_content_generator import GeminiContentGenerator, SlideContent, SlideType, LessonPlan
+from slide_renderers import RendererRegistry, body_paragraphs
 import os
 import logging
 from dotenv import load_dotenv
@@ -18,6 +19,9 @@ class SlideGenerator:
         self.presentation = Presentation(template_path)
         self.template_path = template_path
         self._validate_template()
+        
+        # Layouts and bodies per slide type come from the shared renderer registry
+        self.renderers = RendererRegistry(self.presentation)
 
     def _validate_template(self):
         """Validate template layouts and log available placeholders"""
@@ -69,8 +73,8 @@ class SlideGenerator:
 
     def create_content_slide(self, content: SlideContent) -> None:
         """Create a content slide based on the slide type"""
-        layout_index = self._get_layout_index(content.slide_type)
-        slide = self.presentation.slides.add_slide(self.presentation.slide_layouts[layout_index])
+        layout = self.renderers.layout(self.renderers.layout_name(content))
+        slide = self.presentation.slides.add_slide(layout)
         
         # Add title
         title_shape = self._get_safe_placeholder(slide, 0)
@@ -79,16 +83,7 @@ class SlideGenerator:
         
         # Add content based on slide type
         try:
-            if content.slide_type == SlideType.CONTENT:
-                self._add_content_body(slide, content)
-            elif content.slide_type == SlideType.INTERACTIVE:
-                self._add_interactive_content(slide, content)
-            elif content.slide_type == SlideType.LAB:
-                self._add_lab_content(slide, content)
-            elif content.slide_type == SlideType.QUIZ:
-                self._add_quiz_content(slide, content)
-            elif content.slide_type == SlideType.SUMMARY:
-                self._add_summary_content(slide, content)
+            self._add_body(slide, content)
         except Exception as e:
             logger.error(f"Error adding content to slide: {str(e)}")
             self._add_fallback_content(slide, content)
@@ -110,94 +105,20 @@ class SlideGenerator:
                 p.text = f"• {point}"
                 p.level = 0
 
-    def _add_content_body(self, slide, content: SlideContent) -> None:
-        """Add regular content with bullet points"""
+    def _add_body(self, slide, content: SlideContent) -> None:
+        """Add the body paragraphs of the slide's renderer"""
+        paragraphs = body_paragraphs(content)
+        if not paragraphs:
+            return
+        
         textbox = self._get_safe_placeholder(slide, 1)
         tf = textbox.text_frame
         tf.word_wrap = True
         
-        # Add main content
-        tf.text = content.main_content
-        
-        # Add bullet points
-        if content.bullet_points:
-            for point in content.bullet_points:
-                p = tf.add_paragraph()
-                p.text = point
-                p.level = 0
-
-    def _get_layout_index(self, slide_type: SlideType) -> int:
-        """Get the appropriate layout index based on slide type"""
-        layout_map = {
-            SlideType.CONTENT: 1,
-            SlideType.INTERACTIVE: 2,
-            SlideType.LAB: 3,
-            SlideType.QUIZ: 4,
-            SlideType.SUMMARY: 5
-        }
-        return layout_map.get(slide_type, 1)  # Default to content layout
-
-    def _add_interactive_content(self, slide, content: SlideContent) -> None:
-        """Add interactive content with discussion points"""
-        body_shape = slide.shapes.placeholders[1]
-        tf = body_shape.text_frame
-        tf.text = "Discussion Points:"
-        
-        if content.interactive_elements:
-            for point in content.interactive_elements.get("points", []):
-                p = tf.add_paragraph()
-                p.text = f"👉 {point}"
-                p.level = 0
-
-    def _add_lab_content(self, slide, content: SlideContent) -> None:
-        """Add lab exercise content"""
-        body_shape = slide.shapes.placeholders[1]
-        tf = body_shape.text_frame
-        tf.text = "Lab Exercise"
-        
-        if content.interactive_elements:
-            # Add objectives
-            p = tf.add_paragraph()
-            p.text = "Objectives:"
-            for obj in content.interactive_elements.get("objectives", []):
-                p = tf.add_paragraph()
-                p.text = f"• {obj}"
-                p.level = 1
-            
-            # Add tools
-            p = tf.add_paragraph()
-            p.text = "\nRequired Tools:"
-            for tool in content.interactive_elements.get("tools", []):
-                p = tf.add_paragraph()
-                p.text = f"• {tool}"
-                p.level = 1
-
-    def _add_quiz_content(self, slide, content: SlideContent) -> None:
-        """Add quiz questions"""
-        body_shape = slide.shapes.placeholders[1]
-        tf = body_shape.text_frame
-        tf.text = "Knowledge Check"
-        
-        if content.interactive_elements:
-            for i, question in enumerate(content.interactive_elements.get("questions", []), 1):
-                p = tf.add_paragraph()
-                p.text = f"\nQ{i}: {question['question']}"
-                for option in question.get("options", []):
-                    p = tf.add_paragraph()
-                    p.text = f"   □ {option}"
-                    p.level = 1
-
-    def _add_summary_content(self, slide, content: SlideContent) -> None:
-        """Add summary content"""
-        body_shape = slide.shapes.placeholders[1]
-        tf = body_shape.text_frame
-        tf.text = "Key Takeaways:"
-        
-        if content.bullet_points:
-            for point in content.bullet_points:
-                p = tf.add_paragraph()
-                p.text = f"✓ {point}"
-                p.level = 0
+        for i, (text, formatting) in enumerate(paragraphs):
+            p = tf.paragraphs[0] if i == 0 else tf.add_paragraph()
+            p.text = text
+            p.level = formatting.get('indent_level', 0)
 
     def generate_lesson_slides(self, lesson_plan: LessonPlan) -> None:
         """Generate all slides for a lesson"""
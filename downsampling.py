@@ -0,0 +1,72 @@
+"""Vectorized downsampling and binning that keep chart rendering time bounded for large series."""
+
+from typing import Tuple
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Get the indices of n_out points chosen by Largest-Triangle-Three-Buckets
+
+    Work per bucket is vectorized, so the Python loop runs n_out times whatever the input size.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket i covers [edges[i], edges[i + 1]); first and last points are always kept
+    edges = (np.floor(np.arange(n_out - 1) * ((n - 2) / (n_out - 2))) + 1).astype(int)
+    edges[-1] = n - 1
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    selected = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Twice the triangle area between the last selected point, each candidate and the next bucket's mean
+        area = np.abs((x[selected] - avg_x) * (y[start:end] - y[selected])
+                      - (x[selected] - x[start:end]) * (avg_y - y[selected]))
+        selected = start + int(np.argmax(area))
+        indices[i + 1] = selected
+    return indices
+
+
+def min_max(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Get sorted indices of the minimum and maximum of n_out / 2 equal buckets, keeping every spike"""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    buckets = n_out // 2
+    if n_out >= n or buckets < 1:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    bucket_ids = np.repeat(np.arange(buckets), np.diff(edges))
+    # Sorted by bucket, then value: each bucket's first entry is its minimum, its last its maximum
+    order = np.lexsort((y, bucket_ids))
+    return np.unique(np.concatenate([order[edges[:-1]], order[edges[1:] - 1]]))
+
+
+def bin_2d(x: np.ndarray, y: np.ndarray, bins: int = 50) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Count points on a bins x bins grid; returns counts[y, x] with the x and y bin edges"""
+    counts, x_edges, y_edges = np.histogram2d(np.asarray(x, dtype=float), np.asarray(y, dtype=float), bins=bins)
+    return counts.T, x_edges, y_edges
+
+
+def reduce_matrix(matrix: np.ndarray, max_rows: int, max_cols: int) -> Tuple[np.ndarray, int, int]:
+    """Sum blocks of a matrix so it has at most max_rows x max_cols cells; returns it with the block size"""
+    matrix = np.asarray(matrix, dtype=float)
+    row_block = -(-matrix.shape[0] // max_rows)
+    col_block = -(-matrix.shape[1] // max_cols)
+    if row_block == 1 and col_block == 1:
+        return matrix, 1, 1
+
+    rows = -(-matrix.shape[0] // row_block) * row_block
+    cols = -(-matrix.shape[1] // col_block) * col_block
+    padded = np.zeros((rows, cols))
+    padded[:matrix.shape[0], :matrix.shape[1]] = np.nan_to_num(matrix)
+    blocks = padded.reshape(rows // row_block, row_block, cols // col_block, col_block)
+    return blocks.sum(axis=(1, 3)), row_block, col_block
@@ -0,0 +1,153 @@
+"""Chunked aggregation of large CSV / JSON-lines event exports into chart data."""
+
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Sequence
+import logging
+import os
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 250_000  # rows per chunk
+JSON_LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+OTHER_LABEL = "Other"
+
+
+def iter_chunks(path: str, columns: Optional[Sequence[str]] = None,
+                chunk_size: int = DEFAULT_CHUNK_SIZE, memory_map: bool = False) -> Iterator[pd.DataFrame]:
+    """Read an event export in row chunks, keeping only the given columns"""
+    columns = list(columns) if columns else None
+    if path.lower().endswith(JSON_LINES_EXTENSIONS):
+        # JSON lines cannot be read column-wise, drop unused columns per chunk instead
+        with pd.read_json(path, lines=True, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                yield chunk[[c for c in columns if c in chunk.columns]] if columns else chunk
+    else:
+        with pd.read_csv(path, usecols=columns, chunksize=chunk_size, memory_map=memory_map,
+                         low_memory=True) as reader:
+            yield from reader
+
+
+class Aggregation(ABC):
+    """Partial result combined chunk by chunk; subclasses define update and result"""
+
+    def __init__(self, column: str, title: Optional[str] = None):
+        self.column = column
+        self.title = title or column
+        self.counts = pd.Series(dtype='int64')
+        self.rows = 0
+
+    @property
+    def columns(self) -> List[str]:
+        return [self.column]
+
+    @abstractmethod
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Add one chunk of events to the partial result"""
+
+    def _add_counts(self, counts: pd.Series) -> None:
+        self.counts = self.counts.add(counts, fill_value=0).astype('int64')
+
+    def result(self) -> pd.Series:
+        return self.counts
+
+    def chart_data(self, top: Optional[int] = None) -> Dict[str, List]:
+        """Get labels/values for VisualizationTools.create_graph or native_charts.chart_spec"""
+        result = self.result()
+        return {"labels": [str(label) for label in result.index], "values": result.tolist()}
+
+
+class CategoryCounts(Aggregation):
+    """Event counts by category, e.g. by source IP or event type"""
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.rows += len(chunk)
+        self._add_counts(chunk[self.column].value_counts(dropna=True))
+
+    def result(self) -> pd.Series:
+        return self.counts.sort_values(ascending=False, kind='stable')
+
+    def chart_data(self, top: Optional[int] = 10) -> Dict[str, List]:
+        """Get the top categories, the remaining ones summed up as 'Other'"""
+        result = top_n(self.result(), top) if top else self.result()
+        return {"labels": [str(label) for label in result.index], "values": result.tolist()}
+
+
+class TimeBuckets(Aggregation):
+    """Event counts per time bucket, e.g. per hour"""
+
+    def __init__(self, column: str, freq: str = '1h', title: Optional[str] = None,
+                 time_format: Optional[str] = None):
+        super().__init__(column, title)
+        self.freq = freq
+        self.time_format = time_format
+        self.invalid = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.rows += len(chunk)
+        values = chunk[self.column]
+        if pd.api.types.is_numeric_dtype(values):
+            times = pd.to_datetime(values, unit='s', utc=True, errors='coerce')
+        else:
+            times = pd.to_datetime(values, format=self.time_format, utc=True, errors='coerce')
+        self.invalid += int(times.isna().sum())
+        self._add_counts(times.dt.floor(self.freq).value_counts(dropna=True))
+
+    def result(self) -> pd.Series:
+        """Counts in time order, with empty buckets as zero"""
+        if self.counts.empty:
+            return self.counts
+        counts = self.counts.sort_index()
+        full_range = pd.date_range(counts.index[0], counts.index[-1], freq=self.freq)
+        return counts.reindex(full_range, fill_value=0)
+
+    def chart_data(self, top: Optional[int] = None) -> Dict[str, List]:
+        result = self.result()
+        return {"labels": [label.strftime('%Y-%m-%d %H:%M') for label in result.index],
+                "values": result.tolist()}
+
+
+def top_n(counts: pd.Series, n: int) -> pd.Series:
+    """Keep the n largest counts and sum up the rest as 'Other'"""
+    counts = counts.sort_values(ascending=False, kind='stable')
+    if len(counts) <= n:
+        return counts
+    top = counts.iloc[:n].copy()
+    # A real "Other" category among the top values absorbs the rest instead of being overwritten
+    top[OTHER_LABEL] = top.get(OTHER_LABEL, 0) + counts.iloc[n:].sum()
+    return top
+
+
+def aggregate(path: str, aggregations: Sequence[Aggregation], chunk_size: int = DEFAULT_CHUNK_SIZE,
+              memory_map: bool = False) -> Sequence[Aggregation]:
+    """Run several aggregations in one pass over an event export"""
+    columns = sorted({column for aggregation in aggregations for column in aggregation.columns})
+    rows = 0
+    for chunk in iter_chunks(path, columns, chunk_size, memory_map):
+        rows += len(chunk)
+        for aggregation in aggregations:
+            aggregation.update(chunk)
+    size = os.path.getsize(path)
+    logger.info(f"Aggregated {rows} events ({size / 1e6:.1f} MB) from {path}")
+    return aggregations
+
+
+def dataset_chart_data(dataset: Dict) -> Dict[str, List]:
+    """Aggregate the dataset of a chart slide into chart data
+
+    dataset: {"path": ..., "column": ..., "aggregate": "counts" | "timeline",
+              "freq": "1h", "top": 10, "memory_map": False}
+    """
+    kind = dataset.get("aggregate", "counts")
+    if kind == "counts":
+        aggregation = CategoryCounts(dataset["column"])
+    elif kind == "timeline":
+        aggregation = TimeBuckets(dataset["column"], dataset.get("freq", '1h'),
+                                  time_format=dataset.get("time_format"))
+    else:
+        raise ValueError(f"Unsupported dataset aggregation: {kind}")
+
+    aggregate(dataset["path"], [aggregation], dataset.get("chunk_size", DEFAULT_CHUNK_SIZE),
+              dataset.get("memory_map", False))
+    return aggregation.chart_data(dataset.get("top", 10))
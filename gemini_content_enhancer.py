@@ -1,41 +1,25 @@
-import os
-import google.generativeai as genai
 from PIL import Image
 from dotenv import load_dotenv
 import pytesseract
 from pptx import Presentation
 import io
+import zipfile
 from pptx.enum.shapes import MSO_SHAPE_TYPE
 from copy import deepcopy
+from model_client import ModelClient
+from client_pool import ClientPool, api_keys_from_env
+from prompt_templates import ENHANCE_TEMPLATE
 
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API
-genai.configure(api_key=os.getenv('Gemini_API_KEY'))
-
-# Initialize the model
-model = genai.GenerativeModel('gemini-pro')
-
 class GeminiContentEnhancer:
-    def __init__(self):
-        self.prompt_template = """You are a cybersecurity expert tasked with elaborating on brief descriptions of key data handling stages in cybersecurity.  You will receive text snippets, one at a time, focusing on either:
-
-Data Collection
-Data Cleaning and Preprocessing
-Data Analysis
-Data Visualization
-
-For each text snippet provided, your objective is to generate a more detailed and comprehensive paragraph.  Enhance the original text by:
-
-Adding Specificity: Incorporate concrete examples and scenarios relevant to cybersecurity.
-Explaining Importance: Articulate the significance of the stage within the broader cybersecurity context.
-Providing Context: Connect the stage to other cybersecurity processes and data handling workflows.
-Elaborating on Techniques: Expand on the methods, tools, and best practices associated with each stage.
-Maintaining Formal Tone: Ensure the output is informative, professional, and suitable for a cybersecurity audience.
-Text you will provide must be under 100 words.
-
-Please enhance the following text while maintaining its core message: """
+    def __init__(self, api_keys=None):
+        # Keys from Gemini_API_KEY (comma-separated for several) unless given; each gets its own client
+        self.client_pool = ClientPool(api_keys or api_keys_from_env())
+        # Static instructions go into the model session, only the slide text is sent per call
+        self.prompt_template = ENHANCE_TEMPLATE
+        self.model = ModelClient(self.client_pool)
 
     def extract_text_from_slide(self, slide):
         """Extract text from a PowerPoint slide"""
@@ -50,19 +34,22 @@ Please enhance the following text while maintaining its core message: """
     def enhance_content(self, text):
         """Send text to Gemini API and get enhanced content"""
         try:
-            # Combine prompt template with input text
-            full_prompt = f"{self.prompt_template}\n\n{text}"
-            
             # Generate response from Gemini
-            response = model.generate_content(full_prompt)
+            response = self.model.generate_content(
+                self.prompt_template.render(text=text),
+                system_instruction=self.prompt_template.instructions
+            )
             
             return response.text
         except Exception as e:
             print(f"Error generating content: {e}")
             return None
 
-    def process_presentation(self, pptx_path, output_path=None):
+    def process_presentation(self, pptx_path, output_path=None, in_place=False):
         """Process all slides in a PowerPoint presentation and update the content"""
+        if in_place:
+            return self.process_presentation_in_place(pptx_path, output_path)
+        
         try:
             # Load the source presentation
             source_prs = Presentation(pptx_path)
@@ -80,24 +67,18 @@ Please enhance the following text while maintaining its core message: """
             
             results = []
             
+            # Map layout names to layouts once instead of searching per slide
+            layouts_by_name = {}
+            for layout in prs.slide_masters[0].slide_layouts:
+                layouts_by_name.setdefault(layout.name, layout)
+            
             # Process each slide
             for slide_number, source_slide in enumerate(source_prs.slides, 1):
                 print(f"\nProcessing slide {slide_number}...")
                 
                 try:
-                    # Find matching layout
-                    source_layout = source_slide.slide_layout
-                    matching_layout = None
-                    
-                    # Try to find the matching layout by name
-                    for layout in prs.slide_masters[0].slide_layouts:
-                        if layout.name == source_layout.name:
-                            matching_layout = layout
-                            break
-                    
-                    # If no match found by name, use the first layout
-                    if matching_layout is None:
-                        matching_layout = prs.slide_layouts[0]
+                    # Find matching layout by name, falling back to the first layout
+                    matching_layout = layouts_by_name.get(source_slide.slide_layout.name, prs.slide_layouts[0])
                     
                     # Create new slide with matching layout
                     new_slide = prs.slides.add_slide(matching_layout)
@@ -182,6 +163,112 @@ Please enhance the following text while maintaining its core message: """
             print(f"Error processing presentation: {e}")
             return None
 
+    def process_presentation_in_place(self, pptx_path, output_path=None):
+        """Enhance slide text in place, passing every untouched part through unchanged"""
+        try:
+            # Read the package once; it is parsed once and reused as a raw zip
+            with open(pptx_path, 'rb') as f:
+                package_bytes = f.read()
+            prs = Presentation(io.BytesIO(package_bytes))
+            presentation_output = pptx_path.replace('.pptx', '_enhanced.pptx')
+            
+            results = []
+            changed_parts = {}
+            
+            for slide_number, slide in enumerate(prs.slides, 1):
+                print(f"\nProcessing slide {slide_number}...")
+                
+                try:
+                    title_text = ""
+                    content_shapes = []
+                    content_text = ""
+                    
+                    for shape in slide.shapes:
+                        if not shape.is_placeholder or not shape.has_text_frame:
+                            continue
+                        if shape.placeholder_format.type == 1:  # Title
+                            title_text = shape.text.strip()
+                        else:  # Content
+                            text = shape.text.strip()
+                            if text and text != title_text:
+                                content_shapes.append(shape)
+                                content_text += text + " "
+                    
+                    if not content_text:
+                        continue
+                    
+                    enhanced_content = self.enhance_content(content_text)
+                    if not enhanced_content:
+                        continue
+                    
+                    # Only the text frames that held the original content are rewritten
+                    self._replace_text(content_shapes[0].text_frame, enhanced_content)
+                    for shape in content_shapes[1:]:
+                        self._replace_text(shape.text_frame, "")
+                    changed_parts[slide.part.partname.lstrip('/')] = slide.part
+                    
+                    results.append({
+                        'slide_number': slide_number,
+                        'title': title_text,
+                        'original_text': content_text,
+                        'enhanced_content': enhanced_content
+                    })
+                    print(f"\nSlide {slide_number}:")
+                    print("Title:", title_text)
+                    print("Enhanced Content:")
+                    print(enhanced_content)
+                    print("-" * 80)
+                    
+                except Exception as e:
+                    print(f"Error processing slide {slide_number}: {e}")
+                    continue
+            
+            self._write_changed_parts(package_bytes, changed_parts, presentation_output)
+            
+            if output_path:
+                self.save_results(results, output_path)
+            
+            print(f"\nPresentation processing completed ({len(changed_parts)} slides changed). Saved as: {presentation_output}")
+            return results
+            
+        except Exception as e:
+            print(f"Error processing presentation: {e}")
+            return None
+
+    def _replace_text(self, text_frame, text):
+        """Replace the text of a frame with one paragraph per line, keeping the first paragraph and run formatting"""
+        paragraphs = text_frame.paragraphs
+        for paragraph in paragraphs[1:]:
+            paragraph._p.getparent().remove(paragraph._p)
+
+        first = paragraphs[0]
+        for run in first.runs[1:]:
+            run._r.getparent().remove(run._r)
+        # Copied before the text is set, so every line gets the first paragraph's <a:pPr> and <a:rPr>
+        template = deepcopy(first._p)
+
+        lines = text.split("\n")
+        self._set_paragraph_text(first, lines[0])
+        for line in lines[1:]:
+            text_frame.paragraphs[-1]._p.addnext(deepcopy(template))
+            self._set_paragraph_text(text_frame.paragraphs[-1], line)
+
+    @staticmethod
+    def _set_paragraph_text(paragraph, text):
+        runs = paragraph.runs
+        if runs:
+            runs[0].text = text
+        else:
+            paragraph.text = text
+
+    def _write_changed_parts(self, package_bytes, changed_parts, output_file):
+        """Copy the package entry by entry, re-serializing only the changed slide parts"""
+        with zipfile.ZipFile(io.BytesIO(package_bytes)) as source, \
+                zipfile.ZipFile(output_file, 'w', zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                part = changed_parts.get(info.filename)
+                target.writestr(info, part.blob if part is not None else source.read(info))
+
     def save_results(self, results, output_path):
         """Save results to a text file"""
         try:
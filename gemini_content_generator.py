@@ -1,18 +1,35 @@
-import google.generativeai as genai
 from enum import Enum
-from typing import Dict, List, Optional, Literal, TypedDict, Tuple
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Literal, TypedDict, Tuple, Union
+from dataclasses import dataclass, asdict
+from functools import partial
+from collections import Counter
 from dotenv import load_dotenv
 import logging
 import json
 import time
 from visualization_tools import VisualizationTools
+from native_charts import ChartSpec, CHART_TYPES, chart_spec
+from event_aggregation import dataset_chart_data
+from prompt_scheduler import PromptScheduler, PromptJob
+from model_client import ModelClient, DeadlineExceeded
+from client_pool import ClientPool, api_keys_from_env
+from quota_scheduler import QuotaScheduler, SHARED_QUOTA, BATCH
+from token_accounting import TokenUsage, estimate_tokens, UNSCOPED
+from progress_events import ProgressTracker, CACHED, QUEUED, REGENERATING, SENT, PARSED, FAILED
+from prompt_templates import (
+    PromptTemplate, SLIDE_CONTENT_TEMPLATE, TITLE_TEMPLATE, OVERVIEW_TEMPLATE,
+    TOPIC_TEMPLATE, EXAMPLE_TEMPLATE, CASE_STUDY_TEMPLATE, QUIZ_TEMPLATE, LAB_TEMPLATE,
+    VARIATION_NOTE
+)
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Main content of slides whose model call missed its deadline
+TIMEOUT_PLACEHOLDER = "Content will be updated in the next iteration."
+
 class SlideType(Enum):
     TITLE = "title"
     CONTENT = "content"
@@ -44,6 +61,8 @@ class SlideContent:
     bullet_points: Optional[List[str]] = None
     notes: Optional[str] = None
     interactive_elements: Optional[Dict] = None
+    layout_hint: Optional[str] = None  # Set by pagination, e.g. 'two_content'
+    bullet_levels: Optional[List[int]] = None  # Nesting level per bullet point, 0 when not set
 
 @dataclass
 class LessonPlan:
@@ -54,12 +73,28 @@ class LessonPlan:
     practical_activities: Optional[Dict] = None
     assessment: Optional[Dict] = None
 
+@dataclass
+class PlannedSlide:
+    kind: str
+    source: str  # Everything besides the template the slide depends on
+    template: PromptTemplate
+    prompt: str  # Rendered variable part; the template instructions go in the system instruction
+    make: Callable[[str], SlideContent]  # Builds the slide from the response text, ValueError if unusable
+    section: str = ""
+    placeholder: Optional[Callable[[], SlideContent]] = None  # Used when the call fails or times out
+    draft: str = ""  # Main content before the model call, e.g. in draft decks
+
 class GeminiContentGenerator:
-    def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-pro')
+    def __init__(self, api_key: Union[str, List[str], ClientPool], manifest_path: Optional[str] = None,
+                 priority: int = BATCH, quota: Optional[QuotaScheduler] = SHARED_QUOTA):
         self.viz_tools = VisualizationTools()
         
+        # Build manifest for incremental rebuilds; imported here to avoid a circular import
+        self.build_manifest = None
+        if manifest_path:
+            from build_manifest import BuildManifest
+            self.build_manifest = BuildManifest(manifest_path)
+        
         # Update content validation settings
         self.content_settings = {
             "max_chars_per_line": 90,
@@ -69,9 +104,51 @@ class GeminiContentGenerator:
             "min_font_size": 18,
             "max_chars_per_bullet": 120,
             "graph_size": (8, 6),
-            "icon_size": (1, 1)
+            "icon_size": (1, 1),
+            "max_concurrent_requests": 4,  # per API key
+            "call_timeout": 60,  # seconds per model call
+            "deck_time_budget": 900,  # seconds for all calls of one deck
+            "hedge_requests": True,  # duplicate calls slower than the p95 latency
+            "expected_output_tokens": 250,  # per call, for estimates before any call was made
+            "expected_call_latency": 6.0,  # seconds, for estimates before any call was made
+            "include_assessments": True,  # quiz and lab slides at the end of every section
+            "duplicate_threshold": 0.8,  # estimated text similarity from which a slide repeats an earlier one
+            "max_regeneration_rounds": 1,  # new prompts for near-duplicate slides, 0 only flags them
+            "native_charts": True  # editable PowerPoint charts instead of rendered PNG graphs
         }
         
+        # Calls spread over all API keys, each with its own limiter; nothing is configured process-wide
+        if isinstance(api_key, ClientPool):
+            self.client_pool = api_key
+        else:
+            self.client_pool = ClientPool(
+                api_key,
+                max_concurrent_per_key=self.content_settings["max_concurrent_requests"]
+            )
+        concurrency = self.content_settings["max_concurrent_requests"] * len(self.client_pool)
+        
+        # Every model call gets a deadline; stragglers are hedged. Calls share the process-wide quota,
+        # where interactive generators go before batch ones
+        self.model = ModelClient(
+            self.client_pool,
+            call_timeout=self.content_settings["call_timeout"],
+            hedge=self.content_settings["hedge_requests"],
+            quota=quota,
+            priority=priority
+        )
+        
+        # Per-slide progress events with an ETA; tqdm, logs or a front-end subscribe to them
+        self.progress = ProgressTracker(
+            concurrency=concurrency,
+            default_latency=self.content_settings["expected_call_latency"]
+        )
+        
+        # Independent prompts of a deck are issued together, bounded by max_concurrent_requests per key
+        self.prompt_scheduler = PromptScheduler(
+            self._generate_text,
+            max_concurrency=concurrency
+        )
+        
         self.presentation_structure_expanded = {
     "title": "Data Analytics in Cybersecurity",
     "duration": "4-8 hours",
@@ -336,112 +413,91 @@ class GeminiContentGenerator:
                     "learning_objectives": ["Review and retry content generation"]
                 }
 
-    def _handle_api_error(self, retries: int = 3, delay: int = 5) -> None:
-        """Handle API errors with retries and exponential backoff"""
-        for attempt in range(retries):
-            try:
-                yield
-                break
-            except Exception as e:
-                if "429" in str(e) and attempt < retries - 1:
-                    wait_time = delay * (2 ** attempt)  # Exponential backoff
-                    logger.warning(f"API quota exceeded. Waiting {wait_time} seconds before retry...")
-                    time.sleep(wait_time)
-                else:
-                    raise
-
-    def generate_lesson_plan(self, module: str, lesson_title: str) -> LessonPlan:
-        """Generate a lesson plan using the predefined presentation structure"""
-        try:
-            # Find the relevant section from presentation structure
-            section = None
-            if module.lower() == "comprehensive":
-                # Use the entire structure for comprehensive module
-                plan_data = {
-                    "title": self.presentation_structure_expanded["title"],
-                    "description": "Comprehensive course covering data analytics in cybersecurity",
-                    "learning_objectives": [
-                        s["title"].split(" - ")[0] for s in self.presentation_structure_expanded["sections"]
-                    ],
-                    "practical_activities": {
-                        "title": "Comprehensive Implementation",
-                        "steps": [
-                            # Get first practical step from each section
-                            next((topic for topic in s["topics"] if topic.startswith("  *")), "")
-                            for s in self.presentation_structure_expanded["sections"]
-                        ]
-                    }
+    def _lesson_data(self, module: str) -> Dict:
+        """Get the title, description, objectives and activities of a module from the course structure"""
+        # Find the relevant section from presentation structure
+        section = None
+        if module.lower() == "comprehensive":
+            # Use the entire structure for comprehensive module
+            plan_data = {
+                "title": self.presentation_structure_expanded["title"],
+                "description": "Comprehensive course covering data analytics in cybersecurity",
+                "learning_objectives": [
+                    s["title"].split(" - ")[0] for s in self.presentation_structure_expanded["sections"]
+                ],
+                "practical_activities": {
+                    "title": "Comprehensive Implementation",
+                    "steps": [
+                        # Get first practical step from each section
+                        next((topic for topic in s["topics"] if topic.startswith("  *")), "")
+                        for s in self.presentation_structure_expanded["sections"]
+                    ]
                 }
-            else:
-                # Find specific section
-                for s in self.presentation_structure_expanded["sections"]:
-                    if module.lower() in s["title"].lower():
-                        section = s
-                        break
-                
-                if not section:
-                    raise ValueError(f"No content found for module: {module}")
-                
-                # Create structured lesson plan from the section
-                plan_data = {
-                    "title": section["title"],
-                    "description": section["topics"][0],  # First topic usually contains overview
-                    "learning_objectives": [
-                        topic.split(":")[0]  # Use main topic headers as objectives
+            }
+        else:
+            # Find specific section
+            for s in self.presentation_structure_expanded["sections"]:
+                if module.lower() in s["title"].lower():
+                    section = s
+                    break
+            
+            if not section:
+                raise ValueError(f"No content found for module: {module}")
+            
+            # Create structured lesson plan from the section
+            plan_data = {
+                "title": section["title"],
+                "description": section["topics"][0],  # First topic usually contains overview
+                "learning_objectives": [
+                    topic.split(":")[0]  # Use main topic headers as objectives
+                    for topic in section["topics"]
+                    if ":" in topic and not topic.startswith("  *")
+                ],
+                "practical_activities": {
+                    "title": "Practical Implementation",
+                    "steps": [
+                        topic.strip("* ")  # Use detailed points as practical steps
                         for topic in section["topics"]
-                        if ":" in topic and not topic.startswith("  *")
-                    ],
-                    "practical_activities": {
-                        "title": "Practical Implementation",
-                        "steps": [
-                            topic.strip("* ")  # Use detailed points as practical steps
-                            for topic in section["topics"]
-                            if topic.startswith("  *")
-                        ][:5]  # Limit to 5 steps
-                    }
+                        if topic.startswith("  *")
+                    ][:5]  # Limit to 5 steps
                 }
+            }
+        return plan_data
+
+    def generate_lesson_plan(self, module: str, lesson_title: str, plan_path: Optional[str] = None,
+                             draft: bool = False) -> LessonPlan:
+        """Generate a lesson plan using the predefined presentation structure (saved to plan_path if given)
+
+        draft=True builds the slides from the structure alone, without model calls; see refine_lesson_plan.
+        """
+        try:
+            plan_data = self._lesson_data(module)
             
-            return self._create_lesson_plan(plan_data)
+            lesson_plan = self._create_lesson_plan(plan_data, draft=draft)
+            if plan_path:
+                self.save_lesson_plan(lesson_plan, plan_path)
+            return lesson_plan
             
         except Exception as e:
             logger.error(f"Error generating lesson plan from structure: {str(e)}")
             raise
 
+    def save_lesson_plan(self, lesson_plan: LessonPlan, path: str) -> str:
+        """Save a generated lesson plan so it can be re-rendered without API calls"""
+        # Imported here to avoid a circular import with plan_store
+        from plan_store import save_lesson_plan
+        return save_lesson_plan(lesson_plan, path)
+
     def generate_slide_content(self, module: str, topic: str, slide_type: SlideType) -> SlideContent:
         """Generate content for a specific slide type using structured output"""
-        prompt = f"""
-        Create detailed content for a cybersecurity training slide.
-        Module: {module}
-        Topic: {topic}
-
-        Requirements:
-        1. Title must be clear and concise (max 8 words, 60 characters)
-        2. Main content should be thorough but concise (max 500 characters)
-        3. Use 3-6 bullet points, each max 80 characters
-        4. Include specific examples or practical applications
-        5. Reference relevant standards or frameworks
-        6. Use proper technical terminology
-        7. Ensure content fits slide format:
-           - Title at top
-           - Main content below
-           - Bullet points for key information
-           - Examples or references at bottom
-        8. Content should be educational and actionable for SME staff
-        9. Use proper line breaks for readability
-
-        Return ONLY a JSON object in the following format (no other text):
-        {{
-            "title": "clear topic title",
-            "main_content": "detailed explanation",
-            "bullet_points": ["point 1", "point 2", "point 3"],
-            "examples": ["example 1", "example 2"],
-            "references": ["reference 1", "reference 2"]
-        }}
-        """
+        prompt = SLIDE_CONTENT_TEMPLATE.render(module=module, topic=topic)
         
         try:
             # Use retry mechanism for content generation
-            content = self.retry_content_generation(self.model.generate_content, prompt)
+            content = self.retry_content_generation(
+                partial(self.model.generate_content, usage_scope=(module, topic),
+                        system_instruction=SLIDE_CONTENT_TEMPLATE.instructions), prompt
+            )
             
             if not content:
                 logger.warning(f"Failed to generate content for {topic}, using fallback")
@@ -554,7 +610,40 @@ class GeminiContentGenerator:
             ]
         }
 
-    def _create_lesson_plan(self, lesson_data: Dict) -> LessonPlan:
+    def refine_lesson_plan(self, lesson_plan: LessonPlan, on_section: Optional[Callable[[str], None]] = None,
+                           plan_path: Optional[str] = None) -> LessonPlan:
+        """Replace the slides of a draft lesson plan in place with generated ones
+
+        on_section is called with a section title once all slides of that section are generated.
+        """
+        planned = self._plan_full_deck(lesson_plan.learning_objectives)
+        if len(planned) != len(lesson_plan.slides):
+            raise ValueError(f"Lesson plan has {len(lesson_plan.slides)} slides, "
+                             f"the course structure plans {len(planned)}")
+        cached = {index for index, item in enumerate(planned) if self._cached_slide(item) is not None}
+        self._refine_slides(planned, lesson_plan.slides, cached, on_section)
+        if plan_path:
+            self.save_lesson_plan(lesson_plan, plan_path)
+        return lesson_plan
+
+    def lesson_sections(self, module: str) -> List[str]:
+        """Get the section titles of a module's deck in slide order"""
+        planned = self._plan_full_deck(self._lesson_data(module)["learning_objectives"])
+        return list(dict.fromkeys(item.section for item in planned))
+
+    def generate_section_slides(self, module: str, section: str) -> List[SlideContent]:
+        """Generate the slides of one section of a module's deck, e.g. as a build farm work item"""
+        planned = [
+            item for item in self._plan_full_deck(self._lesson_data(module)["learning_objectives"])
+            if item.section == section
+        ]
+        if not planned:
+            raise ValueError(f"No section '{section}' in module: {module}")
+        slides, cached = self._draft_slides(planned)
+        self._refine_slides(planned, slides, cached)
+        return slides
+
+    def _create_lesson_plan(self, lesson_data: Dict, draft: bool = False) -> LessonPlan:
         """Create a LessonPlan object from structured data with validation"""
         try:
             # Validate required fields
@@ -563,16 +652,22 @@ class GeminiContentGenerator:
                 if field not in lesson_data:
                     raise ValueError(f"Missing required field: {field}")
 
-            return LessonPlan(
-                title=lesson_data["title"],
-                description=lesson_data["description"],
-                learning_objectives=lesson_data["learning_objectives"],
-                slides=self._generate_lesson_slides(
+            if draft:
+                # Structure-only slides, instantly; unchanged slides still come from the manifest
+                slides, _ = self._draft_slides(self._plan_full_deck(lesson_data["learning_objectives"]))
+            else:
+                slides = self._generate_lesson_slides(
                     lesson_data["title"],
                     lesson_data["description"],
                     lesson_data["learning_objectives"],
                     lesson_data.get("practical_activities", {})
-                ),
+                )
+
+            return LessonPlan(
+                title=lesson_data["title"],
+                description=lesson_data["description"],
+                learning_objectives=lesson_data["learning_objectives"],
+                slides=slides,
                 practical_activities=lesson_data.get("practical_activities"),
                 assessment=lesson_data.get("assessment")
             )
@@ -616,41 +711,316 @@ class GeminiContentGenerator:
         return requirements.get(slide_type, "")
 
     def _generate_lesson_slides(self, title: str, description: str, objectives: List[str], activities: Dict) -> List[SlideContent]:
-        """Generate a complete set of 60 slides for the comprehensive presentation"""
+        """Generate the 60 slides of the comprehensive presentation plus quiz and lab slides per section"""
+        planned = self._plan_full_deck(objectives)
+        slides, cached = self._draft_slides(planned)
+        self._refine_slides(planned, slides, cached)
+        return slides
+
+    def _slide_job(self, index: int, item: PlannedSlide, prompt: str, kind: str = QUEUED) -> PromptJob:
+        """Create the prompt job of a planned slide and report it as queued (or regenerating)"""
+        self.progress.emit(kind, str(index), item.section)
+        return PromptJob(key=str(index), prompt=prompt,
+                         context={"usage_scope": (item.section, f"slide {index + 1}"),
+                                  "system_instruction": item.template.instructions,
+                                  "progress_key": str(index)})
+
+    def _plan_full_deck(self, objectives: List[str]) -> List[PlannedSlide]:
+        """Plan the course slides followed by each section's assessments"""
+        planned = self._plan_deck(objectives)
+        if self.content_settings["include_assessments"]:
+            planned = self._add_assessments(planned)
+        return planned
+
+    def _cached_slide(self, item: PlannedSlide) -> Optional[SlideContent]:
+        """Get the slide of an unchanged planned slide from the build manifest"""
+        if self.build_manifest is None:
+            return None
+        return self.build_manifest.get(item.kind, item.source, item.template.source)
+
+    @staticmethod
+    def _draft_slide(item: PlannedSlide) -> SlideContent:
+        """Build a planned slide from the course structure alone"""
+        if item.placeholder:
+            return item.placeholder()
+        return item.make(item.draft or TIMEOUT_PLACEHOLDER)
+
+    def _draft_slides(self, planned: List[PlannedSlide]) -> Tuple[List[SlideContent], set]:
+        """Draft every planned slide without model calls; returns the slides and the positions reused from the manifest"""
         slides = []
+        cached = set()
+        for index, item in enumerate(planned):
+            slide = self._cached_slide(item)
+            if slide is not None:
+                cached.add(index)
+            else:
+                slide = self._draft_slide(item)
+            slides.append(slide)
+        return slides, cached
+
+    def _refine_slides(self, planned: List[PlannedSlide], slides: List[SlideContent], cached: set,
+                       on_section: Optional[Callable[[str], None]] = None) -> None:
+        """Generate every slide not reused from the manifest, replacing its draft in place as responses arrive"""
+        # The prompts of all slides to generate are independent and issued together
+        self.progress.reset()
+        jobs = []
+        for index, item in enumerate(planned):
+            if index in cached:
+                self.progress.emit(CACHED, str(index), item.section)
+            else:
+                jobs.append(self._slide_job(index, item, item.prompt))
         
-        # Title and introduction
-        title_prompt = f"""
-        Create a compelling title slide introduction for a cybersecurity course titled "{self.presentation_structure_expanded['title']}"
-        Keep it concise and impactful (max 3-4 sentences).
-        Focus on the importance of data analytics in cybersecurity.
-        """
-        title_content = self.model.generate_content(title_prompt)
+        remaining = Counter(planned[int(job.key)].section for job in jobs)
+        usable = set(cached)  # Slides with real content, the only ones checked for duplicates
+        
+        def on_result(key: str, text: Optional[str]) -> None:
+            index = int(key)
+            item = planned[index]
+            slide = self._build_planned_slide(item, text)
+            self.progress.emit(PARSED if slide else FAILED, key, item.section)
+            if slide is None:
+                # Timed out or unusable: use a placeholder and leave it out of the manifest so it is retried
+                slide = item.placeholder() if item.placeholder else item.make(TIMEOUT_PLACEHOLDER)
+            else:
+                usable.add(index)
+                if self.build_manifest is not None:
+                    self.build_manifest.put(item.kind, item.source, item.template.source, slide)
+            slides[index] = slide
+            
+            remaining[item.section] -= 1
+            if remaining[item.section] == 0 and on_section:
+                try:
+                    on_section(item.section)
+                except Exception as e:
+                    logger.error(f"Error handling completed section '{item.section}': {str(e)}")
         
-        slides.append(SlideContent(
-            title=self.presentation_structure_expanded["title"],
-            main_content=title_content.text,
-            slide_type=SlideType.TITLE,
-            bullet_points=objectives
+        self.model.usage.reset()
+        try:
+            with self.model.deck_budget(self.content_settings["deck_time_budget"]):
+                self.prompt_scheduler.run(jobs, on_result=on_result)
+                self._regenerate_duplicates(planned, slides, usable)
+            self.model.usage.log_summary()
+        finally:
+            # Slides finished before an error are kept for the next build
+            if self.build_manifest is not None:
+                self.build_manifest.save()
+
+    def _find_duplicates(self, slides: List[SlideContent], usable: set) -> Dict[int, int]:
+        """Map every slide that nearly repeats an earlier slide to that earlier slide"""
+        # Imported here to avoid a circular import with slide_similarity
+        from slide_similarity import SimilarityIndex, slide_text
+        
+        index = SimilarityIndex(self.content_settings["duplicate_threshold"])
+        duplicates = {}
+        for position, slide in enumerate(slides):
+            if position not in usable:
+                continue
+            text = slide_text(slide)
+            match = index.query(text)
+            if match:
+                duplicates[position] = match[0]
+            else:
+                index.add(position, text)
+        return duplicates
+
+    def _regenerate_duplicates(self, planned: List[PlannedSlide], slides: List[SlideContent], usable: set) -> None:
+        """Re-prompt only the slides that nearly repeat an earlier slide, replacing them in place"""
+        for _ in range(self.content_settings["max_regeneration_rounds"]):
+            duplicates = self._find_duplicates(slides, usable)
+            if not duplicates:
+                return
+            logger.info(f"Regenerating {len(duplicates)} near-duplicate slides")
+            
+            jobs = []
+            for position, original in duplicates.items():
+                item = planned[position]
+                note = VARIATION_NOTE.format(title=slides[original].title,
+                                             excerpt=(slides[original].main_content or "")[:300])
+                jobs.append(self._slide_job(position, item, item.prompt + note, REGENERATING))
+            responses = self.prompt_scheduler.run(jobs)
+            
+            for position in duplicates:
+                item = planned[position]
+                slide = self._build_planned_slide(item, responses[str(position)])
+                self.progress.emit(PARSED if slide else FAILED, str(position), item.section, regenerated=True)
+                if slide is not None:
+                    slides[position] = slide
+                    if self.build_manifest is not None:
+                        self.build_manifest.put(item.kind, item.source, item.template.source, slide)
+        
+        # Whatever still repeats after the last round is kept, but flagged
+        for position, original in self._find_duplicates(slides, usable).items():
+            logger.warning(f"Slide {position + 1} '{slides[position].title}' nearly repeats "
+                           f"slide {original + 1} '{slides[original].title}'")
+
+    def _build_planned_slide(self, item: PlannedSlide, text: Optional[str]) -> Optional[SlideContent]:
+        """Build a planned slide from its response, or None if there is no usable response"""
+        if text is None:
+            return None
+        try:
+            return item.make(text)
+        except ValueError as e:
+            logger.warning(f"Unusable {item.kind} response for '{item.section}': {str(e)}")
+            return None
+
+    def _add_assessments(self, planned: List[PlannedSlide]) -> List[PlannedSlide]:
+        """Insert the quiz and lab slides of each section after that section's last slide"""
+        assessments = {}
+        for item in self._plan_assessments():
+            assessments.setdefault(item.section, []).append(item)
+        
+        result = []
+        for index, item in enumerate(planned):
+            result.append(item)
+            is_last = index + 1 == len(planned) or planned[index + 1].section != item.section
+            if is_last:
+                result.extend(assessments.pop(item.section, []))
+        # Sections cut off by the slide limit still get their assessments at the end
+        for items in assessments.values():
+            result.extend(items)
+        return result
+
+    def _plan_assessments(self) -> List[PlannedSlide]:
+        """Plan a quiz and a lab slide for every section of the course"""
+        # Imported here to avoid a circular import with assessments
+        from assessments import parse_quiz, parse_lab, quiz_slide, lab_slide
+        
+        planned = []
+        course_title = self.presentation_structure_expanded["title"]
+        for section in self.presentation_structure_expanded["sections"]:
+            section_title = section["title"]
+            values = dict(module=course_title, lesson_title=section_title,
+                          topics=self._topics_summary(section))
+            source = json.dumps([course_title, section_title, values["topics"]])
+            planned.append(PlannedSlide(
+                'quiz', source, QUIZ_TEMPLATE, QUIZ_TEMPLATE.render(**values),
+                lambda text, section_title=section_title: quiz_slide(section_title, parse_quiz(text)),
+                section=section_title,
+                placeholder=lambda section_title=section_title: quiz_slide(section_title, None)
+            ))
+            planned.append(PlannedSlide(
+                'lab', source, LAB_TEMPLATE, LAB_TEMPLATE.render(**values),
+                lambda text, section_title=section_title: lab_slide(section_title, parse_lab(text)),
+                section=section_title,
+                placeholder=lambda section_title=section_title: lab_slide(section_title, None)
+            ))
+        return planned
+
+    @staticmethod
+    def _topics_summary(section: Dict) -> str:
+        """Get the main topics of a section as one prompt line"""
+        topics = [topic.split(":")[0] for topic in section["topics"] if not topic.startswith("  *")]
+        return f"Topics covered: {'; '.join(topics)}" if topics else ""
+
+    def _plan_deck(self, objectives: List[str]) -> List[PlannedSlide]:
+        """Plan exactly 60 course slides"""
+        planned = self._plan_lesson_slides(objectives)[:60]
+        
+        # If we need more slides to reach 60, add case study slides (keyed by position, the prompt is the same)
+        while len(planned) < 60:
+            planned.append(PlannedSlide(
+                'case_study', str(len(planned)), CASE_STUDY_TEMPLATE,
+                CASE_STUDY_TEMPLATE.render(number=len(planned) + 1),
+                lambda text: SlideContent(
+                    title="Case Study: Data Analytics in Action",
+                    main_content=text,
+                    slide_type=SlideType.CONTENT,
+                    bullet_points=[
+                        "Scenario Background",
+                        "Analytical Approach",
+                        "Implementation",
+                        "Key Findings"
+                    ]
+                ),
+                section="Case Studies"
+            ))
+        return planned
+
+    def estimate_deck(self, pricing: Dict = None) -> Dict:
+        """Predict calls, tokens, cost and time of a deck build without calling the model"""
+        objectives = [s["title"].split(" - ")[0] for s in self.presentation_structure_expanded["sections"]]
+        planned = self._plan_full_deck(objectives)
+        calls = [
+            item for item in planned
+            if not (self.build_manifest and self.build_manifest.entries.get(
+                self.build_manifest.key(item.kind, item.source, item.template.source)))
+        ]
+        
+        # Output size and latency come from previous calls when there are any
+        usage = self.model.usage.deck
+        output_per_call = (usage.output_tokens / usage.calls) if usage.calls else self.content_settings["expected_output_tokens"]
+        latency = self.model.latency.percentile(0.5) or self.content_settings["expected_call_latency"]
+        
+        estimate = TokenUsage(
+            input_tokens=sum(estimate_tokens(item.template.instructions) + estimate_tokens(item.prompt)
+                             for item in calls),
+            output_tokens=int(output_per_call * len(calls)),
+            calls=len(calls),
+            estimated_calls=len(calls)
+        )
+        waves = -(-len(calls) // self.prompt_scheduler.max_concurrency)
+        return {
+            "slides": len(planned),
+            "cached_slides": len(planned) - len(calls),
+            "calls": estimate.calls,
+            "input_tokens": estimate.input_tokens,
+            "output_tokens": estimate.output_tokens,
+            "cost": round(estimate.cost(pricing), 4),
+            "seconds": round(waves * latency, 1)
+        }
+
+    def _generate_text(self, prompt: str, usage_scope: Tuple[str, str] = UNSCOPED,
+                       system_instruction: Optional[str] = None,
+                       progress_key: Optional[str] = None) -> Optional[str]:
+        """Get the response text of a prompt, or None if the call failed or missed its deadline"""
+        if progress_key is not None:
+            self.progress.emit(SENT, progress_key, usage_scope[0])
+        try:
+            return self.model.generate_content(
+                prompt, usage_scope=usage_scope, system_instruction=system_instruction
+            ).text
+        except DeadlineExceeded as e:
+            logger.warning(f"Model call timed out: {str(e)}")
+            return None
+        except Exception as e:
+            # Rate limits, server errors and blocked responses fail this slide only, not the deck
+            logger.error(f"Model call failed: {str(e)}")
+            return None
+
+    def _plan_lesson_slides(self, objectives: List[str]) -> List[PlannedSlide]:
+        """Plan the course slides without calling the model"""
+        planned = []
+        course_title = self.presentation_structure_expanded["title"]
+        
+        # Title and introduction
+        planned.append(PlannedSlide(
+            'title', json.dumps([course_title, objectives]), TITLE_TEMPLATE,
+            TITLE_TEMPLATE.render(course_title=course_title),
+            lambda text: SlideContent(
+                title=course_title,
+                main_content=text,
+                slide_type=SlideType.TITLE,
+                bullet_points=objectives
+            ),
+            section=course_title
         ))
         
-        # Generate content for each section
+        # Plan content for each section
         for section in self.presentation_structure_expanded["sections"]:
-            # Generate section overview slide
-            overview_prompt = f"""
-            Create an overview for the section "{section['title']}" in cybersecurity data analytics.
-            Provide a brief introduction (2-3 sentences) explaining why this topic is important.
-            Focus on practical applications and key learning outcomes.
-            """
-            overview_content = self.model.generate_content(overview_prompt)
-            
-            slides.append(SlideContent(
-                title=section["title"],
-                main_content=overview_content.text,
-                slide_type=SlideType.TITLE
+            # Section overview slide
+            planned.append(PlannedSlide(
+                'overview', section["title"], OVERVIEW_TEMPLATE,
+                OVERVIEW_TEMPLATE.render(section_title=section["title"]),
+                lambda text, section_title=section["title"]: SlideContent(
+                    title=section_title,
+                    main_content=text,
+                    slide_type=SlideType.TITLE
+                ),
+                section=section["title"],
+                draft=self._topics_summary(section)
             ))
             
-            # Generate slides for each main topic
+            # Slides for each main topic
             for topic in section["topics"]:
                 if not topic.startswith("  *"):  # Main topics only
                     topic_title = topic.split(":")[0]
@@ -661,117 +1031,52 @@ class GeminiContentGenerator:
                         if t.startswith("  *") and topic_title in t
                     ]
                     
-                    # Generate detailed content for the topic
-                    content_prompt = f"""
-                    Create detailed slide content for the topic "{topic_title}" in cybersecurity data analytics.
-                    Context: {topic}
-                    
-                    Requirements:
-                    1. Provide a clear, concise explanation (2-3 sentences)
-                    2. Focus on practical applications and real-world examples
-                    3. Use technical but understandable language
-                    4. Make it relevant for cybersecurity professionals
-                    
-                    The content should complement these bullet points:
-                    {bullet_points}
-                    """
-                    
-                    content_response = self.model.generate_content(content_prompt)
-                    
-                    slides.append(SlideContent(
-                        title=topic_title,
-                        main_content=content_response.text,
-                        slide_type=SlideType.CONTENT,
-                        bullet_points=bullet_points
+                    # Detailed content for the topic
+                    planned.append(PlannedSlide(
+                        'topic', json.dumps([topic, bullet_points]), TOPIC_TEMPLATE,
+                        TOPIC_TEMPLATE.render(topic_title=topic_title, topic=topic, bullet_points=bullet_points),
+                        lambda text, topic_title=topic_title, bullet_points=bullet_points: SlideContent(
+                            title=topic_title,
+                            main_content=text,
+                            slide_type=SlideType.CONTENT,
+                            bullet_points=bullet_points
+                        ),
+                        section=section["title"],
+                        draft=topic.split(":", 1)[1].strip() if ":" in topic else ""
                     ))
                     
-                    # Generate practical example slide if needed
+                    # Practical example slide; its prompt only needs the topic title
                     if len(bullet_points) > 2:  # Only for substantial topics
-                        example_prompt = f"""
-                        Create a practical example slide for "{topic_title}" in cybersecurity.
-                        Include:
-                        1. A real-world scenario
-                        2. Specific tools or techniques used
-                        3. Step-by-step approach
-                        4. Expected outcomes or results
-                        Keep it concise and actionable.
-                        """
-                        
-                        example_response = self.model.generate_content(example_prompt)
-                        
-                        slides.append(SlideContent(
-                            title=f"Practical Example: {topic_title}",
-                            main_content=example_response.text,
-                            slide_type=SlideType.LAB,
-                            bullet_points=[
-                                "Scenario Overview",
-                                "Tools Used",
-                                "Implementation Steps",
-                                "Expected Outcomes"
-                            ]
+                        planned.append(PlannedSlide(
+                            'example', topic_title, EXAMPLE_TEMPLATE,
+                            EXAMPLE_TEMPLATE.render(topic_title=topic_title),
+                            lambda text, topic_title=topic_title: SlideContent(
+                                title=f"Practical Example: {topic_title}",
+                                main_content=text,
+                                slide_type=SlideType.LAB,
+                                bullet_points=[
+                                    "Scenario Overview",
+                                    "Tools Used",
+                                    "Implementation Steps",
+                                    "Expected Outcomes"
+                                ]
+                            ),
+                            section=section["title"]
                         ))
         
-        # If we need more slides to reach 60
-        while len(slides) < 60:
-            # Generate additional case study slides
-            case_study_prompt = """
-            Create a cybersecurity case study slide focusing on data analytics.
-            Include:
-            1. Brief scenario description
-            2. Challenge faced
-            3. Analytics approach used
-            4. Results and lessons learned
-            """
-            
-            case_study_response = self.model.generate_content(case_study_prompt)
-            
-            slides.append(SlideContent(
-                title="Case Study: Data Analytics in Action",
-                main_content=case_study_response.text,
-                slide_type=SlideType.CONTENT,
-                bullet_points=[
-                    "Scenario Background",
-                    "Analytical Approach",
-                    "Implementation",
-                    "Key Findings"
-                ]
-            ))
-        
-        return slides[:60]  # Ensure exactly 60 slides
+        return planned
 
     def generate_quiz_questions(self, module: str, lesson_title: str) -> List[Dict]:
         """Generate quiz questions with structured output"""
-        prompt = f"""
-        Create assessment questions for a cybersecurity training module.
-        Module: {module}
-        Lesson: {lesson_title}
-
-        Generate 3 multiple choice questions with 4 options each.
-        Return the response in the following JSON structure:
-        [
-            {{
-                "question": "question text",
-                "options": ["option1", "option2", "option3", "option4"],
-                "correct_answer": "correct option"
-            }}
-        ]
-        """
+        from assessments import parse_quiz
         
         try:
-            response = self.model.generate_content(prompt)
-            
-            # Parse the response text as JSON
-            try:
-                return json.loads(response.text)
-            except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract JSON from the text
-                start_idx = response.text.find('[')
-                end_idx = response.text.rfind(']') + 1
-                if start_idx != -1 and end_idx != 0:
-                    json_str = response.text[start_idx:end_idx]
-                    return json.loads(json_str)
-                else:
-                    return []
+            response = self.model.generate_content(
+                QUIZ_TEMPLATE.render(module=module, lesson_title=lesson_title, topics=""),
+                usage_scope=(module, lesson_title),
+                system_instruction=QUIZ_TEMPLATE.instructions
+            )
+            return [asdict(question) for question in parse_quiz(response.text)]
             
         except Exception as e:
             logger.error(f"Error generating quiz questions: {str(e)}")
@@ -779,24 +1084,19 @@ class GeminiContentGenerator:
 
     def generate_lab_exercise(self, module: str, lesson_title: str) -> Dict:
         """Generate hands-on lab exercise instructions"""
-        prompt = f"""
-        Create a practical lab exercise for cybersecurity training.
-        Module: {module}
-        Lesson: {lesson_title}
-
-        Include:
-        1. Exercise objectives
-        2. Required tools (Wireshark, Zabbix, or Nessus)
-        3. Step-by-step instructions
-        4. Expected outcomes
-        5. Discussion questions
-
-        Make it practical and relevant for SME environments.
-        """
+        from assessments import parse_lab
         
-        response = self.model.generate_content(prompt)
-        # TODO: Implement parsing of lab exercise
-        return {}
+        try:
+            response = self.model.generate_content(
+                LAB_TEMPLATE.render(module=module, lesson_title=lesson_title, topics=""),
+                usage_scope=(module, lesson_title),
+                system_instruction=LAB_TEMPLATE.instructions
+            )
+            return asdict(parse_lab(response.text))
+            
+        except Exception as e:
+            logger.error(f"Error generating lab exercise: {str(e)}")
+            return {}
 
     def retry_content_generation(self, func, *args, max_retries=3):
         """Retry content generation with exponential backoff"""
@@ -872,17 +1172,9 @@ class GeminiContentGenerator:
             # Format main content for proper wrapping
             content["main_content"] = self._format_text_content(content["main_content"])
             
-            # Format bullet points
+            # Limit bullet points; wrapping happens at render time against the real placeholder
             if "bullet_points" in content and content["bullet_points"]:
-                formatted_bullets = []
-                for bullet in content["bullet_points"]:
-                    if len(bullet) > self.content_settings["max_chars_per_bullet"]:
-                        # Split long bullet points into multiple lines
-                        formatted_bullet = self._wrap_text(bullet, self.content_settings["max_chars_per_bullet"])
-                        formatted_bullets.append(formatted_bullet)
-                    else:
-                        formatted_bullets.append(bullet)
-                content["bullet_points"] = formatted_bullets[:self.content_settings["max_bullet_points"]]
+                content["bullet_points"] = content["bullet_points"][:self.content_settings["max_bullet_points"]]
             
             return True
             
@@ -913,42 +1205,10 @@ class GeminiContentGenerator:
         if current_line:
             formatted_lines.append(current_line.strip())
         
-        # Limit number of lines
-        if max_chars and len(formatted_lines) > max_chars:
-            # Split content into two columns if too long
-            mid_point = len(formatted_lines) // 2
-            left_column = formatted_lines[:mid_point]
-            right_column = formatted_lines[mid_point:]
-            
-            # Format columns
-            return {
-                "left_column": "\n".join(left_column),
-                "right_column": "\n".join(right_column)
-            }
-        
+        # Oversized content is split into continuation or two-column slides
+        # by pagination.SlidePaginator once the placeholder size is known
         return "\n".join(formatted_lines)
 
-    def _wrap_text(self, text: str, max_length: int) -> str:
-        """Wrap text to fit within specified length"""
-        words = text.split()
-        lines = []
-        current_line = []
-        current_length = 0
-        
-        for word in words:
-            if current_length + len(word) + 1 <= max_length:
-                current_line.append(word)
-                current_length += len(word) + 1
-            else:
-                lines.append(" ".join(current_line))
-                current_line = [word]
-                current_length = len(word)
-                
-        if current_line:
-            lines.append(" ".join(current_line))
-            
-        return "\n".join(lines)
-
     def _create_fallback_content(self, *args) -> Dict:
         """Create fallback content when generation fails"""
         module = args[0] if args else "Unknown"
@@ -979,17 +1239,27 @@ class GeminiContentGenerator:
         5. Font size should be readable (min 18pt)
         """
 
-    def generate_visualization(self, slide_data: Dict, slide_type: SlideType) -> Optional[str]:
-        """Generate visualization based on slide content"""
+    def generate_visualization(self, slide_data: Dict, slide_type: SlideType) -> Optional[Union[str, ChartSpec]]:
+        """Generate visualization based on slide content; charts are chart specs unless native_charts is off"""
         try:
-            if "data" not in slide_data or "visualization_type" not in slide_data:
+            if "visualization_type" not in slide_data:
                 return None
-                
+            
             viz_type = slide_data["visualization_type"]
-            data = slide_data["data"]
+            if "data" in slide_data:
+                data = slide_data["data"]
+            elif "dataset" in slide_data:
+                # Large event exports are aggregated in chunks, never loaded whole
+                data = dataset_chart_data(slide_data["dataset"])
+            else:
+                return None
             title = slide_data.get("title", "Visualization")
             
-            if viz_type in ["pie", "bar", "line", "scatter"]:
+            # Dense scatter data is binned, which only the rendered graphs do
+            dense = viz_type == "scatter" and len(data["x_values"]) > self.viz_tools.max_scatter_points
+            if viz_type in CHART_TYPES and self.content_settings["native_charts"] and not dense:
+                return chart_spec(viz_type, data, title)
+            elif viz_type in ["pie", "bar", "line", "scatter", "timeseries", "heatmap"]:
                 return self.viz_tools.create_graph(
                     viz_type,
                     data,
@@ -1022,11 +1292,11 @@ class GeminiContentGenerator:
 
 # Example usage
 if __name__ == "__main__":
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        raise ValueError("Please set GEMINI_API_KEY environment variable")
+    api_keys = api_keys_from_env()
+    if not api_keys:
+        raise ValueError("Please set GEMINI_API_KEY environment variable (several keys comma-separated)")
     
-    generator = GeminiContentGenerator(api_key)
+    generator = GeminiContentGenerator(api_keys)
     
     # Example: Generate a lesson plan
     lesson_plan = generator.generate_lesson_plan(
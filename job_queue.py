@@ -0,0 +1,173 @@
+"""SQLite-backed queue of deck build jobs that survives server restarts."""
+
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional
+import json
+import logging
+import sqlite3
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    module TEXT NOT NULL,
+    lesson_title TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL,
+    worker TEXT,
+    output_path TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    heartbeat REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+"""
+
+
+@dataclass
+class Job:
+    id: str
+    module: str
+    lesson_title: str
+    options: Dict = field(default_factory=dict)
+    status: str = QUEUED
+    worker: Optional[str] = None
+    output_path: Optional[str] = None
+    error: Optional[str] = None
+    created: float = 0.0
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    heartbeat: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class JobQueue:
+    """Deck build jobs in a SQLite file; any number of threads or processes may submit and claim
+
+    Running jobs carry a heartbeat; a job not renewed within lease seconds is taken over by the next
+    claim, so jobs of a crashed server are built again while those of a live one are left alone.
+    """
+
+    def __init__(self, path: str, lease: float = 900.0):
+        self.path = path
+        self.lease = lease
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Databases created before heartbeats existed
+            columns = [row["name"] for row in conn.execute("PRAGMA table_info(jobs)")]
+            if "heartbeat" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived autocommit connection per operation, so the queue can be used from any thread
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _job(row: sqlite3.Row) -> Job:
+        values = dict(row)
+        values["options"] = json.loads(values["options"])
+        return Job(**values)
+
+    def submit(self, module: str, lesson_title: str, **options) -> Job:
+        """Queue a deck build"""
+        job = Job(uuid.uuid4().hex[:12], module, lesson_title, options, created=time.time())
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, module, lesson_title, options, status, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (job.id, job.module, job.lesson_title, json.dumps(options), job.status, job.created)
+            )
+        logger.info(f"Queued job {job.id}: {module} / {lesson_title}")
+        return job
+
+    def claim(self, worker: str) -> Optional[Job]:
+        """Mark the oldest queued (or expired running) job as running on worker and return it, or None"""
+        with self._connect() as conn:
+            # The write lock is taken up front so two workers cannot claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                started = time.time()
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? OR (status = ? AND COALESCE(heartbeat, started) < ?) "
+                    "ORDER BY created LIMIT 1",
+                    (QUEUED, RUNNING, started - self.lease)
+                ).fetchone()
+                if row is not None:
+                    if row["status"] == RUNNING:
+                        logger.info(f"Taking over job {row['id']} from {row['worker']}, whose lease ran out")
+                    conn.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, started = ?, heartbeat = ? WHERE id = ?",
+                        (RUNNING, worker, started, started, row["id"])
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+
+        job = self._job(row)
+        job.status, job.worker, job.started, job.heartbeat = RUNNING, worker, started, started
+        return job
+
+    def renew(self, job_id: str) -> None:
+        """Extend the lease of a running job"""
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND status = ?", (time.time(), job_id, RUNNING))
+
+    def finish(self, job_id: str, output_path: str) -> None:
+        """Mark a job as done with the path of its deck"""
+        self._update(job_id, status=DONE, output_path=output_path, finished=time.time())
+
+    def fail(self, job_id: str, error: str) -> None:
+        """Mark a job as failed"""
+        self._update(job_id, status=FAILED, error=error, finished=time.time())
+
+    def _update(self, job_id: str, **values) -> None:
+        assignments = ", ".join(f"{name} = ?" for name in values)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*values.values(), job_id))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get a job by id"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    def list(self, status: Optional[str] = None, limit: Optional[int] = 50) -> List[Job]:
+        """Get the newest jobs, optionally only those in one state (limit None: all)"""
+        query, params = "SELECT * FROM jobs", []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY created DESC LIMIT ?"
+        params.append(limit if limit is not None else -1)
+        with self._connect() as conn:
+            return [self._job(row) for row in conn.execute(query, params)]
+
+    def counts(self) -> Dict[str, int]:
+        """Get the number of jobs per state"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
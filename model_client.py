@@ -0,0 +1,314 @@
+"""Gemini model client with per-call deadlines, deck time budgets, hedged and coalesced requests."""
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import Callable, Dict, Optional, Tuple
+import hashlib
+import logging
+import threading
+import time
+
+from token_accounting import UsageLedger, usage_from_response, UNSCOPED
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call misses its deadline or the deck time budget is used up"""
+
+
+# Wording of errors from models or SDK versions without system instructions
+SYSTEM_INSTRUCTION_ERRORS = ("system_instruction", "system instruction", "developer instruction")
+
+
+def rejects_system_instruction(error: Exception) -> bool:
+    """Check whether an error says system instructions are not supported, not that the request is bad"""
+    if not isinstance(error, TypeError) and getattr(error, 'code', None) != 400:
+        return False
+    message = str(error).lower()
+    return any(marker in message for marker in SYSTEM_INSTRUCTION_ERRORS)
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """Get a latency percentile, or None without samples"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(quantile * len(samples)))]
+
+
+class SingleFlight:
+    """Lets concurrent callers with the same key share one in-flight call instead of repeating it"""
+
+    def __init__(self):
+        self._flights: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, call: Callable[[], object], wait_timeout: float) -> Tuple[object, bool]:
+        """Run call, or wait up to wait_timeout for the identical one in flight; returns (result, shared)
+
+        When the call in flight runs out of its own time (call deadline or deck budget), waiting callers
+        with time left make the call again instead of failing with it.
+        """
+        deadline = time.monotonic() + wait_timeout
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = Future()
+            if leader:
+                break
+
+            remaining = deadline - time.monotonic()
+            try:
+                return flight.result(timeout=max(0.0, remaining)), True
+            except DeadlineExceeded:
+                # The leader's deadline, not this caller's
+                if time.monotonic() >= deadline:
+                    raise
+                logger.info("Shared model call ran out of its own time, calling again")
+            except FutureTimeout:
+                raise DeadlineExceeded(f"Shared model call did not finish within {wait_timeout:.1f}s")
+
+        try:
+            result = call()
+        except BaseException as e:
+            self._land(key)
+            flight.set_exception(e)
+            raise
+        self._land(key)
+        flight.set_result(result)
+        return result, False
+
+    def _land(self, key: str) -> None:
+        # Only calls in flight are shared; finished ones are left to caches. Removed before waiting
+        # callers wake up, so a caller calling again starts a new flight
+        with self._lock:
+            self._flights.pop(key, None)
+
+
+# Shared by all clients of the process, so concurrent deck builds coalesce too
+SHARED_FLIGHTS = SingleFlight()
+
+
+class ModelClient:
+    """Wraps a GenerativeModel (or a ClientPool) so every call has a deadline and slow calls can be hedged"""
+
+    def __init__(self, model, call_timeout: float = 60.0, hedge: bool = True,
+                 hedge_quantile: float = 0.95, min_samples: int = 20, max_workers: int = 16,
+                 single_flight: Optional[SingleFlight] = SHARED_FLIGHTS,
+                 quota=None, priority: int = 1, job: Optional[str] = None):  # 1: quota_scheduler.BATCH
+        self.model = model
+        self.call_timeout = call_timeout
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.latency = LatencyTracker()
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+        self.usage = UsageLedger()
+        # Identical concurrent prompts wait on one request; None sends every call
+        self.single_flight = single_flight
+        self.coalesced_calls = 0
+        # Optional quota_scheduler.QuotaScheduler shared with other clients; calls wait for a slot of this job
+        self.quota = quota
+        self.priority = priority
+        self.job = job or f"client-{id(self):x}"
+        # One model per distinct system instruction, so static prompt parts are set once per session
+        self.use_system_instruction = True
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        self._budget_deadline: Optional[float] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-call")
+
+    @contextmanager
+    def deck_budget(self, seconds: Optional[float]):
+        """Limit the total time of all calls made inside the block"""
+        previous = self._budget_deadline
+        self._budget_deadline = time.monotonic() + seconds if seconds else None
+        try:
+            yield
+        finally:
+            self._budget_deadline = previous
+
+    def _time_left(self, timeout: Optional[float]) -> float:
+        """Get the time allowed for a call under its own deadline and the deck budget"""
+        limit = timeout or self.call_timeout
+        if self._budget_deadline is not None:
+            remaining = self._budget_deadline - time.monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded("Deck time budget exhausted")
+            limit = min(limit, remaining)
+        return limit
+
+    def generate_content(self, contents, timeout: Optional[float] = None,
+                         usage_scope: Tuple[str, str] = UNSCOPED,
+                         system_instruction: Optional[str] = None, **kwargs):
+        """Generate content, giving up after the deadline and hedging past the p95 latency
+
+        Concurrent calls with the same prompt share one request; only the caller that sent it records usage.
+        """
+        if self.single_flight is None:
+            return self._call(contents, timeout, usage_scope, system_instruction, kwargs)
+        
+        key = self._fingerprint(contents, system_instruction, kwargs)
+        response, shared = self.single_flight.do(
+            key,
+            lambda: self._call(contents, timeout, usage_scope, system_instruction, dict(kwargs)),
+            self._time_left(timeout)
+        )
+        if shared:
+            self.coalesced_calls += 1
+            logger.info(f"Shared an in-flight response for {usage_scope[1] or 'a call'} instead of a new request")
+        return response
+
+    def _fingerprint(self, contents, system_instruction: Optional[str], kwargs: dict) -> str:
+        """Identify a call by model (or pool) instance, instructions, prompt and generation options"""
+        options = {name: value for name, value in kwargs.items() if name != "request_options"}
+        # Clients of different pools use different keys and quotas, so they never share a call
+        text = repr((id(self.model), getattr(self.model, 'model_name', None), system_instruction, contents,
+                     sorted(options.items())))
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def _call(self, contents, timeout: Optional[float], usage_scope: Tuple[str, str],
+              system_instruction: Optional[str], kwargs: dict):
+        """Send one call with its instructions and record its usage"""
+        model = self._session_model(system_instruction)
+        if model is None:
+            contents = f"{system_instruction}\n\n{contents}"
+            model = self.model
+        
+        try:
+            response, attempts = self._generate(model, contents, timeout, kwargs)
+        except Exception as e:
+            if model is self.model or not rejects_system_instruction(e):
+                raise
+            # The model or an older SDK rejected the system instruction; send instructions inline from now on
+            logger.warning(f"System instructions not supported, sending them inline: {str(e)}")
+            self.use_system_instruction = False
+            return self._call(contents, timeout, usage_scope, system_instruction, kwargs)
+
+        usage = usage_from_response(contents, response)
+        self.usage.record(usage, usage_scope)
+        if attempts > 1:
+            # The hedged duplicate is billed too; its usage is not reported, so assume the same
+            self.usage.record(replace(usage, estimated_calls=1), usage_scope)
+        return response
+
+    def _session_model(self, system_instruction: Optional[str]):
+        """Get a model whose session carries the given static instructions, or None to send them inline"""
+        if not system_instruction:
+            return self.model
+        if not self.use_system_instruction or not hasattr(self.model, 'model_name'):
+            return None
+        with self._sessions_lock:
+            session = self._sessions.get(system_instruction)
+            if session is None:
+                # A client_pool.ClientPool keeps its per-key clients in its sessions
+                factory = getattr(self.model, 'with_system_instruction', None)
+                if factory is not None:
+                    session = factory(system_instruction)
+                else:
+                    try:
+                        session = type(self.model)(model_name=self.model.model_name,
+                                                   system_instruction=system_instruction)
+                    except TypeError as e:
+                        # SDKs before google-generativeai 0.5 have no system_instruction argument
+                        if not rejects_system_instruction(e):
+                            raise
+                        logger.warning(f"System instructions not supported, sending them inline: {str(e)}")
+                        self.use_system_instruction = False
+                        return None
+                self._sessions[system_instruction] = session
+        return session
+
+    def _generate(self, model, contents, timeout: Optional[float], kwargs: dict) -> Tuple[object, int]:
+        """Run one call (plus a possible hedge) and return the first response and the attempt count"""
+        time_left = self._time_left(timeout)
+        deadline = time.monotonic() + time_left
+        # The request itself is also bounded so an abandoned call cannot hang forever
+        kwargs["request_options"] = dict(kwargs.get("request_options") or {}, timeout=time_left)
+
+        start = time.monotonic()
+        abandoned = threading.Event()
+        primary = self._executor.submit(self._attempt, model, contents, kwargs, deadline, abandoned)
+        futures = [primary]
+
+        hedge_after = self._hedge_delay()
+        if hedge_after is not None and hedge_after < time_left:
+            done, _ = wait(futures, timeout=hedge_after)
+            if not done:
+                logger.info(f"Call exceeded p{int(self.hedge_quantile * 100)} latency "
+                            f"({hedge_after:.1f}s), sending hedged request")
+                self.hedged_calls += 1
+                futures.append(self._executor.submit(self._attempt, model, contents, kwargs, deadline, abandoned))
+
+        try:
+            return self._first_result(futures, deadline, start), len(futures)
+        finally:
+            # Stop whatever is still queued or waiting for a slot; running calls end at their request timeout
+            abandoned.set()
+            for future in futures:
+                future.cancel()
+
+    def _attempt(self, model, contents, kwargs: dict, deadline: float, abandoned: threading.Event):
+        """Send one request, primary or hedge, holding its own quota slot for as long as it runs"""
+        if self.quota is None:
+            return model.generate_content(contents, **kwargs)
+        # Waiting for a quota slot is bounded by the call's deadline
+        with self.quota.slot(self.job, self.priority, max(0.0, deadline - time.monotonic())):
+            if abandoned.is_set():
+                raise DeadlineExceeded("Call was answered or gave up while this attempt waited for a slot")
+            return model.generate_content(contents, **kwargs)
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Get how long to wait before hedging, or None while hedging is off or unwarmed"""
+        if not self.hedge or len(self.latency) < self.min_samples:
+            return None
+        return self.latency.percentile(self.hedge_quantile)
+
+    def _first_result(self, futures, deadline: float, start: float):
+        """Return the first successful response, failing only when all attempts failed"""
+        pending = set(futures)
+        last_error = None
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                self.latency.record(time.monotonic() - start)
+                if future is not futures[0]:
+                    self.hedge_wins += 1
+                return response
+
+        if last_error is not None and not pending:
+            raise last_error
+        raise DeadlineExceeded(f"Model call did not finish within {deadline - start:.1f}s")
+
+    def __getattr__(self, name):
+        # Anything not wrapped (e.g. count_tokens) goes straight to the model
+        return getattr(self.model, name)
@@ -0,0 +1,121 @@
+"""Native, editable PowerPoint charts built from the same data dicts as VisualizationTools graphs."""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import logging
+
+import numpy as np
+from pptx.chart.data import CategoryChartData, XyChartData
+from pptx.dml.color import RGBColor
+from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION, XL_LABEL_POSITION
+from pptx.util import Pt
+
+from downsampling import lttb
+
+logger = logging.getLogger(__name__)
+
+CHART_TYPES = {
+    "pie": XL_CHART_TYPE.PIE,
+    "bar": XL_CHART_TYPE.COLUMN_CLUSTERED,
+    "line": XL_CHART_TYPE.LINE_MARKERS,
+    "scatter": XL_CHART_TYPE.XY_SCATTER
+}
+MAX_LINE_POINTS = 500  # Longer line series are downsampled to keep the chart part small
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    chart_type: str
+    title: str
+    categories: Tuple = ()  # Labels of pie, bar and line charts
+    values: Tuple = ()  # Values of pie, bar and line charts, y values of scatter charts
+    x_values: Tuple = ()  # Scatter charts only
+    colors: Optional[Tuple[str, ...]] = None  # Hex colors; the template theme colors are used otherwise
+
+
+def chart_spec(graph_type: str, data: Dict[str, List], title: str,
+               colors: Optional[List[str]] = None) -> ChartSpec:
+    """Create a chart spec from the data dict VisualizationTools.create_graph takes"""
+    if graph_type not in CHART_TYPES:
+        raise ValueError(f"Unsupported graph type: {graph_type}")
+    if graph_type == "scatter":
+        x_values, y_values = tuple(data["x_values"]), tuple(data["y_values"])
+        if len(x_values) != len(y_values):
+            raise ValueError("Scatter data needs as many x values as y values")
+        return ChartSpec(graph_type, title, values=y_values, x_values=x_values,
+                         colors=tuple(colors) if colors else None)
+    labels, values = tuple(str(label) for label in data["labels"]), tuple(data["values"])
+    if len(labels) != len(values):
+        raise ValueError("Chart data needs as many labels as values")
+    if graph_type == "line" and len(values) > MAX_LINE_POINTS:
+        keep = lttb(np.arange(len(values)), np.asarray(values, dtype=float), MAX_LINE_POINTS)
+        labels, values = tuple(labels[i] for i in keep), tuple(values[i] for i in keep)
+    return ChartSpec(graph_type, title, categories=labels, values=values,
+                     colors=tuple(colors) if colors else None)
+
+
+def chart_data(spec: ChartSpec):
+    """Get the python-pptx chart data of a spec"""
+    if spec.chart_type == "scatter":
+        data = XyChartData()
+        series = data.add_series(spec.title)
+        for x, y in zip(spec.x_values, spec.values):
+            series.add_data_point(x, y)
+        return data
+    data = CategoryChartData()
+    data.categories = spec.categories
+    data.add_series(spec.title, spec.values)
+    return data
+
+
+def _rgb(color: str) -> RGBColor:
+    return RGBColor.from_string(color.lstrip('#')[:6].upper())
+
+
+def _apply_colors(chart, spec: ChartSpec) -> None:
+    """Color pie slices and bars by point, lines and scatter markers by series"""
+    plot = chart.plots[0]
+    series = plot.series[0]
+    if spec.chart_type in ("pie", "bar"):
+        for index in range(len(spec.values)):
+            fill = series.points[index].format.fill
+            fill.solid()
+            fill.fore_color.rgb = _rgb(spec.colors[index % len(spec.colors)])
+    elif spec.chart_type == "line":
+        series.format.line.color.rgb = _rgb(spec.colors[0])
+    else:
+        series.marker.format.fill.solid()
+        series.marker.format.fill.fore_color.rgb = _rgb(spec.colors[0])
+
+
+def add_chart(shapes, spec: ChartSpec, left: int, top: int, width: int, height: int):
+    """Add a spec as a native chart to a slide's shapes and return its graphic frame"""
+    frame = shapes.add_chart(CHART_TYPES[spec.chart_type], left, top, width, height, chart_data(spec))
+    chart = frame.chart
+
+    chart.has_title = True
+    chart.chart_title.text_frame.text = spec.title
+    chart.chart_title.text_frame.paragraphs[0].font.size = Pt(14)
+    chart.chart_title.text_frame.paragraphs[0].font.bold = True
+
+    if spec.chart_type == "pie":
+        # Percent labels and a legend, like the matplotlib pie
+        plot = chart.plots[0]
+        plot.has_data_labels = True
+        plot.data_labels.show_percentage = True
+        plot.data_labels.show_value = False
+        plot.data_labels.number_format = '0.0%'
+        plot.data_labels.number_format_is_linked = False
+        plot.data_labels.position = XL_LABEL_POSITION.OUTSIDE_END
+        chart.has_legend = True
+        chart.legend.position = XL_LEGEND_POSITION.RIGHT
+        chart.legend.include_in_layout = False
+    else:
+        chart.has_legend = False
+        chart.value_axis.has_major_gridlines = True
+        if spec.chart_type == "bar":
+            chart.plots[0].vary_by_categories = spec.colors is None
+
+    if spec.colors:
+        _apply_colors(chart, spec)
+    return frame
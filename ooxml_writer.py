@@ -0,0 +1,416 @@
+"""Streaming OOXML writer that emits slides straight into the output zip."""
+
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape, quoteattr
+import logging
+import os
+import posixpath
+import re
+import zipfile
+
+from lxml import etree
+from pptx.enum.text import PP_ALIGN
+
+from text_fitting import FitResult
+
+logger = logging.getLogger(__name__)
+
+NS = {
+    'a': "http://schemas.openxmlformats.org/drawingml/2006/main",
+    'p': "http://schemas.openxmlformats.org/presentationml/2006/main",
+    'r': "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    'rel': "http://schemas.openxmlformats.org/package/2006/relationships",
+    'ct': "http://schemas.openxmlformats.org/package/2006/content-types",
+    'ep': "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties",
+    'vt': "http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes",
+}
+
+RT_SLIDE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide"
+RT_SLIDE_LAYOUT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/slideLayout"
+RT_IMAGE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+CT_SLIDE = "application/vnd.openxmlformats-officedocument.presentationml.slide+xml"
+
+IMAGE_CONTENT_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'svg': 'image/svg+xml',
+}
+
+ALIGNMENT_XML = {
+    PP_ALIGN.LEFT: 'l',
+    PP_ALIGN.CENTER: 'ctr',
+    PP_ALIGN.RIGHT: 'r',
+    PP_ALIGN.JUSTIFY: 'just',
+}
+
+# Placeholder types the writer fills; others (date, footer, slide number) are not copied to slides
+TITLE_TYPES = ('title', 'ctrTitle')
+BODY_TYPES = ('body', 'obj')
+PICTURE_TYPES = ('pic',)
+
+# Parts that are rewritten or dropped rather than copied from the template
+SLIDE_PART_PATTERN = re.compile(r'^ppt/(slides|notesSlides)/')
+APP_PROPERTIES_PART = 'docProps/app.xml'
+REWRITTEN_PARTS = {'[Content_Types].xml', 'ppt/presentation.xml', 'ppt/_rels/presentation.xml.rels',
+                   APP_PROPERTIES_PART}
+SLIDE_TITLES_HEADING = "Slide Titles"
+
+SLIDE_XML_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<p:sld xmlns:a="{NS["a"]}" xmlns:r="{NS["r"]}" xmlns:p="{NS["p"]}">'
+    '<p:cSld><p:spTree><p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+    '<p:grpSpPr/>'
+)
+SLIDE_XML_FOOTER = '</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>'
+
+
+def _rels_path(partname: str) -> str:
+    """Get the relationships part path for a part"""
+    directory, filename = posixpath.split(partname)
+    return posixpath.join(directory, '_rels', f"{filename}.rels")
+
+
+def _resolve(base_partname: str, target: str) -> str:
+    """Resolve a relative relationship target against its source part"""
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_partname), target))
+
+
+class StreamingDeckWriter:
+    """Writes slides directly into a .pptx zip, copying template masters/layouts/media as raw bytes"""
+
+    def __init__(self, template_path: str, output_path: str, template_data: Optional[bytes] = None):
+        """template_data is the template file already read into memory, e.g. by a long-running server"""
+        if template_data is None and not os.path.exists(template_path):
+            raise FileNotFoundError(f"Template file not found: {template_path}")
+
+        self.template_path = template_path
+        self.output_path = output_path
+        self._template = zipfile.ZipFile(BytesIO(template_data) if template_data is not None else template_path)
+        self._output = zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED)
+        self._slides: List[Tuple[int, str]] = []  # (slide id, partname)
+        self._titles: List[str] = []  # per slide, for docProps/app.xml
+        self._media_count = 0
+        self._image_extensions = set()
+        self._closed = False
+
+        self.layouts = self._read_layouts()
+        self._copy_template_parts()
+        logger.info(f"Streaming deck to {output_path} with {len(self.layouts)} template layouts")
+
+    def _read_xml(self, partname: str):
+        return etree.fromstring(self._template.read(partname))
+
+    def _read_rels(self, partname: str) -> Dict[str, Tuple[str, str]]:
+        """Read relationships of a template part as rId -> (reltype, resolved target)"""
+        rels_path = _rels_path(partname)
+        if rels_path not in self._template.namelist():
+            return {}
+        rels = {}
+        for rel in self._read_xml(rels_path).findall('rel:Relationship', NS):
+            target = rel.get('Target')
+            if rel.get('TargetMode') != 'External':
+                target = _resolve(partname, target)
+            rels[rel.get('Id')] = (rel.get('Type'), target)
+        return rels
+
+    def _read_layouts(self) -> List[Dict]:
+        """Read the first master's layouts in python-pptx slide_layouts order"""
+        presentation = self._read_xml('ppt/presentation.xml')
+        presentation_rels = self._read_rels('ppt/presentation.xml')
+        master_id = presentation.find('p:sldMasterIdLst/p:sldMasterId', NS)
+        master_partname = presentation_rels[master_id.get(f"{{{NS['r']}}}id")][1]
+
+        master = self._read_xml(master_partname)
+        master_rels = self._read_rels(master_partname)
+        layouts = []
+        for layout_id in master.findall('p:sldLayoutIdLst/p:sldLayoutId', NS):
+            partname = master_rels[layout_id.get(f"{{{NS['r']}}}id")][1]
+            layout = self._read_xml(partname)
+            placeholders = []
+            for ph in layout.iterfind('.//p:nvPr/p:ph', NS):
+                ph_type = ph.get('type', 'obj')
+                if ph_type in TITLE_TYPES + BODY_TYPES + PICTURE_TYPES:
+                    placeholders.append({'type': ph_type, 'idx': ph.get('idx')})
+            layouts.append({
+                'name': layout.find('p:cSld', NS).get('name', ''),
+                'partname': partname,
+                'placeholders': placeholders
+            })
+        return layouts
+
+    def _copy_template_parts(self):
+        """Copy every template part except slides and the parts rewritten on close"""
+        names = self._template.namelist()
+        skipped = {name for name in names if SLIDE_PART_PATTERN.match(name)}
+
+        # Media only referenced by the template's sample slides is not copied
+        referenced = set()
+        for name in names:
+            if name.endswith('.rels') and name not in skipped:
+                source = posixpath.join(posixpath.dirname(posixpath.dirname(name)),
+                                        posixpath.basename(name)[:-len('.rels')])
+                referenced.update(target for _, target in self._read_rels(source).values())
+        for name in names:
+            if name.startswith('ppt/media/') and name not in referenced:
+                skipped.add(name)
+
+        for info in self._template.infolist():
+            if info.filename in skipped or info.filename in REWRITTEN_PARTS:
+                continue
+            # Raw copy, the part is never parsed
+            with self._template.open(info) as source, self._output.open(info.filename, 'w') as target:
+                while True:
+                    chunk = source.read(1 << 16)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+
+    def _add_media(self, image_path: str) -> str:
+        """Stream an image into the package and return its partname"""
+        extension = os.path.splitext(image_path)[1].lstrip('.').lower() or 'png'
+        self._media_count += 1
+        partname = f"ppt/media/stream_image{self._media_count}.{extension}"
+        self._output.write(image_path, partname)
+        self._image_extensions.add(extension)
+        return partname
+
+    @staticmethod
+    def _run_properties(formatting: dict, font_size: Optional[float]) -> str:
+        attrs = ' lang="en-US"'
+        if font_size:
+            attrs += f' sz="{int(round(font_size * 100))}"'
+        if 'font_bold' in formatting:
+            attrs += f' b="{1 if formatting["font_bold"] else 0}"'
+        children = ''
+        if 'font_name' in formatting:
+            children = f'<a:latin typeface={quoteattr(formatting["font_name"])}/>'
+        return f'<a:rPr{attrs} dirty="0">{children}</a:rPr>' if children else f'<a:rPr{attrs} dirty="0"/>'
+
+    @staticmethod
+    def _paragraph_properties(formatting: dict) -> str:
+        attrs = ''
+        if formatting.get('indent_level'):
+            attrs += f' lvl="{formatting["indent_level"]}"'
+        if formatting.get('alignment') in ALIGNMENT_XML:
+            attrs += f' algn="{ALIGNMENT_XML[formatting["alignment"]]}"'
+        children = ''
+        if 'line_spacing' in formatting:
+            children += f'<a:lnSpc><a:spcPct val="{int(formatting["line_spacing"] * 100000)}"/></a:lnSpc>'
+        if 'space_before' in formatting:
+            children += f'<a:spcBef><a:spcPts val="{int(formatting["space_before"] * 100)}"/></a:spcBef>'
+        if 'space_after' in formatting:
+            children += f'<a:spcAft><a:spcPts val="{int(formatting["space_after"] * 100)}"/></a:spcAft>'
+        return f'<a:pPr{attrs}>{children}</a:pPr>'
+
+    def _paragraph_xml(self, lines: List[str], formatting: dict, font_size: Optional[float] = None) -> str:
+        run_properties = self._run_properties(formatting, font_size or formatting.get('font_size'))
+        runs = '<a:br>{}</a:br>'.format(run_properties).join(
+            f'<a:r>{run_properties}<a:t>{escape(line)}</a:t></a:r>' for line in lines
+        )
+        return f'<a:p>{self._paragraph_properties(formatting)}{runs}</a:p>'
+
+    @staticmethod
+    def _ph_xml(placeholder: Dict) -> str:
+        attrs = '' if placeholder['type'] == 'obj' else f' type="{placeholder["type"]}"'
+        if placeholder['idx'] is not None:
+            attrs += f' idx="{placeholder["idx"]}"'
+        return f'<p:ph{attrs}/>'
+
+    def _shape_xml(self, shape_id: int, placeholder: Dict, paragraphs: List[str]) -> str:
+        return (
+            f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="Placeholder {shape_id}"/>'
+            '<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr>'
+            f'<p:nvPr>{self._ph_xml(placeholder)}</p:nvPr></p:nvSpPr><p:spPr/>'
+            f'<p:txBody><a:bodyPr><a:normAutofit/></a:bodyPr><a:lstStyle/>{"".join(paragraphs) or "<a:p/>"}</p:txBody></p:sp>'
+        )
+
+    def _picture_xml(self, shape_id: int, placeholder: Dict, rid: str) -> str:
+        return (
+            f'<p:pic><p:nvPicPr><p:cNvPr id="{shape_id}" name="Picture {shape_id}"/>'
+            '<p:cNvPicPr><a:picLocks noGrp="1" noChangeAspect="1"/></p:cNvPicPr>'
+            f'<p:nvPr>{self._ph_xml(placeholder)}</p:nvPr></p:nvPicPr>'
+            f'<p:blipFill><a:blip r:embed="{rid}"/><a:stretch><a:fillRect/></a:stretch></p:blipFill>'
+            '<p:spPr/></p:pic>'
+        )
+
+    def add_slide(self, layout_index: int, title: Optional[Tuple[str, dict]] = None,
+                  bodies: Optional[List[FitResult]] = None,
+                  body_formatting: Optional[List[List[dict]]] = None,
+                  image_path: Optional[str] = None) -> int:
+        """Write one slide to the zip; bodies are fitted text blocks in body placeholder order"""
+        if self._closed:
+            raise ValueError("Writer is already closed")
+        if not 0 <= layout_index < len(self.layouts):
+            logger.warning(f"Layout {layout_index} not in template, using first layout")
+            layout_index = 0
+
+        layout = self.layouts[layout_index]
+        number = len(self._slides) + 1
+        partname = f"ppt/slides/slide{number}.xml"
+        rels = [('rId1', RT_SLIDE_LAYOUT, posixpath.relpath(layout['partname'], 'ppt/slides'))]
+
+        shapes = []
+        shape_id = 2
+        body_queue = list(zip(bodies or [], body_formatting or []))
+        for placeholder in layout['placeholders']:
+            if placeholder['type'] in TITLE_TYPES and title:
+                text, formatting = title
+                shapes.append(self._shape_xml(shape_id, placeholder, [self._paragraph_xml([text], formatting)]))
+            elif placeholder['type'] in BODY_TYPES and body_queue:
+                fit, formats = body_queue.pop(0)
+                paragraphs = [
+                    self._paragraph_xml(paragraph.lines, formatting, paragraph.font_size)
+                    for paragraph, formatting in zip(fit.paragraphs, formats)
+                ]
+                shapes.append(self._shape_xml(shape_id, placeholder, paragraphs))
+            elif placeholder['type'] in PICTURE_TYPES and image_path and os.path.exists(image_path):
+                media = self._add_media(image_path)
+                rid = f"rId{len(rels) + 1}"
+                rels.append((rid, RT_IMAGE, posixpath.relpath(media, 'ppt/slides')))
+                shapes.append(self._picture_xml(shape_id, placeholder, rid))
+            else:
+                continue
+            shape_id += 1
+
+        self._output.writestr(partname, SLIDE_XML_HEADER + ''.join(shapes) + SLIDE_XML_FOOTER)
+        self._output.writestr(_rels_path(partname), self._rels_xml(rels))
+        self._slides.append((255 + number, partname))
+        self._titles.append(title[0] if title else "")
+        return number
+
+    @staticmethod
+    def _rels_xml(rels: List[Tuple[str, str, str]]) -> str:
+        items = ''.join(
+            f'<Relationship Id="{rid}" Type="{reltype}" Target={quoteattr(target)}/>'
+            for rid, reltype, target in rels
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{NS["rel"]}">{items}</Relationships>'
+        )
+
+    def _write_presentation(self):
+        """Rewrite presentation.xml and its rels with the streamed slides"""
+        rels_root = self._read_xml('ppt/_rels/presentation.xml.rels')
+        used_ids = []
+        for rel in list(rels_root):
+            if rel.get('Type') == RT_SLIDE:
+                rels_root.remove(rel)
+            else:
+                used_ids.append(rel.get('Id'))
+
+        next_id = max((int(rid[3:]) for rid in used_ids if rid[3:].isdigit()), default=0) + 1
+        slide_rids = []
+        for offset, (_, partname) in enumerate(self._slides):
+            rid = f"rId{next_id + offset}"
+            etree.SubElement(rels_root, f"{{{NS['rel']}}}Relationship",
+                             Id=rid, Type=RT_SLIDE, Target=posixpath.relpath(partname, 'ppt'))
+            slide_rids.append(rid)
+
+        presentation = self._read_xml('ppt/presentation.xml')
+        slide_list = presentation.find('p:sldIdLst', NS)
+        if slide_list is None:
+            slide_list = etree.Element(f"{{{NS['p']}}}sldIdLst")
+            presentation.find('p:sldMasterIdLst', NS).addnext(slide_list)
+        for child in list(slide_list):
+            slide_list.remove(child)
+        for (slide_id, _), rid in zip(self._slides, slide_rids):
+            etree.SubElement(slide_list, f"{{{NS['p']}}}sldId", id=str(slide_id),
+                             attrib={f"{{{NS['r']}}}id": rid})
+
+        self._output.writestr('ppt/_rels/presentation.xml.rels',
+                              etree.tostring(rels_root, xml_declaration=True, encoding='UTF-8', standalone=True))
+        self._output.writestr('ppt/presentation.xml',
+                              etree.tostring(presentation, xml_declaration=True, encoding='UTF-8', standalone=True))
+
+    def _write_content_types(self):
+        """Rewrite [Content_Types].xml for the streamed slides and media"""
+        types = self._read_xml('[Content_Types].xml')
+        for override in list(types.findall('ct:Override', NS)):
+            if SLIDE_PART_PATTERN.match(override.get('PartName').lstrip('/')):
+                types.remove(override)
+
+        defaults = {default.get('Extension').lower() for default in types.findall('ct:Default', NS)}
+        for extension in sorted(self._image_extensions - defaults):
+            etree.SubElement(types, f"{{{NS['ct']}}}Default", Extension=extension,
+                             ContentType=IMAGE_CONTENT_TYPES.get(extension, f"image/{extension}"))
+        for _, partname in self._slides:
+            etree.SubElement(types, f"{{{NS['ct']}}}Override", PartName=f"/{partname}", ContentType=CT_SLIDE)
+
+        self._output.writestr('[Content_Types].xml',
+                              etree.tostring(types, xml_declaration=True, encoding='UTF-8', standalone=True))
+
+    def _write_app_properties(self):
+        """Rewrite docProps/app.xml with the slide count and slide titles of the streamed deck"""
+        if APP_PROPERTIES_PART not in self._template.namelist():
+            return
+        properties = self._read_xml(APP_PROPERTIES_PART)
+
+        def set_value(name: str, value: str, only_if_present: bool = False):
+            element = properties.find(f'ep:{name}', NS)
+            if element is None:
+                if only_if_present:
+                    return
+                element = etree.SubElement(properties, f"{{{NS['ep']}}}{name}")
+            element.text = value
+
+        set_value('Slides', str(len(self._slides)))
+        # Notes and hidden slides of the template are never copied
+        set_value('Notes', '0', only_if_present=True)
+        set_value('HiddenSlides', '0', only_if_present=True)
+
+        pairs_vector = properties.find('ep:HeadingPairs/vt:vector', NS)
+        parts_vector = properties.find('ep:TitlesOfParts/vt:vector', NS)
+        if pairs_vector is not None and parts_vector is not None:
+            # Heading pairs name the groups of TitlesOfParts and their sizes, in order
+            variants = pairs_vector.findall('vt:variant', NS)
+            headings = [variant.findtext('vt:lpstr', namespaces=NS) for variant in variants[0::2]]
+            counts = [int(variant.findtext('vt:i4', default='0', namespaces=NS)) for variant in variants[1::2]]
+            parts = [part.text or "" for part in parts_vector.findall('vt:lpstr', NS)]
+
+            groups, start = [], 0
+            for heading, count in zip(headings, counts):
+                groups.append((heading, parts[start:start + count]))
+                start += count
+            groups = [(heading, titles) for heading, titles in groups if heading != SLIDE_TITLES_HEADING]
+            groups.append((SLIDE_TITLES_HEADING, self._titles))
+
+            for child in list(pairs_vector):
+                pairs_vector.remove(child)
+            for child in list(parts_vector):
+                parts_vector.remove(child)
+            for heading, titles in groups:
+                name = etree.SubElement(pairs_vector, f"{{{NS['vt']}}}variant")
+                etree.SubElement(name, f"{{{NS['vt']}}}lpstr").text = heading
+                count = etree.SubElement(pairs_vector, f"{{{NS['vt']}}}variant")
+                etree.SubElement(count, f"{{{NS['vt']}}}i4").text = str(len(titles))
+                for title in titles:
+                    etree.SubElement(parts_vector, f"{{{NS['vt']}}}lpstr").text = title
+            pairs_vector.set('size', str(2 * len(groups)))
+            parts_vector.set('size', str(sum(len(titles) for _, titles in groups)))
+
+        self._output.writestr(APP_PROPERTIES_PART,
+                              etree.tostring(properties, xml_declaration=True, encoding='UTF-8', standalone=True))
+
+    def close(self):
+        """Finish the package; must be called once all slides are written"""
+        if self._closed:
+            return
+        try:
+            self._write_presentation()
+            self._write_content_types()
+            self._write_app_properties()
+        finally:
+            self._output.close()
+            self._template.close()
+            self._closed = True
+        logger.info(f"Streamed {len(self._slides)} slides to {self.output_path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,140 @@
+"""Pagination stage between content generation and slide creation."""
+
+from dataclasses import replace
+from typing import List, Optional, Tuple
+import logging
+
+from gemini_content_generator import SlideContent, LessonPlan
+from template_config import get_formatting
+from text_fitting import TextFitter
+from slide_renderers import body_paragraphs
+
+logger = logging.getLogger(__name__)
+
+CONTINUATION_SUFFIX = " (cont.)"
+
+
+def is_continuation(content: SlideContent) -> bool:
+    """Check whether a slide is a later page of a slide split by pagination"""
+    return content.title.endswith(CONTINUATION_SUFFIX)
+
+
+class SlidePaginator:
+    """Splits oversized slides into continuation slides or two-column slides"""
+
+    def __init__(self, text_fitter: TextFitter, body_box: Tuple[int, int],
+                 column_box: Optional[Tuple[int, int]] = None):
+        self.text_fitter = text_fitter
+        self.body_box = body_box
+        self.column_box = column_box
+
+    def fits(self, content: SlideContent, box: Optional[Tuple[int, int]] = None) -> bool:
+        """Check whether the body of a slide fits a placeholder box"""
+        width, height = box or self.body_box
+        return self.text_fitter.fit(body_paragraphs(content), width, height).fits
+
+    def _fits_columns(self, content: SlideContent) -> bool:
+        """Check whether main content and bullets each fit one column"""
+        if not self.column_box or not content.main_content or not content.bullet_points:
+            return False
+        main_only = replace(content, bullet_points=None)
+        bullets_only = replace(content, main_content="")
+        return self.fits(main_only, self.column_box) and self.fits(bullets_only, self.column_box)
+
+    def paginate(self, content: SlideContent) -> List[SlideContent]:
+        """Split a slide into as many slides as its measured body needs"""
+        try:
+            if self.fits(content):
+                return [content]
+
+            if self._fits_columns(content):
+                logger.info(f"Moving '{content.title}' to a two-column layout")
+                return [replace(content, layout_hint='two_content')]
+
+            pages = self._split(content)
+            logger.info(f"Split '{content.title}' into {len(pages)} slides")
+            return pages
+
+        except Exception as e:
+            logger.error(f"Pagination failed for '{content.title}': {str(e)}")
+            return [content]
+
+    def paginate_slides(self, slides: List[SlideContent]) -> List[SlideContent]:
+        """Paginate a list of slides, keeping their order"""
+        paginated = []
+        for content in slides:
+            paginated.extend(self.paginate(content))
+        return paginated
+
+    def paginate_lesson_plan(self, lesson_plan: LessonPlan) -> LessonPlan:
+        """Get a copy of a lesson plan with oversized slides split"""
+        return replace(lesson_plan, slides=self.paginate_slides(lesson_plan.slides))
+
+    def _main_lines(self, text: str) -> List[str]:
+        """Wrap main content at the minimum font size to get splittable lines"""
+        formatting = get_formatting('body_large')
+        formatting = dict(formatting, font_size=self.text_fitter.min_font_size)
+        width, _ = self.text_fitter.text_area(*self.body_box)
+        return [line for line in self.text_fitter.wrap(text, width, formatting) if line]
+
+    def _main_units(self, content: SlideContent) -> List[Tuple[str, bool]]:
+        """Split main content into (text, starts_paragraph) units: whole paragraphs, or the
+        wrapped lines of a paragraph too long for a page of its own"""
+        units = []
+        for paragraph in (content.main_content or "").split('\n'):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            if self.fits(replace(content, main_content=paragraph, bullet_points=None)):
+                units.append((paragraph, True))
+            else:
+                lines = self._main_lines(paragraph)
+                units += [(line, i == 0) for i, line in enumerate(lines)]
+        return units
+
+    @staticmethod
+    def _join_main(units: List[Tuple[str, bool]]) -> str:
+        """Join main content units, keeping the paragraph breaks between them"""
+        text = ""
+        for unit, starts_paragraph in units:
+            if text:
+                text += "\n" if starts_paragraph else " "
+            text += unit
+        return text
+
+    def _split(self, content: SlideContent) -> List[SlideContent]:
+        """Greedily pack main content paragraphs and bullets into continuation slides"""
+        units = [('main', unit) for unit in self._main_units(content)]
+        # Bullets are packed by index so their nesting levels move with them
+        units += [('bullet', i) for i in range(len(content.bullet_points or []))]
+
+        pages = []
+        main_lines: List[Tuple[str, bool]] = []
+        bullets: List[int] = []
+
+        def page(main: List[Tuple[str, bool]], points: List[int]) -> SlideContent:
+            first = not pages
+            levels = content.bullet_levels or []
+            return replace(
+                content,
+                title=content.title if first else f"{content.title}{CONTINUATION_SUFFIX}",
+                main_content=self._join_main(main),
+                bullet_points=[content.bullet_points[i] for i in points] or None,
+                bullet_levels=[levels[i] if i < len(levels) else 0 for i in points] if levels and points else None,
+                notes=content.notes if first else None,
+                interactive_elements=content.interactive_elements if first else None
+            )
+
+        for kind, unit in units:
+            candidate_main = main_lines + [unit] if kind == 'main' else main_lines
+            candidate_bullets = bullets + [unit] if kind == 'bullet' else bullets
+            if (main_lines or bullets) and not self.fits(page(candidate_main, candidate_bullets)):
+                pages.append(page(main_lines, bullets))
+                main_lines, bullets = [], []
+                candidate_main = [unit] if kind == 'main' else []
+                candidate_bullets = [unit] if kind == 'bullet' else []
+            main_lines, bullets = candidate_main, candidate_bullets
+
+        if main_lines or bullets or not pages:
+            pages.append(page(main_lines, bullets))
+        return pages
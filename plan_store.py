@@ -0,0 +1,108 @@
+"""Versioned on-disk format for generated lesson plans (JSON Lines)."""
+
+from dataclasses import asdict
+from typing import Dict, Iterator, Optional, Tuple
+import json
+import logging
+import os
+
+from gemini_content_generator import SlideContent, LessonPlan, SlideType
+
+logger = logging.getLogger(__name__)
+
+PLAN_FORMAT = "cyberagent-lesson-plan"
+PLAN_VERSION = 1
+PLAN_EXTENSION = ".plan.jsonl"
+
+
+def slide_to_dict(content: SlideContent) -> Dict:
+    """Convert a slide to a JSON-serializable dict"""
+    data = asdict(content)
+    data["slide_type"] = content.slide_type.value
+    return data
+
+
+def slide_from_dict(data: Dict) -> SlideContent:
+    """Create a slide from a dict written by slide_to_dict"""
+    data = dict(data)
+    data["slide_type"] = SlideType(data["slide_type"])
+    return SlideContent(**data)
+
+
+def save_lesson_plan(lesson_plan: LessonPlan, path: str) -> str:
+    """Write a lesson plan as a header line followed by one line per slide"""
+    header = {
+        "format": PLAN_FORMAT,
+        "version": PLAN_VERSION,
+        "title": lesson_plan.title,
+        "description": lesson_plan.description,
+        "learning_objectives": lesson_plan.learning_objectives,
+        "practical_activities": lesson_plan.practical_activities,
+        "assessment": lesson_plan.assessment,
+        "slide_count": len(lesson_plan.slides)
+    }
+
+    # Write to a temporary file first so a failed save never leaves a partial plan
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for content in lesson_plan.slides:
+            f.write(json.dumps(slide_to_dict(content), ensure_ascii=False) + "\n")
+    os.replace(temp_path, path)
+
+    logger.info(f"Saved lesson plan '{lesson_plan.title}' ({len(lesson_plan.slides)} slides) to {path}")
+    return path
+
+
+def _check_header(header: Dict, path: str) -> Dict:
+    """Validate the format marker and version of a plan header"""
+    if header.get("format") != PLAN_FORMAT:
+        raise ValueError(f"{path} is not a lesson plan file")
+    if header.get("version", 0) > PLAN_VERSION:
+        raise ValueError(f"{path} uses plan format version {header['version']}, "
+                         f"newest supported is {PLAN_VERSION}")
+    return header
+
+
+def read_plan_header(path: str) -> Dict:
+    """Read only the header line of a plan file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return _check_header(json.loads(f.readline()), path)
+
+
+def iter_plan_slides(path: str) -> Iterator[SlideContent]:
+    """Stream slides from a plan file one line at a time"""
+    with open(path, 'r', encoding='utf-8') as f:
+        _check_header(json.loads(f.readline()), path)
+        for line in f:
+            if line.strip():
+                yield slide_from_dict(json.loads(line))
+
+
+def open_lesson_plan(path: str) -> Tuple[Dict, Iterator[SlideContent]]:
+    """Get the plan header and a lazy slide iterator, for curricula too large to load at once"""
+    return read_plan_header(path), iter_plan_slides(path)
+
+
+def load_lesson_plan(path: str) -> LessonPlan:
+    """Load a complete lesson plan from a plan file"""
+    header, slides = open_lesson_plan(path)
+    lesson_plan = LessonPlan(
+        title=header["title"],
+        description=header["description"],
+        learning_objectives=header["learning_objectives"],
+        slides=list(slides),
+        practical_activities=header.get("practical_activities"),
+        assessment=header.get("assessment")
+    )
+
+    expected = header.get("slide_count")
+    if expected is not None and expected != len(lesson_plan.slides):
+        logger.warning(f"Plan {path} declares {expected} slides but contains {len(lesson_plan.slides)}")
+    return lesson_plan
+
+
+def plan_path_for(output_path: str) -> str:
+    """Get the plan file path stored next to a generated deck"""
+    root, _ = os.path.splitext(output_path)
+    return root + PLAN_EXTENSION
@@ -0,0 +1,178 @@
+"""Per-slide progress events with an ETA from observed latency, for tqdm, logs or other subscribers."""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Event kinds, in the order a slide goes through them
+CACHED = "cached"  # reused from the build manifest, no call needed
+QUEUED = "queued"  # prompt waiting for a free request slot
+REGENERATING = "regenerating"  # near-duplicate slide prompted again; its answer carries regenerated=True
+SENT = "sent"  # request sent to the model
+PARSED = "parsed"  # response turned into a slide
+FAILED = "failed"  # timed out or unusable, a placeholder is used
+RENDERED = "rendered"  # slide added to the deck
+
+
+@dataclass
+class ProgressEvent:
+    kind: str
+    key: str
+    section: str = ""
+    timestamp: float = field(default_factory=time.monotonic)
+    detail: Dict = field(default_factory=dict)
+
+
+@dataclass
+class ProgressSnapshot:
+    counts: Dict[str, int]
+    pending_calls: int  # queued or in flight
+    in_flight: int
+    pending_renders: int
+    call_latency: float  # seconds, smoothed
+    calls_per_minute: float
+    eta_seconds: float
+    stalled_for: float  # seconds since the last event while work is pending
+
+
+class ProgressTracker:
+    """Event bus for deck builds that also keeps counts and estimates the remaining time"""
+
+    def __init__(self, concurrency: int = 4, default_latency: float = 6.0, smoothing: float = 0.2):
+        self.concurrency = concurrency
+        self.default_latency = default_latency
+        self.smoothing = smoothing
+        self._subscribers: List[Callable[[ProgressEvent, ProgressSnapshot], None]] = []
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget all events, e.g. before the next deck"""
+        with self._lock:
+            self.counts: Dict[str, int] = {kind: 0 for kind in (CACHED, QUEUED, REGENERATING, SENT, PARSED, FAILED,
+                                                             RENDERED)}
+            self.expected_renders = 0
+            self._sent_at: Dict[str, float] = {}
+            self._call_latency: Optional[float] = None
+            self._render_time: Optional[float] = None
+            self._started = time.monotonic()
+            self._last_event = self._started
+            self._last_render: Optional[float] = None
+
+    def subscribe(self, callback: Callable[[ProgressEvent, ProgressSnapshot], None]) -> Callable[[], None]:
+        """Call callback(event, snapshot) on every event; returns a function that unsubscribes it"""
+        with self._lock:
+            self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback) if callback in self._subscribers else None
+
+    def expect_renders(self, count: int) -> None:
+        """Announce how many slides the render step will add"""
+        with self._lock:
+            self.expected_renders += count
+
+    def emit(self, kind: str, key: str, section: str = "", **detail) -> None:
+        """Record an event and pass it to every subscriber"""
+        event = ProgressEvent(kind, key, section, detail=detail)
+        with self._lock:
+            self._record(event)
+            snapshot = self._snapshot(event.timestamp)
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event, snapshot)
+            except Exception as e:
+                logger.error(f"Error in progress subscriber: {str(e)}")
+
+    def _smooth(self, previous: Optional[float], value: float) -> float:
+        return value if previous is None else previous + self.smoothing * (value - previous)
+
+    def _record(self, event: ProgressEvent) -> None:
+        self.counts[event.kind] = self.counts.get(event.kind, 0) + 1
+        if event.kind == SENT:
+            self._sent_at[event.key] = event.timestamp
+        elif event.kind in (PARSED, FAILED):
+            sent_at = self._sent_at.pop(event.key, None)
+            if sent_at is not None:
+                event.detail.setdefault("latency", event.timestamp - sent_at)
+                self._call_latency = self._smooth(self._call_latency, event.detail["latency"])
+        elif event.kind == RENDERED:
+            if self._last_render is not None:
+                self._render_time = self._smooth(self._render_time, event.timestamp - self._last_render)
+            self._last_render = event.timestamp
+        self._last_event = event.timestamp
+
+    def _snapshot(self, now: float) -> ProgressSnapshot:
+        answered = self.counts[PARSED] + self.counts[FAILED]
+        pending_calls = max(0, self.counts[QUEUED] + self.counts[REGENERATING] - answered)
+        in_flight = len(self._sent_at)
+        pending_renders = max(0, self.expected_renders - self.counts[RENDERED])
+        latency = self._call_latency if self._call_latency is not None else self.default_latency
+
+        # Remaining calls go through in waves of `concurrency`; rendering follows at its observed pace
+        eta = -(-pending_calls // max(1, self.concurrency)) * latency
+        eta += pending_renders * (self._render_time or 0.0)
+        elapsed = now - self._started
+        return ProgressSnapshot(
+            counts=dict(self.counts),
+            pending_calls=pending_calls,
+            in_flight=in_flight,
+            pending_renders=pending_renders,
+            call_latency=latency,
+            calls_per_minute=answered * 60 / elapsed if elapsed > 0 else 0.0,
+            eta_seconds=eta,
+            stalled_for=0.0
+        )
+
+    def snapshot(self) -> ProgressSnapshot:
+        """Get the current counts and ETA, including how long nothing has happened"""
+        now = time.monotonic()
+        with self._lock:
+            snapshot = self._snapshot(now)
+            if snapshot.pending_calls or snapshot.pending_renders:
+                snapshot.stalled_for = now - self._last_event
+        return snapshot
+
+
+class LogSubscriber:
+    """Logs throughput every few answers and calls that take far longer than usual"""
+
+    def __init__(self, every: int = 10, slow_factor: float = 3.0):
+        self.every = every
+        self.slow_factor = slow_factor
+
+    def __call__(self, event: ProgressEvent, snapshot: ProgressSnapshot) -> None:
+        if event.kind in (PARSED, FAILED):
+            latency = event.detail.get("latency")
+            if latency and latency > self.slow_factor * snapshot.call_latency:
+                logger.warning(f"Slow model call for {event.key} ({event.section}): {latency:.1f}s, "
+                               f"usually {snapshot.call_latency:.1f}s")
+            if event.kind == FAILED:
+                logger.warning(f"No usable response for {event.key} ({event.section})")
+            answered = snapshot.counts[PARSED] + snapshot.counts[FAILED]
+            if answered % self.every == 0 or not snapshot.pending_calls:
+                logger.info(f"{answered} responses, {snapshot.pending_calls} pending "
+                            f"({snapshot.in_flight} in flight), {snapshot.calls_per_minute:.1f}/min, "
+                            f"ETA {snapshot.eta_seconds:.0f}s")
+
+
+class TqdmSubscriber:
+    """Advances a tqdm bar per answered call and rendered slide, showing the ETA from the tracker"""
+
+    def __init__(self, pbar):
+        self.pbar = pbar
+
+    def __call__(self, event: ProgressEvent, snapshot: ProgressSnapshot) -> None:
+        # The bar covers every slide twice: once for its content, once for rendering it. Regenerated
+        # slides were already counted, so their second answer does not advance it
+        total = (snapshot.counts[QUEUED] + snapshot.counts[CACHED]
+                 + snapshot.counts[RENDERED] + snapshot.pending_renders)
+        if total != self.pbar.total:
+            self.pbar.total = total
+            self.pbar.refresh()
+        if event.kind in (CACHED, PARSED, FAILED, RENDERED) and not event.detail.get("regenerated"):
+            self.pbar.set_postfix(in_flight=snapshot.in_flight, eta=f"{snapshot.eta_seconds:.0f}s", refresh=False)
+            self.pbar.update(1)
@@ -0,0 +1,64 @@
+"""Scheduler that issues independent prompts together."""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PromptJob:
+    key: str
+    # A ready prompt, or a function building it from the responses it depends on
+    prompt: Union[str, Callable[[Dict[str, str]], str]]
+    depends_on: Tuple[str, ...] = ()
+    context: Dict = field(default_factory=dict)  # Extra keyword arguments for the call
+
+
+class PromptScheduler:
+    """Runs prompt jobs as soon as their dependencies are answered, up to a fixed concurrency"""
+
+    def __init__(self, call: Callable[[str], str], max_concurrency: int = 4):
+        self.call = call
+        self.max_concurrency = max_concurrency
+
+    def run(self, jobs: List[PromptJob],
+            on_result: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+        """Run all jobs and return their responses by key; on_result(key, response) is called as each one arrives"""
+        keys = {job.key for job in jobs}
+        for job in jobs:
+            missing = [dep for dep in job.depends_on if dep not in keys]
+            if missing:
+                raise ValueError(f"Prompt job '{job.key}' depends on unknown jobs: {missing}")
+
+        results: Dict[str, str] = {}
+        pending = list(jobs)
+        running = {}
+        start = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            while pending or running:
+                # Issue every job whose inputs are available
+                ready = [job for job in pending if all(dep in results for dep in job.depends_on)]
+                for job in ready:
+                    pending.remove(job)
+                    prompt = job.prompt(results) if callable(job.prompt) else job.prompt
+                    running[executor.submit(self.call, prompt, **job.context)] = job
+
+                if not running:
+                    raise ValueError("Prompt jobs have circular dependencies")
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = running.pop(future)
+                    results[job.key] = future.result()
+                    if on_result:
+                        on_result(job.key, results[job.key])
+
+        if jobs:
+            logger.info(f"Answered {len(jobs)} prompts in {time.time() - start:.1f}s "
+                        f"with up to {self.max_concurrency} in flight")
+        return results
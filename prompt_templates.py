@@ -0,0 +1,229 @@
+"""Compiled prompt templates with static instructions kept apart from per-call text."""
+
+from string import Formatter
+from textwrap import dedent
+from typing import List, Optional, Tuple
+
+
+class PromptTemplate:
+    """Static instructions (sent once per model session) plus a compiled variable body"""
+
+    def __init__(self, name: str, instructions: str, body: str):
+        self.name = name
+        self.instructions = dedent(instructions).strip()
+        self.body = dedent(body).strip()
+        self._segments = self._compile(self.body)
+        self.fields = tuple(field for _, field in self._segments if field)
+        # Full text, used to detect template changes (e.g. by the build manifest)
+        self.source = f"{self.instructions}\n\n{self.body}"
+
+    @staticmethod
+    def _compile(body: str) -> List[Tuple[str, Optional[str]]]:
+        """Split the body once into (literal text, field name) segments"""
+        segments = []
+        for literal, field, format_spec, conversion in Formatter().parse(body):
+            if format_spec or conversion:
+                raise ValueError(f"Prompt fields must be plain names, got '{{{field}!{conversion}:{format_spec}}}'")
+            segments.append((literal, field))
+        return segments
+
+    def render(self, **values) -> str:
+        """Fill in the variable part of the prompt"""
+        missing = [field for field in self.fields if field not in values]
+        if missing:
+            raise KeyError(f"Prompt '{self.name}' is missing values for: {missing}")
+        return "".join(
+            literal + (str(values[field]) if field else "")
+            for literal, field in self._segments
+        )
+
+
+SLIDE_CONTENT_TEMPLATE = PromptTemplate(
+    "slide_content",
+    instructions="""
+        Create detailed content for a cybersecurity training slide.
+
+        Requirements:
+        1. Title must be clear and concise (max 8 words, 60 characters)
+        2. Main content should be thorough but concise (max 500 characters)
+        3. Use 3-6 bullet points, each max 80 characters
+        4. Include specific examples or practical applications
+        5. Reference relevant standards or frameworks
+        6. Use proper technical terminology
+        7. Ensure content fits slide format:
+           - Title at top
+           - Main content below
+           - Bullet points for key information
+           - Examples or references at bottom
+        8. Content should be educational and actionable for SME staff
+        9. Use proper line breaks for readability
+
+        Return ONLY a JSON object in the following format (no other text):
+        {
+            "title": "clear topic title",
+            "main_content": "detailed explanation",
+            "bullet_points": ["point 1", "point 2", "point 3"],
+            "examples": ["example 1", "example 2"],
+            "references": ["reference 1", "reference 2"]
+        }
+        """,
+    body="""
+        Module: {module}
+        Topic: {topic}
+        """
+)
+
+TITLE_TEMPLATE = PromptTemplate(
+    "title",
+    instructions="""
+        Create a compelling title slide introduction for a cybersecurity course.
+        Keep it concise and impactful (max 3-4 sentences).
+        Focus on the importance of data analytics in cybersecurity.
+        """,
+    body='Course title: "{course_title}"'
+)
+
+OVERVIEW_TEMPLATE = PromptTemplate(
+    "overview",
+    instructions="""
+        Create an overview for a section of a course on cybersecurity data analytics.
+        Provide a brief introduction (2-3 sentences) explaining why this topic is important.
+        Focus on practical applications and key learning outcomes.
+        """,
+    body='Section: "{section_title}"'
+)
+
+TOPIC_TEMPLATE = PromptTemplate(
+    "topic",
+    instructions="""
+        Create detailed slide content for a topic in cybersecurity data analytics.
+
+        Requirements:
+        1. Provide a clear, concise explanation (2-3 sentences)
+        2. Focus on practical applications and real-world examples
+        3. Use technical but understandable language
+        4. Make it relevant for cybersecurity professionals
+        """,
+    body="""
+        Topic: "{topic_title}"
+        Context: {topic}
+
+        The content should complement these bullet points:
+        {bullet_points}
+        """
+)
+
+EXAMPLE_TEMPLATE = PromptTemplate(
+    "example",
+    instructions="""
+        Create a practical example slide for a cybersecurity topic.
+        Include:
+        1. A real-world scenario
+        2. Specific tools or techniques used
+        3. Step-by-step approach
+        4. Expected outcomes or results
+        Keep it concise and actionable.
+        """,
+    body='Topic: "{topic_title}"'
+)
+
+CASE_STUDY_TEMPLATE = PromptTemplate(
+    "case_study",
+    instructions="""
+        Create a cybersecurity case study slide focusing on data analytics.
+        Include:
+        1. Brief scenario description
+        2. Challenge faced
+        3. Analytics approach used
+        4. Results and lessons learned
+        """,
+    body="Case study {number} of the course; use a different scenario than the other case studies."
+)
+
+ENHANCE_TEMPLATE = PromptTemplate(
+    "enhance",
+    instructions="""
+        You are a cybersecurity expert tasked with elaborating on brief descriptions of key data handling stages in cybersecurity.  You will receive text snippets, one at a time, focusing on either:
+
+        Data Collection
+        Data Cleaning and Preprocessing
+        Data Analysis
+        Data Visualization
+
+        For each text snippet provided, your objective is to generate a more detailed and comprehensive paragraph.  Enhance the original text by:
+
+        Adding Specificity: Incorporate concrete examples and scenarios relevant to cybersecurity.
+        Explaining Importance: Articulate the significance of the stage within the broader cybersecurity context.
+        Providing Context: Connect the stage to other cybersecurity processes and data handling workflows.
+        Elaborating on Techniques: Expand on the methods, tools, and best practices associated with each stage.
+        Maintaining Formal Tone: Ensure the output is informative, professional, and suitable for a cybersecurity audience.
+        Text you will provide must be under 100 words.
+        """,
+    body="""
+        Please enhance the following text while maintaining its core message:
+
+        {text}
+        """
+)
+
+QUIZ_TEMPLATE = PromptTemplate(
+    "quiz",
+    instructions="""
+        Create assessment questions for a cybersecurity training module.
+        Generate 3 multiple choice questions with 4 options each.
+        The correct answer must be copied exactly from the options.
+
+        Return ONLY a JSON array in the following structure (no other text):
+        [
+            {
+                "question": "question text",
+                "options": ["option1", "option2", "option3", "option4"],
+                "correct_answer": "correct option",
+                "explanation": "why the answer is correct"
+            }
+        ]
+        """,
+    body="""
+        Module: {module}
+        Lesson: {lesson_title}
+        {topics}
+        """
+)
+
+LAB_TEMPLATE = PromptTemplate(
+    "lab",
+    instructions="""
+        Create a practical lab exercise for cybersecurity training.
+        Include:
+        1. Exercise objectives
+        2. Required tools (Wireshark, Zabbix, or Nessus)
+        3. Step-by-step instructions
+        4. Expected outcomes
+        5. Discussion questions
+
+        Make it practical and relevant for SME environments.
+
+        Return ONLY a JSON object in the following format (no other text):
+        {
+            "title": "short lab title",
+            "objectives": ["objective 1", "objective 2"],
+            "tools": ["tool 1", "tool 2"],
+            "steps": ["step 1", "step 2", "step 3"],
+            "expected_outcomes": ["outcome 1", "outcome 2"],
+            "discussion_questions": ["question 1", "question 2"]
+        }
+        """,
+    body="""
+        Module: {module}
+        Lesson: {lesson_title}
+        {topics}
+        """
+)
+
+# Appended to the prompt of a slide that came out as a near-duplicate of an earlier one
+VARIATION_NOTE = """
+
+An earlier slide of this course already covers the following; take a clearly different angle,
+scenario and wording:
+Title: {title}
+Content: {excerpt}"""
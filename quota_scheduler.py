@@ -0,0 +1,125 @@
+"""Priority-aware sharing of one model quota between concurrent deck builds."""
+
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+import itertools
+import logging
+import threading
+import time
+
+from model_client import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+# Priority classes; lower goes first
+INTERACTIVE = 0  # a user waiting on one deck
+BATCH = 1  # curriculum rebuilds and other bulk work
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+
+class QuotaScheduler:
+    """Grants model request slots by priority class, then to the job holding the fewest slots
+
+    Queued batch requests wait while any interactive request is queued; requests already sent are not cancelled.
+    """
+
+    def __init__(self, max_concurrent: int = 8, requests_per_minute: Optional[int] = None):
+        self.max_concurrent = max_concurrent
+        self.requests_per_minute = requests_per_minute
+        self.granted: Counter = Counter()  # per priority class
+        self._cond = threading.Condition()
+        self._waiting: List[Tuple[int, int, str]] = []  # (priority, arrival, job)
+        self._held: Counter = Counter()  # slots in use per job
+        self._in_use = 0
+        self._arrivals = itertools.count()
+        self._recent = deque()  # grant times of the last minute, for requests_per_minute
+
+    @contextmanager
+    def slot(self, job: str, priority: int = BATCH, timeout: Optional[float] = None):
+        """Hold one request slot for the block, waiting up to timeout seconds for it"""
+        self.acquire(job, priority, timeout)
+        try:
+            yield
+        finally:
+            self.release(job)
+
+    def acquire(self, job: str, priority: int = BATCH, timeout: Optional[float] = None) -> None:
+        """Wait for a request slot; raises DeadlineExceeded after timeout seconds"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        request = (priority, next(self._arrivals), job)
+        start = time.monotonic()
+        with self._cond:
+            self._waiting.append(request)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._wait_time(request, now)
+                    if wait == 0:
+                        break
+                    remaining = deadline - now if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise DeadlineExceeded(f"No {PRIORITY_NAMES.get(priority, priority)} request slot "
+                                               f"within {timeout:.1f}s")
+                    waits = [value for value in (wait, remaining) if value is not None]
+                    self._cond.wait(min(waits) if waits else None)
+            finally:
+                self._waiting.remove(request)
+                # The next request in line may be a different one now
+                self._cond.notify_all()
+
+            self._in_use += 1
+            self._held[job] += 1
+            self.granted[priority] += 1
+            if self.requests_per_minute:
+                self._recent.append(time.monotonic())
+
+        waited = time.monotonic() - start
+        if waited > 1:
+            logger.info(f"{PRIORITY_NAMES.get(priority, priority).capitalize()} job {job} waited {waited:.1f}s "
+                        f"for a request slot")
+
+    def ensure_capacity(self, max_concurrent: int) -> None:
+        """Raise the number of concurrent request slots to at least max_concurrent, e.g. for a pool of more keys"""
+        with self._cond:
+            if max_concurrent > self.max_concurrent:
+                logger.info(f"Raising concurrent request slots from {self.max_concurrent} to {max_concurrent}")
+                self.max_concurrent = max_concurrent
+                self._cond.notify_all()
+
+    def release(self, job: str) -> None:
+        """Give a request slot back"""
+        with self._cond:
+            self._in_use -= 1
+            self._held[job] -= 1
+            if not self._held[job]:
+                del self._held[job]
+            self._cond.notify_all()
+
+    def _wait_time(self, request: Tuple[int, int, str], now: float) -> Optional[float]:
+        """0 if the request may go now, else seconds until the rate limit allows it (None: until notified)"""
+        first = min(self._waiting, key=lambda waiting: (waiting[0], self._held[waiting[2]], waiting[1]))
+        if first is not request or self._in_use >= self.max_concurrent:
+            return None
+        if self.requests_per_minute:
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            if len(self._recent) >= self.requests_per_minute:
+                return self._recent[0] + 60 - now
+        return 0
+
+    def stats(self) -> Dict:
+        """Get slots in use and queued requests per priority class"""
+        with self._cond:
+            queued = Counter(PRIORITY_NAMES.get(priority, priority) for priority, _, _ in self._waiting)
+            return {
+                "in_use": self._in_use,
+                "queued": dict(queued),
+                "granted": {PRIORITY_NAMES.get(p, p): count for p, count in self.granted.items()},
+                "jobs": dict(self._held)
+            }
+
+
+# One quota for every generator of the process
+SHARED_QUOTA = QuotaScheduler()
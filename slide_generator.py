@@ -16,25 +16,44 @@ from template_config import (
     DATE,
     FOOTER,
     SLIDE_NUMBER,
-    PICTURE
+    PICTURE,
+    LAYOUT_CONFIG,
+    get_text_fitting_config
 )
+from text_fitting import TextFitter, FitResult
+from pagination import SlidePaginator, CONTINUATION_SUFFIX, is_continuation
+from slide_renderers import RendererRegistry, body_paragraphs
+from deck_merge import SlideMerger, split_sections, build_sections_parallel
+from ooxml_writer import StreamingDeckWriter
+from plan_store import load_lesson_plan, iter_plan_slides
+from native_charts import ChartSpec, add_chart
+from progress_events import ProgressTracker, RENDERED
+from concurrent.futures import Executor
+from dataclasses import replace
+from io import BytesIO
 import os
 import logging
 from dotenv import load_dotenv
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 
 # Load environment variables
 load_dotenv()
 logger = logging.getLogger(__name__)
 
 class EnhancedSlideGenerator:
-    def __init__(self, template_path: str):
-        """Initialize the slide generator with a template"""
-        if not os.path.exists(template_path):
+    def __init__(self, template_path: str, progress: Optional[ProgressTracker] = None,
+                 template_data: Optional[bytes] = None):
+        """Initialize the slide generator with a template (progress receives a rendered event per slide)
+
+        template_data is the template file already read into memory, e.g. by a long-running server.
+        """
+        if template_data is None and not os.path.exists(template_path):
             raise FileNotFoundError(f"Template file not found: {template_path}")
         
-        self.presentation = Presentation(template_path)
+        self.presentation = Presentation(BytesIO(template_data) if template_data is not None else template_path)
         self.template_path = template_path
+        self.template_data = template_data
+        self.progress = progress
         
         # Set default dimensions
         self.slide_width = Inches(10)
@@ -46,8 +65,13 @@ class EnhancedSlideGenerator:
         self.content_width = self.slide_width - (2 * self.content_margin)
         self.content_height = self.slide_height - self.title_height - (2 * self.content_margin)
         
+        # Text fitting engine shared by all slides of this deck
+        self.text_fitter = TextFitter(**get_text_fitting_config())
+        
         # Initialize template analysis
         self._analyze_template()
+        self.renderers = RendererRegistry(self.presentation)
+        self.paginator = self._create_paginator()
         
         logger.info(f"Initialized slide generator with template: {template_path}")
 
@@ -56,8 +80,9 @@ class EnhancedSlideGenerator:
         self.layout_info = {}
         for idx, layout in enumerate(self.presentation.slide_layouts):
             placeholders = {}
+            by_type = {}
             for shape in layout.placeholders:
-                placeholders[shape.placeholder_format.idx] = {
+                info = {
                     'type': shape.placeholder_format.type,
                     'name': shape.name,
                     'width': shape.width,
@@ -65,12 +90,31 @@ class EnhancedSlideGenerator:
                     'left': shape.left,
                     'top': shape.top
                 }
+                placeholders[shape.placeholder_format.idx] = info
+                by_type.setdefault(info['type'], info)
             self.layout_info[idx] = {
                 'name': layout.name,
-                'placeholders': placeholders
+                'placeholders': placeholders,
+                'by_type': by_type
             }
             logger.info(f"Layout {idx}: {len(placeholders)} placeholders - {[p['name'] for p in placeholders.values()]}")
 
+    def _get_body_box(self, layout_name: str) -> Optional[Tuple[int, int]]:
+        """Get the body placeholder size of a configured layout"""
+        layout = self.layout_info.get(LAYOUT_CONFIG[layout_name]['index'])
+        if not layout:
+            return None
+        info = layout['by_type'].get(OBJECT) or layout['by_type'].get(BODY)
+        if not info or not info['width'] or not info['height']:
+            return None
+        return info['width'], info['height']
+
+    def _create_paginator(self) -> SlidePaginator:
+        """Create the paginator from the measured content and two-column layouts"""
+        body_box = self._get_body_box('content_detailed') or (self.content_width, self.content_height)
+        column_box = self._get_body_box('two_content')
+        return SlidePaginator(self.text_fitter, body_box, column_box)
+
     def _validate_content(self, content: SlideContent) -> bool:
         """Validate content structure and length"""
         try:
@@ -79,28 +123,10 @@ class EnhancedSlideGenerator:
                 logger.warning(f"Title too long ({len(content.title)} chars)")
                 return False
             
-            # Check main content
-            if content.main_content:
-                lines = content.main_content.split('\n')
-                if len(lines) > 12:  # Increased to accommodate data analytics content
-                    logger.warning(f"Main content too long ({len(lines)} lines)")
-                    return False
-                
-                for line in lines:
-                    if len(line) > 120:
-                        logger.warning(f"Line too long ({len(line)} chars)")
-                        return False
-            
-            # Check bullet points
-            if content.bullet_points:
-                if len(content.bullet_points) > 8:  # Increased for data analytics topics
-                    logger.warning(f"Too many bullet points ({len(content.bullet_points)})")
-                    return False
-                
-                for point in content.bullet_points:
-                    if len(point) > 100:
-                        logger.warning(f"Bullet point too long ({len(point)} chars)")
-                        return False
+            # Check that the body fits the content placeholder
+            if not self.paginator.fits(content):
+                logger.warning(f"Content of '{content.title}' does not fit on one slide")
+                return False
             
             return True
             
@@ -108,53 +134,21 @@ class EnhancedSlideGenerator:
             logger.error(f"Content validation failed: {str(e)}")
             return False
 
-    def _select_layout(self, content: SlideContent) -> int:
-        """Select the most appropriate layout based on content"""
+    def _get_placeholder_size(self, slide, shape) -> Tuple[int, int]:
+        """Get placeholder size from the template analysis, falling back to the shape"""
         try:
-            # Get content characteristics
-            has_bullets = bool(content.bullet_points)
-            has_image = hasattr(content, 'image_path') and content.image_path
-            content_length = len(content.main_content) if content.main_content else 0
-            
-            # Select layout based on content type and characteristics
-            if content.slide_type == SlideType.TITLE:
-                return 0  # Title slide
-            elif has_image:
-                return 8  # Picture with caption
-            elif has_bullets and content_length > 500:
-                return 3  # Two content layout
-            elif has_bullets:
-                return 1  # Title and content
-            elif content_length > 1000:
-                return 4  # Comparison layout
-            else:
-                return 1  # Default to title and content
-                
-        except Exception as e:
-            logger.error(f"Layout selection failed: {str(e)}")
-            return 1  # Default to title and content
+            layout_idx = self.presentation.slide_layouts.index(slide.slide_layout)
+            info = self.layout_info[layout_idx]['by_type'].get(shape.placeholder_format.type)
+            if info and info['width'] and info['height']:
+                return info['width'], info['height']
+        except (ValueError, KeyError, AttributeError):
+            pass
+        return shape.width or self.content_width, shape.height or self.content_height
 
-    def _format_text_content(self, text: str, max_line_length: int = 80) -> str:
-        """Format text content to fit within slide boundaries"""
-        try:
-            lines = []
-            current_line = ""
-            
-            for word in text.split():
-                if len(current_line) + len(word) + 1 <= max_line_length:
-                    current_line += word + " "
-                else:
-                    lines.append(current_line.strip())
-                    current_line = word + " "
-            
-            if current_line:
-                lines.append(current_line.strip())
-            
-            return "\n".join(lines)
-            
-        except Exception as e:
-            logger.error(f"Text formatting failed: {str(e)}")
-            return text
+    def fit_body(self, slide, body_shape, content: SlideContent) -> FitResult:
+        """Measure the body text of a slide once against its placeholder"""
+        width, height = self._get_placeholder_size(slide, body_shape)
+        return self.text_fitter.fit(body_paragraphs(content), width, height)
 
     def _get_placeholder_by_type(self, slide, placeholder_type: int) -> Optional[object]:
         """Get a placeholder by its type"""
@@ -180,14 +174,7 @@ class EnhancedSlideGenerator:
 
     def create_slide_with_layout(self, layout_name: str) -> object:
         """Create a slide using a specific layout"""
-        layout_info = get_layout_info(layout_name)
-        if not layout_info:
-            logger.warning(f"Layout '{layout_name}' not found, using default")
-            return self.presentation.slides.add_slide(self.presentation.slide_layouts[0])
-        
-        return self.presentation.slides.add_slide(
-            self.presentation.slide_layouts[layout_info['index']]
-        )
+        return self.presentation.slides.add_slide(self.renderers.layout(layout_name))
 
     def add_content_to_slide(self, slide: object, content: SlideContent):
         """Add content to a slide based on its type"""
@@ -212,25 +199,17 @@ class EnhancedSlideGenerator:
             
             # Add main content to body placeholder
             body_shape = placeholders.get(BODY) or placeholders.get(OBJECT)
-            if body_shape and content.main_content:
-                text_frame = body_shape.text_frame
-                text_frame.text = ""  # Clear default text
-                text_frame.word_wrap = True
-                
-                # Format and add main content
-                formatted_text = format_long_text(content.main_content, 80)  # Wrap at 80 chars
-                p = text_frame.add_paragraph()
-                p.text = formatted_text
-                self._apply_formatting(p, get_formatting('body_large'))
-                
-                # Add bullet points with proper formatting
-                if content.bullet_points:
-                    for point in content.bullet_points:
-                        p = text_frame.add_paragraph()
-                        formatted_point = format_long_text(point, 60)  # Wrap bullet points at 60 chars
-                        p.text = formatted_point
-                        p.level = 1  # Indent level
-                        self._apply_formatting(p, get_formatting('bullet_large'))
+            columns = sorted(
+                (shape for shape in slide.placeholders if shape.placeholder_format.type == OBJECT),
+                key=lambda shape: (shape.left, shape.top)
+            )
+            if len(columns) >= 2 and content.main_content and content.bullet_points:
+                # Two-column layout: main content left, bullet points right
+                self._fill_body(slide, columns[0], replace(content, bullet_points=None))
+                self._fill_body(slide, columns[1], replace(content, main_content=""))
+            elif body_shape and (content.main_content or content.bullet_points):
+                # Continuation pages may carry bullet points only
+                self._fill_body(slide, body_shape, content)
             
             # Only use fallback if no placeholders found
             if not (title_shape or body_shape):
@@ -241,6 +220,22 @@ class EnhancedSlideGenerator:
             logger.error(f"Error adding content to slide: {str(e)}")
             self._add_fallback_content(slide, content)
 
+    def _fill_body(self, slide, body_shape, content: SlideContent):
+        """Fill a body placeholder with fitted main content and bullet points"""
+        text_frame = body_shape.text_frame
+        text_frame.text = ""  # Clear default text
+        text_frame.word_wrap = True
+        
+        # Measure once, then apply the exact wraps and font sizes
+        fit = self.fit_body(slide, body_shape, content)
+        if not fit.fits:
+            logger.warning(f"Content of '{content.title}' overflows its placeholder at minimum font size")
+        
+        for i, ((_, formatting), paragraph_fit) in enumerate(zip(body_paragraphs(content), fit.paragraphs)):
+            p = text_frame.paragraphs[0] if i == 0 else text_frame.add_paragraph()
+            p.text = "\n".join(paragraph_fit.lines)
+            self._apply_formatting(p, dict(formatting, font_size=paragraph_fit.font_size))
+
     def _apply_formatting(self, paragraph, formatting: dict):
         """Apply formatting to a paragraph"""
         if not paragraph or not formatting:
@@ -410,81 +405,181 @@ class EnhancedSlideGenerator:
             logger.error(f"Error adding fallback content: {str(e)}")
             # At this point, we can't do much more than log the error
 
-    def generate_lesson_slides(self, lesson_plan: LessonPlan):
-        """Generate all slides for a lesson"""
+    def generate_lesson_slides(self, lesson_plan: LessonPlan, parallel: bool = False,
+                               max_workers: Optional[int] = None, executor: Optional[Executor] = None):
+        """Generate all slides for a lesson, optionally building sections in worker processes (of executor)"""
         try:
-            # Create title slide
-            title_slide = self.create_slide_with_layout('title')
-            title_content = SlideContent(
-                title="Data Analytics in Cybersecurity",
-                main_content="Understanding Data Analytics and Its Applications in Cybersecurity",
-                bullet_points=["Instructors: Ismail Molla, Ensar Bera"],
-                slide_type=SlideType.TITLE
-            )
-            self.add_content_to_slide(title_slide, title_content)
-            
-            # Create course information slide
-            info_slide = self.create_slide_with_layout('content')
-            info_content = SlideContent(
-                title="Course Information",
-                main_content="Course Duration and Structure",
-                bullet_points=[
-                    "Lecture Duration: 4-8 hours",
-                    "Lab Time: 1-2 hours",
-                    "Interactive Sessions and Hands-on Practice",
-                    "Real-world Case Studies and Examples"
-                ],
-                slide_type=SlideType.CONTENT
-            )
-            self.add_content_to_slide(info_slide, info_content)
-            
-            # Create section overview slide
-            overview_slide = self.create_slide_with_layout('content')
-            overview_content = SlideContent(
-                title="Course Overview",
-                main_content="Key Topics and Learning Objectives",
-                bullet_points=[
-                    "1. Data Collection - Understanding Sources and Methods",
-                    "2. Data Cleaning and Preprocessing - Ensuring Data Quality",
-                    "3. Data Analysis - Extracting Insights",
-                    "4. Data Visualization - Presenting Results",
-                    "5. Analytical Tools - Practical Implementation",
-                    "6. Applications in Cybersecurity - Real-world Usage"
-                ],
-                slide_type=SlideType.CONTENT
-            )
-            self.add_content_to_slide(overview_slide, overview_content)
+            self.add_intro_slides()
             
-            # Create content slides for each section
-            for i, slide_content in enumerate(lesson_plan.slides, 1):
-                logger.info(f"Creating slide {i} of {len(lesson_plan.slides)}...")
-                
-                # Select appropriate layout based on content type
-                layout_name = 'content'
-                if slide_content.slide_type == SlideType.TITLE:
-                    layout_name = 'section'
-                elif hasattr(slide_content, 'image_path') and slide_content.image_path:
-                    layout_name = 'picture'
-                elif i % 5 == 0:  # Add summary slides periodically
-                    layout_name = 'summary'
-                
-                slide = self.create_slide_with_layout(layout_name)
-                self.add_content_to_slide(slide, slide_content)
-                
-                # Add practical examples for key concepts
-                if i % 3 == 0:
-                    example_slide = self.create_slide_with_layout('two_content')
-                    example_content = self._create_example_content(slide_content.title)
-                    self.add_content_to_slide(example_slide, example_content)
+            # Split oversized slides before creating them
+            slides = self.paginator.paginate_slides(lesson_plan.slides)
+            if self.progress:
+                self.progress.expect_renders(len(slides))
+            
+            if parallel:
+                self._render_sections_parallel(slides, max_workers, executor)
+            else:
+                self.render_slides(slides)
                 
         except Exception as e:
             logger.error(f"Error generating lesson slides: {str(e)}")
             raise
 
+    def add_intro_slides(self):
+        """Create the title, course information and overview slides"""
+        for layout_name, intro_content in self._intro_slides():
+            slide = self.create_slide_with_layout(layout_name)
+            self.add_content_to_slide(slide, intro_content)
+
+    def _intro_slides(self) -> List[Tuple[str, SlideContent]]:
+        """Get the fixed opening slides of a course deck with their layout names"""
+        title_content = SlideContent(
+            title="Data Analytics in Cybersecurity",
+            main_content="Understanding Data Analytics and Its Applications in Cybersecurity",
+            bullet_points=["Instructors: Ismail Molla, Ensar Bera"],
+            slide_type=SlideType.TITLE
+        )
+        info_content = SlideContent(
+            title="Course Information",
+            main_content="Course Duration and Structure",
+            bullet_points=[
+                "Lecture Duration: 4-8 hours",
+                "Lab Time: 1-2 hours",
+                "Interactive Sessions and Hands-on Practice",
+                "Real-world Case Studies and Examples"
+            ],
+            slide_type=SlideType.CONTENT
+        )
+        overview_content = SlideContent(
+            title="Course Overview",
+            main_content="Key Topics and Learning Objectives",
+            bullet_points=[
+                "1. Data Collection - Understanding Sources and Methods",
+                "2. Data Cleaning and Preprocessing - Ensuring Data Quality",
+                "3. Data Analysis - Extracting Insights",
+                "4. Data Visualization - Presenting Results",
+                "5. Analytical Tools - Practical Implementation",
+                "6. Applications in Cybersecurity - Real-world Usage"
+            ],
+            slide_type=SlideType.CONTENT
+        )
+        return [('title', title_content), ('content', info_content), ('content', overview_content)]
+
+    @staticmethod
+    def _numbered_pages(pages, start_index: int = 1):
+        """Yield (slide number, page, whether it is the slide's last page); split slides keep one number"""
+        number = start_index - 1
+        pending = None
+        for page in pages:
+            if pending is not None:
+                yield pending[0], pending[1], not is_continuation(page)
+            if pending is None or not is_continuation(page):
+                number += 1
+            pending = (number, page)
+        if pending is not None:
+            yield pending[0], pending[1], True
+
+    def render_slides(self, slides: List[SlideContent], start_index: int = 1):
+        """Create content slides (paginated), numbering the original slides from start_index"""
+        for i, slide_content, last_page in self._numbered_pages(slides, start_index):
+            logger.info(f"Creating slide {i}: {slide_content.title}")
+            
+            # Select appropriate layout based on content type
+            layout_name = self.renderers.layout_name(slide_content)
+            slide = self.create_slide_with_layout(layout_name)
+            self.add_content_to_slide(slide, slide_content)
+            if self.progress:
+                self.progress.emit(RENDERED, f"slide {i}")
+            
+            # Add practical examples for key concepts, after the last page of every third slide
+            if last_page and i % 3 == 0:
+                example_slide = self.create_slide_with_layout('two_content')
+                example_content = self._create_example_content(slide_content.title)
+                self.add_content_to_slide(example_slide, example_content)
+
+    def _render_sections_parallel(self, slides: List[SlideContent], max_workers: Optional[int] = None,
+                                  executor: Optional[Executor] = None):
+        """Build each section in a worker process and merge the fragments"""
+        sections = split_sections(slides)
+        fragments = build_sections_parallel(self.template_path, sections, max_workers, executor, self.template_data)
+        
+        merger = SlideMerger(self.presentation)
+        for (start_index, section_slides), fragment in zip(sections, fragments):
+            merged = merger.merge(fragment)
+            logger.info(f"Merged section starting at slide {start_index} ({merged} slides)")
+            if self.progress:
+                for i in range(start_index, start_index + len(section_slides)):
+                    self.progress.emit(RENDERED, f"slide {i}")
+
+    def stream_lesson_slides(self, lesson_plan: LessonPlan, output_path: str):
+        """Stream all slides for a lesson straight into a .pptx file, one slide in memory at a time"""
+        self._stream_slides(lesson_plan.slides, output_path)
+
+    def generate_from_plan_file(self, plan_path: str, parallel: bool = False,
+                                max_workers: Optional[int] = None):
+        """Generate slides from a saved lesson plan without calling the model"""
+        lesson_plan = load_lesson_plan(plan_path)
+        logger.info(f"Loaded lesson plan '{lesson_plan.title}' from {plan_path}")
+        self.generate_lesson_slides(lesson_plan, parallel=parallel, max_workers=max_workers)
+
+    def stream_plan_file(self, plan_path: str, output_path: str):
+        """Stream a saved lesson plan into a .pptx file, reading slides as they are written"""
+        self._stream_slides(iter_plan_slides(plan_path), output_path)
+
+    def _stream_slides(self, slides, output_path: str):
+        """Stream intro slides and the given (possibly lazy) slides into a .pptx file"""
+        try:
+            with StreamingDeckWriter(self.template_path, output_path, self.template_data) as writer:
+                for layout_name, intro_content in self._intro_slides():
+                    self._stream_slide(writer, layout_name, intro_content)
+                
+                for i, slide_content, last_page in self._numbered_pages(self._paginate_lazily(slides)):
+                    self._stream_slide(writer, self.renderers.layout_name(slide_content), slide_content)
+                    if last_page and i % 3 == 0:
+                        self._stream_slide(writer, 'two_content', self._create_example_content(slide_content.title))
+            
+            logger.info(f"Presentation streamed successfully to {output_path}")
+        except Exception as e:
+            logger.error(f"Error streaming lesson slides: {str(e)}")
+            raise
+
+    def _paginate_lazily(self, slides):
+        """Paginate slides one at a time so lazy sources are never fully loaded"""
+        for slide_content in slides:
+            yield from self.paginator.paginate(slide_content)
+
+    def _stream_slide(self, writer: StreamingDeckWriter, layout_name: str, content: SlideContent):
+        """Lay out one slide and hand it to the streaming writer"""
+        layout_index = self.renderers.layout_index(layout_name)
+        layout = writer.layouts[layout_index] if layout_index < len(writer.layouts) else writer.layouts[0]
+        body_count = sum(1 for ph in layout['placeholders'] if ph['type'] in ('body', 'obj'))
+        
+        by_type = self.layout_info.get(layout_index, {}).get('by_type', {})
+        info = by_type.get(OBJECT) or by_type.get(BODY)
+        width, height = (info['width'], info['height']) if info else (self.content_width, self.content_height)
+        
+        if body_count >= 2 and content.main_content and content.bullet_points:
+            parts = [replace(content, bullet_points=None), replace(content, main_content="")]
+        elif content.main_content or content.bullet_points:
+            # Continuation pages may carry bullet points only
+            parts = [content]
+        else:
+            parts = []
+        
+        bodies = [self.text_fitter.fit(body_paragraphs(part), width, height) for part in parts]
+        formats = [[formatting for _, formatting in body_paragraphs(part)] for part in parts]
+        writer.add_slide(
+            layout_index,
+            title=(content.title, get_formatting('main_title')),
+            bodies=bodies,
+            body_formatting=formats,
+            image_path=getattr(content, 'image_path', None)
+        )
+
     def _create_example_content(self, topic: str) -> SlideContent:
         """Create practical example content for a topic"""
         return SlideContent(
-            title=f"Practical Example: {topic}",
+            title=f"Practical Example: {topic.removesuffix(CONTINUATION_SUFFIX)}",
             main_content="Real-world Application",
             bullet_points=[
                 "Problem Statement",
@@ -504,9 +599,12 @@ class EnhancedSlideGenerator:
             logger.error(f"Error saving presentation: {str(e)}")
             raise
 
-    def add_visualization(self, slide, image_path: str, position: Optional[Tuple[float, float]] = None):
-        """Add visualization (graph or icon) to slide"""
+    def add_visualization(self, slide, image_path: Union[str, ChartSpec], position: Optional[Tuple[float, float]] = None):
+        """Add visualization (graph, native chart or icon) to slide"""
         try:
+            if isinstance(image_path, ChartSpec):
+                return self.add_chart(slide, image_path, position)
+            
             if not os.path.exists(image_path):
                 logger.error(f"Visualization file not found: {image_path}")
                 return
@@ -534,7 +632,31 @@ class EnhancedSlideGenerator:
             logger.error(f"Error adding visualization to slide: {str(e)}")
             return None
 
-    def create_slide_with_visualization(self, title: str, content: str, visualization_path: Optional[str] = None):
+    def add_chart(self, slide, chart: ChartSpec, position: Optional[Tuple[float, float]] = None):
+        """Add a native, editable chart to slide, in the area a graph image would take"""
+        try:
+            if position is None:
+                left = self.content_margin + (self.content_width / 4)
+                top = self.title_height + self.content_margin
+            else:
+                left = Inches(position[0])
+                top = Inches(position[1])
+            
+            return add_chart(
+                slide.shapes,
+                chart,
+                int(left),
+                int(top),
+                int(self.content_width / 2),
+                int(self.content_height * 0.8)
+            )
+            
+        except Exception as e:
+            logger.error(f"Error adding chart to slide: {str(e)}")
+            return None
+
+    def create_slide_with_visualization(self, title: str, content: str,
+                                        visualization_path: Optional[Union[str, ChartSpec]] = None):
         """Create a slide with both text content and visualization"""
         try:
             # Create slide
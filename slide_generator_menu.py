@@ -1,11 +1,16 @@
 import os
 import logging
 import shutil
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from dotenv import load_dotenv
-from gemini_content_generator import GeminiContentGenerator
+from gemini_content_generator import GeminiContentGenerator, LessonPlan
+from quota_scheduler import INTERACTIVE, SHARED_QUOTA
+from client_pool import ClientPool, api_keys_from_env
 from slide_generator import EnhancedSlideGenerator
+from plan_store import PLAN_EXTENSION, plan_path_for, read_plan_header
+from progress_events import LogSubscriber, TqdmSubscriber
 import time
 from tqdm import tqdm
 import re
@@ -24,14 +29,28 @@ logger = logging.getLogger(__name__)
 class PresentationManager:
     def __init__(self):
         load_dotenv()
-        self.api_key = os.getenv("Gemini_API_KEY")
-        if not self.api_key:
+        # Several keys (comma-separated) spread the calls over their quotas
+        self.api_keys = api_keys_from_env()
+        if not self.api_keys:
             raise ValueError("Please set Gemini_API_KEY in your .env file")
         
-        self.content_generator = GeminiContentGenerator(self.api_key)
         self.template_path = self._find_template()
         self._create_output_directory()
         
+        # Slides whose topic and prompt are unchanged are reused from the manifest; a user is waiting,
+        # so calls go before any batch build sharing the quota
+        client_pool = ClientPool(self.api_keys)
+        SHARED_QUOTA.ensure_capacity(client_pool.capacity)
+        self.content_generator = GeminiContentGenerator(
+            client_pool,
+            manifest_path=os.path.join(self.output_dir, "build_manifest.json"),
+            priority=INTERACTIVE
+        )
+        self.content_generator.progress.subscribe(LogSubscriber())
+        
+        # Background refinement of the last draft presentation
+        self.refinement: Optional[threading.Thread] = None
+        
     def _find_template(self) -> str:
         """Find the template file and validate it exists"""
         template_paths = [
@@ -93,12 +112,15 @@ class PresentationManager:
             return backup_file
         return ""
 
-    def generate_presentation(self, module: str, lesson_title: str) -> Optional[str]:
-        """Generate a presentation for a specific lesson"""
+    def generate_presentation(self, module: str, lesson_title: str, parallel: bool = False) -> Optional[str]:
+        """Generate a presentation for a specific lesson (parallel=True builds sections in worker processes)"""
         try:
             print("\nGenerating presentation...")
             logger.info(f"Generating presentation for module: {module}, lesson: {lesson_title}")
             
+            # The content generator is shared with the refinement of a draft
+            self.wait_for_refinement()
+            
             # Generate output filename
             output_filename = self._generate_filename(module, lesson_title)
             output_path = os.path.join(self.output_dir, output_filename)
@@ -107,29 +129,39 @@ class PresentationManager:
             if os.path.exists(output_path):
                 self.create_backup(output_path)
             
-            # Show progress bar for content generation
-            with tqdm(total=4, desc="Progress") as pbar:
-                # Generate content
-                pbar.set_description("Generating lesson plan")
-                lesson_plan = self.content_generator.generate_lesson_plan(module, lesson_title)
-                logger.info(f"Generated lesson plan: {lesson_plan.title}")
-                pbar.update(1)
-                
-                # Initialize slide generator
-                pbar.set_description("Initializing slide generator")
-                slide_generator = EnhancedSlideGenerator(self.template_path)
-                pbar.update(1)
-                
-                # Generate slides
-                pbar.set_description("Generating slides")
-                slide_generator.generate_lesson_slides(lesson_plan)
-                pbar.update(1)
-                
-                # Save presentation
-                pbar.set_description("Saving presentation")
-                slide_generator.save_presentation(output_path)
-                logger.info(f"Presentation saved as {output_path}")
-                pbar.update(1)
+            # Pre-flight estimate of the model calls still needed
+            estimate = self.content_generator.estimate_deck()
+            print(f"Estimated: {estimate['calls']} model calls ({estimate['cached_slides']} slides cached), "
+                  f"~{estimate['input_tokens'] + estimate['output_tokens']} tokens, "
+                  f"~${estimate['cost']:.4f}, ~{estimate['seconds']:.0f}s")
+            logger.info(f"Pre-flight estimate: {estimate}")
+            
+            # Progress bar advanced per generated and rendered slide
+            progress = self.content_generator.progress
+            with tqdm(total=0, desc="Progress", unit="slide") as pbar:
+                unsubscribe = progress.subscribe(TqdmSubscriber(pbar))
+                try:
+                    # Generate content
+                    pbar.set_description("Generating lesson plan")
+                    lesson_plan = self.content_generator.generate_lesson_plan(
+                        module, lesson_title, plan_path=plan_path_for(output_path)
+                    )
+                    logger.info(f"Generated lesson plan: {lesson_plan.title}")
+                    
+                    # Generate slides
+                    pbar.set_description("Generating slides")
+                    slide_generator = EnhancedSlideGenerator(self.template_path, progress=progress)
+                    slide_generator.generate_lesson_slides(lesson_plan, parallel=parallel)
+                    
+                    # Save presentation
+                    pbar.set_description("Saving presentation")
+                    slide_generator.save_presentation(output_path)
+                    logger.info(f"Presentation saved as {output_path}")
+                finally:
+                    unsubscribe()
+            
+            # Token usage per slide, section and deck next to the deck
+            self.content_generator.model.usage.save_report(os.path.splitext(output_path)[0] + ".usage.json")
             
             return output_path
             
@@ -137,6 +169,95 @@ class PresentationManager:
             logger.error(f"Error generating presentation: {str(e)}", exc_info=True)
             return None
 
+    def generate_draft_presentation(self, module: str, lesson_title: str) -> Optional[str]:
+        """Save a structure-only deck at once, then refine it in the background as sections complete"""
+        try:
+            if self.refinement and self.refinement.is_alive():
+                raise RuntimeError("A draft presentation is still being refined")
+            
+            output_filename = self._generate_filename(module, lesson_title)
+            output_path = os.path.join(self.output_dir, output_filename)
+            if os.path.exists(output_path):
+                self.create_backup(output_path)
+            
+            start = time.time()
+            lesson_plan = self.content_generator.generate_lesson_plan(module, lesson_title, draft=True)
+            self._write_draft(lesson_plan, output_path)
+            logger.info(f"Draft presentation saved as {output_path} in {time.time() - start:.2f}s")
+            
+            self.refinement = threading.Thread(
+                target=self._refine_presentation,
+                args=(lesson_plan, output_path),
+                name="presentation-refinement"
+            )
+            self.refinement.start()
+            return output_path
+            
+        except Exception as e:
+            logger.error(f"Error generating draft presentation: {str(e)}", exc_info=True)
+            return None
+
+    def _write_draft(self, lesson_plan: LessonPlan, output_path: str) -> None:
+        """Stream the current slides of a lesson plan over the deck at output_path in one step"""
+        temp_path = f"{output_path}.tmp"
+        EnhancedSlideGenerator(self.template_path).stream_lesson_slides(lesson_plan, temp_path)
+        os.replace(temp_path, output_path)
+
+    def _refine_presentation(self, lesson_plan: LessonPlan, output_path: str) -> None:
+        """Generate the slides of a draft deck, rewriting the deck as each section completes"""
+        try:
+            def on_section(section: str) -> None:
+                self._write_draft(lesson_plan, output_path)
+                logger.info(f"Refined section '{section}' in {output_path}")
+            
+            self.content_generator.refine_lesson_plan(
+                lesson_plan, on_section=on_section, plan_path=plan_path_for(output_path)
+            )
+            
+            # Final version through the regular renderer, also picking up near-duplicate regenerations
+            slide_generator = EnhancedSlideGenerator(self.template_path)
+            slide_generator.generate_lesson_slides(lesson_plan, parallel=True)
+            temp_path = f"{output_path}.tmp"
+            slide_generator.save_presentation(temp_path)
+            os.replace(temp_path, output_path)
+            
+            self.content_generator.model.usage.save_report(os.path.splitext(output_path)[0] + ".usage.json")
+            logger.info(f"Refined presentation saved as {output_path}")
+            
+        except Exception as e:
+            logger.error(f"Error refining draft presentation: {str(e)}", exc_info=True)
+
+    def wait_for_refinement(self) -> None:
+        """Wait until the background refinement of a draft presentation is done"""
+        if self.refinement:
+            self.refinement.join()
+
+    def render_saved_plan(self, plan_path: str, parallel: bool = False) -> Optional[str]:
+        """Re-render a deck from a saved lesson plan without any API calls"""
+        try:
+            header = read_plan_header(plan_path)
+            output_filename = self._generate_filename(header["title"], "rerender")
+            output_path = os.path.join(self.output_dir, output_filename)
+            
+            slide_generator = EnhancedSlideGenerator(self.template_path)
+            slide_generator.generate_from_plan_file(plan_path, parallel=parallel)
+            slide_generator.save_presentation(output_path)
+            logger.info(f"Re-rendered {plan_path} as {output_path}")
+            return output_path
+            
+        except Exception as e:
+            logger.error(f"Error re-rendering saved plan: {str(e)}", exc_info=True)
+            return None
+
+    def list_saved_plans(self) -> List[str]:
+        """List saved lesson plans in the output directory, newest first"""
+        plans = [
+            os.path.join(self.output_dir, name)
+            for name in os.listdir(self.output_dir)
+            if name.endswith(PLAN_EXTENSION)
+        ]
+        return sorted(plans, key=os.path.getmtime, reverse=True)
+
 def clear_screen():
     """Clear the console screen"""
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -148,9 +269,11 @@ def display_menu() -> None:
     print("\nComprehensive Cybersecurity Data Analytics Course")
     print("\nOptions:")
     print("1. Generate Complete Presentation (60 slides)")
-    print("2. View Presentation Structure")
-    print("3. Help")
-    print("4. Exit")
+    print("2. Generate Draft Presentation (instant, refined in the background)")
+    print("3. Re-render From Saved Plan (no API calls)")
+    print("4. View Presentation Structure")
+    print("5. Help")
+    print("6. Exit")
     print("\nType 'help' for more information or 'exit' to quit")
 
 def display_structure():
@@ -198,6 +321,8 @@ def display_help():
     print("- Assessment questions")
     print("\nNotes:")
     print("- Backups are automatically created")
+    print("- Each lesson plan is saved next to its deck and can be re-rendered without API calls")
+    print("- Draft presentations open at once and are updated in place as sections are generated")
     print("- Check 'slide_generator.log' for detailed information")
     print("- Requires 'template.pptx' in the current directory")
     input("\nPress Enter to return to the main menu...")
@@ -208,26 +333,57 @@ def main():
         
         while True:
             display_menu()
-            choice = input("\nEnter your choice (1-4): ").lower()
+            choice = input("\nEnter your choice (1-6): ").lower()
             
-            if choice == '3' or choice == 'help':
+            if choice == '5' or choice == 'help':
                 display_help()
                 continue
                 
-            if choice in ['4', 'exit', 'quit']:
+            if choice in ['6', 'exit', 'quit']:
+                if presentation_manager.refinement and presentation_manager.refinement.is_alive():
+                    print("\nFinishing the refinement of the draft presentation...")
+                    presentation_manager.wait_for_refinement()
                 logger.info("Exiting program")
                 print("\nThank you for using CyberAgent Slide Generator!")
                 break
             
-            if choice == '2':
+            if choice == '4':
                 display_structure()
                 continue
             
+            if choice == '2':
+                output_path = presentation_manager.generate_draft_presentation(
+                    "comprehensive",
+                    "Comprehensive Data Analytics in Cybersecurity"
+                )
+                if output_path:
+                    print(f"\nDraft saved as: {output_path}")
+                    print("Slides are being generated in the background; the file is updated as each section completes.")
+                else:
+                    print("\nError generating draft presentation. Check the logs for details.")
+                input("\nPress Enter to continue...")
+                continue
+            
+            if choice == '3':
+                plans = presentation_manager.list_saved_plans()
+                if not plans:
+                    print("\nNo saved lesson plans found. Generate a presentation first.")
+                else:
+                    print(f"\nRe-rendering latest saved plan: {plans[0]}")
+                    output_path = presentation_manager.render_saved_plan(plans[0], parallel=True)
+                    if output_path:
+                        print(f"File saved as: {output_path}")
+                    else:
+                        print("\nError re-rendering presentation. Check the logs for details.")
+                input("\nPress Enter to continue...")
+                continue
+            
             if choice == '1':
                 print("\nGenerating comprehensive presentation...")
                 output_path = presentation_manager.generate_presentation(
                     "comprehensive",
-                    "Comprehensive Data Analytics in Cybersecurity"
+                    "Comprehensive Data Analytics in Cybersecurity",
+                    parallel=True
                 )
                 
                 if output_path:
@@ -239,7 +395,7 @@ def main():
                 
                 input("\nPress Enter to continue...")
             else:
-                print("Please enter a valid choice (1-4)")
+                print("Please enter a valid choice (1-6)")
                 time.sleep(2)
                 
     except Exception as e:
@@ -0,0 +1,88 @@
+"""Renderer registry keyed by SlideType."""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from gemini_content_generator import SlideContent, SlideType
+from template_config import get_formatting, get_layout_info
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SlideRenderer:
+    slide_type: SlideType
+    layout_name: str
+    marker: str = ""  # Prefix for bullet points
+    heading: Optional[str] = None  # Used as main content when a slide has none
+
+    def paragraphs(self, content: SlideContent) -> List[Tuple[str, dict]]:
+        """Get body paragraphs of a slide with their formatting"""
+        paragraphs = []
+        main_content = content.main_content or (self.heading if content.bullet_points else None)
+        if main_content:
+            paragraphs.append((main_content, get_formatting('body_large')))
+        levels = content.bullet_levels or []
+        for i, point in enumerate(content.bullet_points or []):
+            formatting = get_formatting('bullet_large')
+            if i < len(levels) and levels[i]:
+                # Nested lines are indented below the bullet level of the template
+                formatting = dict(formatting, indent_level=formatting.get('indent_level', 0) + levels[i])
+            paragraphs.append((f"{self.marker}{point}", formatting))
+        return paragraphs
+
+
+# One renderer per slide type; QUIZ and LAB bodies are prepared by assessments
+RENDERERS: Dict[SlideType, SlideRenderer] = {
+    SlideType.TITLE: SlideRenderer(SlideType.TITLE, 'section'),
+    SlideType.CONTENT: SlideRenderer(SlideType.CONTENT, 'content'),
+    SlideType.INTERACTIVE: SlideRenderer(SlideType.INTERACTIVE, 'content', marker="👉 ",
+                                         heading="Discussion Points:"),
+    SlideType.LAB: SlideRenderer(SlideType.LAB, 'content', heading="Lab Exercise"),
+    SlideType.QUIZ: SlideRenderer(SlideType.QUIZ, 'content', heading="Knowledge Check"),
+    SlideType.SUMMARY: SlideRenderer(SlideType.SUMMARY, 'summary', marker="✓ ", heading="Key Takeaways:")
+}
+
+
+def get_renderer(slide_type: SlideType) -> SlideRenderer:
+    """Get the renderer of a slide type"""
+    return RENDERERS.get(slide_type, RENDERERS[SlideType.CONTENT])
+
+
+def body_paragraphs(content: SlideContent) -> List[Tuple[str, dict]]:
+    """Get body paragraphs of a slide with their formatting"""
+    return get_renderer(content.slide_type).paragraphs(content)
+
+
+class RendererRegistry:
+    """Renderers with their layouts resolved once against a presentation's template"""
+
+    def __init__(self, presentation):
+        self.layouts = presentation.slide_layouts
+        self._layout_indices: Dict[str, int] = {}
+        for renderer in RENDERERS.values():
+            self.layout_index(renderer.layout_name)
+
+    def layout_index(self, layout_name: str) -> int:
+        """Get the template layout index of a layout name"""
+        index = self._layout_indices.get(layout_name)
+        if index is None:
+            index = get_layout_info(layout_name)['index']
+            if index >= len(self.layouts):
+                logger.warning(f"Layout '{layout_name}' ({index}) not in template, using first layout")
+                index = 0
+            self._layout_indices[layout_name] = index
+        return index
+
+    def layout(self, layout_name: str):
+        """Get the template layout of a layout name"""
+        return self.layouts[self.layout_index(layout_name)]
+
+    def layout_name(self, content: SlideContent) -> str:
+        """Select the layout name of a slide"""
+        if content.layout_hint:
+            return content.layout_hint
+        if getattr(content, 'image_path', None):
+            return 'picture'
+        return get_renderer(content.slide_type).layout_name
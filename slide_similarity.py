@@ -0,0 +1,68 @@
+"""Local near-duplicate detection for generated slides using MinHash signatures."""
+
+from typing import Hashable, List, Optional, Tuple
+import re
+import zlib
+
+import numpy as np
+
+from gemini_content_generator import SlideContent
+
+# Mersenne prime 2^31 - 1; a * hash + b stays below 2^63 for 32-bit hashes
+_PRIME = np.uint64((1 << 31) - 1)
+
+
+def slide_text(slide: SlideContent) -> str:
+    """Get the text a slide shows"""
+    return "\n".join([slide.title or "", slide.main_content or ""] + list(slide.bullet_points or []))
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    """Get the overlapping word n-grams of a text"""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if len(words) <= size:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+class SimilarityIndex:
+    """Finds earlier texts whose estimated word-shingle Jaccard similarity reaches a threshold"""
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, int(_PRIME), num_perm, dtype=np.uint64)[:, None]
+        self._keys: List[Hashable] = []
+        self._signatures = np.empty((0, num_perm), dtype=np.uint64)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """Get the MinHash signature of a text, None if it has no words"""
+        grams = shingles(text, self.shingle_size)
+        if not grams:
+            return None
+        hashes = np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams),
+                             dtype=np.uint64, count=len(grams))
+        return ((self._a * hashes[None, :] + self._b) % _PRIME).min(axis=1)
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Index a text under a key"""
+        signature = self.signature(text)
+        if signature is not None:
+            self._keys.append(key)
+            self._signatures = np.vstack([self._signatures, signature])
+
+    def query(self, text: str) -> Optional[Tuple[Hashable, float]]:
+        """Get the key and similarity of the most similar indexed text at or above the threshold"""
+        signature = self.signature(text)
+        if signature is None or not self._keys:
+            return None
+        scores = (self._signatures == signature).mean(axis=1)
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            return None
+        return self._keys[best], float(scores[best])
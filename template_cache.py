@@ -0,0 +1,26 @@
+"""In-memory copies of template files, shared by long-running builders (deck server, build farm)."""
+
+from typing import Dict, Tuple
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class TemplateCache:
+    """Template files kept in memory, reloaded when they change on disk"""
+
+    def __init__(self):
+        self._templates: Dict[str, Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> bytes:
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._templates.get(path)
+            if cached is None or cached[0] != mtime:
+                with open(path, 'rb') as f:
+                    cached = self._templates[path] = (mtime, f.read())
+                logger.info(f"Loaded template {path}")
+            return cached[1]
@@ -159,6 +159,14 @@ LAYOUT_CONFIG = {
             'subtitle': {'type': SUBTITLE, 'idx': 1},
             'content': {'type': BODY, 'idx': 2}
         }
+    },
+    'two_content': {
+        'index': 3,
+        'placeholders': {
+            'title': {'type': TITLE, 'idx': 0},
+            'left_content': {'type': OBJECT, 'idx': 1},
+            'right_content': {'type': OBJECT, 'idx': 2}
+        }
     }
 }
 
@@ -201,6 +209,13 @@ FORMATTING_CONFIG = {
     }
 }
 
+# Text fitting settings used by text_fitting.TextFitter
+TEXT_FITTING_CONFIG = {
+    'min_font_size': 18,
+    'shrink_step': 0.05,
+    'line_height_factor': 1.2
+}
+
 def get_layout_info(slide_type: str) -> dict:
     """Get layout configuration for a specific slide type."""
     return LAYOUT_CONFIG.get(slide_type, LAYOUT_CONFIG['content_detailed'])
@@ -216,24 +231,6 @@ def get_formatting(element_type: str) -> dict:
     """Get formatting settings for a specific element type."""
     return FORMATTING_CONFIG.get(element_type, FORMATTING_CONFIG['body_large'])
 
-def format_long_text(text: str, max_width: int = 100) -> str:
-    """Format long text with proper wrapping and indentation"""
-    words = text.split()
-    lines = []
-    current_line = []
-    current_width = 0
-    
-    for word in words:
-        word_length = len(word)
-        if current_width + word_length + 1 <= max_width:
-            current_line.append(word)
-            current_width += word_length + 1
-        else:
-            lines.append(' '.join(current_line))
-            current_line = [word]
-            current_width = word_length
-            
-    if current_line:
-        lines.append(' '.join(current_line))
-        
-    return '\n'.join(lines)
+def get_text_fitting_config() -> dict:
+    """Get settings for the font-metric-aware text fitter."""
+    return dict(TEXT_FITTING_CONFIG)
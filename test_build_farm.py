@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+
+import build_farm
+from build_farm import LockFileQueue
+from job_queue import DONE, RUNNING
+
+
+def expire(queue, job_id):
+    old = time.time() - queue.lease - 60
+    os.utime(queue._path("claims", job_id), (old, old))
+
+
+def test_every_item_is_claimed_exactly_once(tmp_path):
+    queue = LockFileQueue(str(tmp_path))
+    submitted = [queue.submit("comprehensive", "Lesson", section=f"Section {i}").id for i in range(20)]
+    claimed = []
+    lock = threading.Lock()
+
+    def work(name):
+        while True:
+            job = queue.claim(name)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job.id)
+
+    threads = [threading.Thread(target=work, args=(f"worker-{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10.0)
+
+    assert sorted(claimed) == sorted(submitted)
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    queue = LockFileQueue(str(tmp_path), lease=60)
+    job = queue.submit("comprehensive", "Lesson")
+    assert queue.claim("first").id == job.id
+    assert queue.claim("second") is None
+
+    expire(queue, job.id)
+    taken = queue.claim("second")
+    assert taken.id == job.id
+    assert (taken.status, taken.worker) == (RUNNING, "second")
+
+
+def test_finished_items_are_not_taken_over(tmp_path):
+    queue = LockFileQueue(str(tmp_path), lease=60)
+    job = queue.submit("comprehensive", "Lesson")
+    queue.claim("first")
+    queue.finish(job.id, "fragment.pptx")
+
+    expire(queue, job.id)
+    assert queue.claim("second") is None
+    assert queue.get(job.id).status == DONE
+
+
+def test_lock_renewed_during_takeover_is_put_back(tmp_path, monkeypatch):
+    queue = LockFileQueue(str(tmp_path), lease=60)
+    job = queue.submit("comprehensive", "Lesson")
+    queue.claim("first")
+
+    # The first check sees an expired lease; by the time of the rename a fresh lock is in place
+    getmtime = os.path.getmtime
+    checks = []
+
+    def stale_once(path):
+        checks.append(path)
+        return 0.0 if len(checks) == 1 else getmtime(path)
+
+    monkeypatch.setattr(build_farm.os.path, "getmtime", stale_once)
+    assert not queue._take_over(job.id, "second")
+    assert len(checks) == 2
+    assert queue.get(job.id).worker == "first"
+    assert os.listdir(tmp_path / "claims") == [f"{job.id}.lock"]
+
+
+def test_put_back_does_not_overwrite_a_lock_claimed_meanwhile(tmp_path, monkeypatch):
+    queue = LockFileQueue(str(tmp_path), lease=60)
+    job = queue.submit("comprehensive", "Lesson")
+    queue.claim("first")
+
+    # "second" sees an expired lease, "first" renews before the rename and "third" claims right after it
+    getmtime = os.path.getmtime
+    checks = []
+
+    def stale_once(path):
+        checks.append(path)
+        return 0.0 if len(checks) == 1 else getmtime(path)
+
+    rename = os.rename
+
+    def rename_then_claim(source, target):
+        rename(source, target)
+        assert queue.claim("third").id == job.id
+
+    monkeypatch.setattr(build_farm.os.path, "getmtime", stale_once)
+    monkeypatch.setattr(build_farm.os, "rename", rename_then_claim)
+    assert not queue._take_over(job.id, "second")
+    assert queue.get(job.id).worker == "third"
+    assert os.listdir(tmp_path / "claims") == [f"{job.id}.lock"]
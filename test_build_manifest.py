@@ -0,0 +1,61 @@
+import logging
+
+import matplotlib.pyplot as plt
+import pytest
+
+from build_manifest import BuildManifest
+from gemini_content_generator import GeminiContentGenerator, SlideContent, SlideType
+from progress_events import CACHED, QUEUED
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class Model:
+    """Stub model answering every prompt"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, contents, **kwargs):
+        self.calls += 1
+        return Response(f"Generated content {self.calls}: {contents.strip()}")
+
+
+def generator(manifest_path):
+    content_generator = GeminiContentGenerator("test-key", manifest_path=str(manifest_path), quota=None)
+    content_generator.model.model = Model()
+    # Quiz and lab slides need JSON answers; the course repeats some titles, which would be regenerated
+    content_generator.content_settings.update(include_assessments=False, max_regeneration_rounds=0)
+    return content_generator
+
+
+def test_repeated_lookups_count_once_per_build(tmp_path):
+    manifest = BuildManifest(str(tmp_path / "manifest.json"))
+    slide = SlideContent(title="Topic", main_content="Text", slide_type=SlideType.CONTENT)
+    manifest.put("content", "Topic", "template", slide)
+
+    for _ in range(2):
+        assert manifest.get("content", "Topic", "template") == slide
+        assert manifest.get("content", "Other", "template") is None
+    assert (manifest.hits, manifest.misses) == (1, 1)
+
+
+# VisualizationTools uses the 'seaborn' style of the matplotlib version in requirements.txt
+@pytest.mark.skipif("seaborn" not in plt.style.available, reason="matplotlib without the 'seaborn' style")
+def test_fully_cached_rebuild_counts_every_slide_once(tmp_path, caplog):
+    manifest_path = tmp_path / "manifest.json"
+    generator(manifest_path).generate_lesson_plan("comprehensive", "Lesson")
+
+    rebuild = generator(manifest_path)
+    plan = rebuild.generate_lesson_plan("comprehensive", "Lesson", draft=True)
+    with caplog.at_level(logging.INFO, logger="build_manifest"):
+        rebuild.refine_lesson_plan(plan)
+
+    slides = len(plan.slides)
+    assert rebuild.model.model.calls == 0
+    assert rebuild.progress.counts[CACHED] == slides
+    assert rebuild.progress.counts[QUEUED] == 0
+    assert f"Build manifest saved: {slides} slides reused, 0 regenerated" in caplog.text
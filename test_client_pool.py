@@ -0,0 +1,35 @@
+import google.generativeai as genai
+import pytest
+
+import client_pool
+from client_pool import ClientPool, KeySlot
+
+
+def test_models_use_the_client_of_their_key():
+    slot = KeySlot("test-key-0001", max_concurrent=2, requests_per_minute=None)
+    model = slot.model("gemini-pro", "instructions")
+
+    # Pins the private GenerativeModel._client hook of the SDK version in requirements.txt
+    assert model._client is slot.client
+    assert model._system_instruction is not None
+    assert slot.model("gemini-pro", "instructions") is model
+
+
+def test_keys_get_separate_clients():
+    pool = ClientPool("test-key-0001,test-key-0002")
+    first, second = (slot.model("gemini-pro", None) for slot in pool.slots)
+    assert first._client is not second._client
+    assert pool.capacity == 8
+
+
+def test_sdk_without_a_client_hook_is_reported(monkeypatch):
+    class Model:
+        __slots__ = ()
+
+        def __init__(self, model_name, system_instruction=None):
+            pass
+
+    monkeypatch.setattr(client_pool.genai, "GenerativeModel", Model)
+    slot = KeySlot("test-key-0001", max_concurrent=2, requests_per_minute=None)
+    with pytest.raises(RuntimeError, match=genai.__version__):
+        slot.model("gemini-pro", None)
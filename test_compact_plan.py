@@ -0,0 +1,25 @@
+from compact_plan import CompactLessonPlan, decode_slides, encode_slides
+from gemini_content_generator import LessonPlan, SlideContent, SlideType
+
+
+def quiz():
+    return SlideContent(
+        title="Knowledge Check: Basics",
+        main_content="Answer the following questions:",
+        slide_type=SlideType.QUIZ,
+        bullet_points=["Q1: What?", "□ a", "□ b"],
+        interactive_elements={"questions": [{"question": "What?", "options": ["a", "b"]}]},
+        bullet_levels=[0, 1, 1]
+    )
+
+
+def test_slides_round_trip_with_bullet_levels():
+    slides = [quiz(), SlideContent(title="Topic", main_content="Text", slide_type=SlideType.CONTENT)]
+    assert decode_slides(encode_slides(slides)) == slides
+
+
+def test_lesson_plan_round_trip():
+    plan = LessonPlan(title="Lesson", description="About", learning_objectives=["One"], slides=[quiz()],
+                      assessment={"questions": 1})
+    compact = CompactLessonPlan.from_lesson_plan(plan)
+    assert CompactLessonPlan.from_bytes(compact.to_bytes()).to_lesson_plan() == plan
@@ -0,0 +1,156 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import asyncio
+import json
+import socket
+import threading
+
+from pptx import Presentation
+
+from deck_merge import build_sections_parallel, split_sections
+from deck_server import DeckServer
+from gemini_content_generator import SlideContent, SlideType
+from job_queue import JobQueue
+
+TEMPLATE_PATH = "Template-for-training-material.pptx"
+
+
+class Worker:
+    """Stands in for a DeckWorker: writes a fixed deck, or fails for one lesson title"""
+
+    def __init__(self, name, output_dir):
+        self.name = name
+        self.output_dir = output_dir
+        self.job = None
+        self.release = threading.Event()
+
+    def build(self, job):
+        self.job = job
+        try:
+            self.release.wait(5.0)
+            if job.lesson_title == "Broken":
+                raise RuntimeError("model unavailable")
+            output_path = str(self.output_dir / f"{job.id}.pptx")
+            with open(output_path, 'wb') as f:
+                f.write(b"deck " + job.id.encode())
+            return output_path
+        finally:
+            self.job = None
+
+    def progress(self):
+        return {"completed": 0} if self.job else None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(payload)}\r\n\r\n".encode()
+                 + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, data = response.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    return status, json.loads(data) if b"application/json" in head else data
+
+
+async def wait_for_status(port, job_id, status):
+    for _ in range(200):
+        _, job = await request(port, "GET", f"/jobs/{job_id}")
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"job {job_id} never reached {status}")
+
+
+def run_server(tmp_path, scenario):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    worker = Worker("worker-1", tmp_path)
+    server = DeckServer(queue, [worker], poll_interval=0.05)
+    port = free_port()
+
+    async def main():
+        serving = asyncio.create_task(server.serve("127.0.0.1", port))
+        for _ in range(100):
+            try:
+                await request(port, "GET", "/health")
+                break
+            except OSError:
+                await asyncio.sleep(0.02)
+        try:
+            await scenario(port, worker)
+        finally:
+            worker.release.set()
+            serving.cancel()
+            await asyncio.gather(serving, return_exceptions=True)
+
+    asyncio.run(main())
+    return queue
+
+
+def test_submitted_job_is_built_and_downloaded(tmp_path):
+    async def scenario(port, worker):
+        status, job = await request(port, "POST", "/jobs", {"module": "comprehensive", "lesson_title": "Lesson"})
+        assert (status, job["status"]) == (202, "queued")
+
+        running = await wait_for_status(port, job["id"], "running")
+        assert running["progress"] == {"completed": 0}
+        status, _ = await request(port, "GET", f"/jobs/{job['id']}/deck")
+        assert status == 409
+
+        worker.release.set()
+        done = await wait_for_status(port, job["id"], "done")
+        assert done["deck_url"] == f"/jobs/{job['id']}/deck"
+        assert "output_path" not in done
+        status, deck = await request(port, "GET", done["deck_url"])
+        assert (status, deck) == (200, b"deck " + job["id"].encode())
+
+        status, health = await request(port, "GET", "/health")
+        assert (status, health["jobs"], health["busy"]) == (200, {"done": 1}, [])
+
+    run_server(tmp_path, scenario)
+
+
+def test_failed_build_and_bad_requests_are_reported(tmp_path):
+    async def scenario(port, worker):
+        worker.release.set()
+        _, job = await request(port, "POST", "/jobs", {"module": "comprehensive", "lesson_title": "Broken"})
+        failed = await wait_for_status(port, job["id"], "failed")
+        assert failed["error"] == "model unavailable"
+
+        status, error = await request(port, "POST", "/jobs", {"module": "comprehensive"})
+        assert (status, error) == (400, {"error": "module and lesson_title are required"})
+        status, _ = await request(port, "GET", "/jobs/unknown")
+        assert status == 404
+
+    run_server(tmp_path, scenario)
+
+
+def test_shutdown_waits_for_running_builds(tmp_path):
+    async def scenario(port, worker):
+        _, job = await request(port, "POST", "/jobs", {"module": "comprehensive", "lesson_title": "Lesson"})
+        await wait_for_status(port, job["id"], "running")
+
+    # The build is released only as the server is cancelled; it still gets recorded
+    queue = run_server(tmp_path, scenario)
+    assert queue.counts() == {"done": 1}
+
+
+def test_sections_are_built_from_the_cached_template(tmp_path):
+    with open(TEMPLATE_PATH, 'rb') as f:
+        template_data = f.read()
+    slides = [SlideContent(title=f"Topic {i}", main_content="Text", slide_type=SlideType.CONTENT) for i in range(2)]
+
+    # The path no longer exists, as after a template was replaced under a running server
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        fragments = build_sections_parallel(str(tmp_path / "missing.pptx"), split_sections(slides),
+                                            executor=executor, template_data=template_data)
+
+    titles = [slide.shapes.title.text for fragment in fragments for slide in Presentation(BytesIO(fragment)).slides]
+    assert titles == ["Topic 0", "Topic 1"]
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+from event_aggregation import Aggregation, CategoryCounts, OTHER_LABEL, TimeBuckets, aggregate, top_n
+
+
+def test_top_n_sums_the_rest_as_other():
+    counts = pd.Series({"a": 10, "b": 5, "c": 3, "d": 2})
+    assert top_n(counts, 2).to_dict() == {"a": 10, "b": 5, OTHER_LABEL: 5}
+    assert top_n(counts, 4).to_dict() == counts.to_dict()
+
+
+def test_top_n_adds_the_rest_to_a_real_other_category():
+    counts = pd.Series({"a": 10, OTHER_LABEL: 5, "b": 3, "c": 2})
+    top = top_n(counts, 2)
+    assert top.to_dict() == {"a": 10, OTHER_LABEL: 10}
+    assert top.sum() == counts.sum()
+
+
+def test_top_n_keeps_other_below_the_cut_in_the_rest():
+    counts = pd.Series({"a": 10, "b": 5, OTHER_LABEL: 3, "c": 2})
+    assert top_n(counts, 2).to_dict() == {"a": 10, "b": 5, OTHER_LABEL: 5}
+
+
+def test_aggregation_requires_update():
+    with pytest.raises(TypeError):
+        Aggregation("event_type")
+
+
+def test_chunks_combine_into_the_same_counts(tmp_path):
+    path = tmp_path / "events.csv"
+    events = pd.DataFrame({
+        "event_type": ["login", "scan", "login", "malware", "login", "scan"],
+        "timestamp": pd.date_range("2024-01-01", periods=6, freq="30min").strftime("%Y-%m-%d %H:%M:%S")
+    })
+    events.to_csv(path, index=False)
+
+    categories, hours = aggregate(str(path), [CategoryCounts("event_type"), TimeBuckets("timestamp")],
+                                  chunk_size=4)
+    assert categories.chart_data(top=2) == {"labels": ["login", "scan", OTHER_LABEL], "values": [3, 2, 1]}
+    assert hours.chart_data()["values"] == [2, 2, 2]
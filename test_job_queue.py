@@ -0,0 +1,84 @@
+import sqlite3
+import time
+
+from job_queue import DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+def expire(queue, job_id):
+    old = time.time() - queue.lease - 60
+    with queue._connect() as conn:
+        conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (old, job_id))
+
+
+def test_jobs_are_claimed_oldest_first_and_once(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    first = queue.submit("comprehensive", "First", parallel=True)
+    second = queue.submit("comprehensive", "Second")
+
+    claimed = queue.claim("worker-1")
+    assert (claimed.id, claimed.status, claimed.worker) == (first.id, RUNNING, "worker-1")
+    assert claimed.options == {"parallel": True}
+    assert queue.claim("worker-2").id == second.id
+    assert queue.claim("worker-3") is None
+
+
+def test_finish_and_fail_record_the_outcome(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    done = queue.submit("comprehensive", "Done")
+    failed = queue.submit("comprehensive", "Failed")
+    queue.claim("worker-1")
+    queue.claim("worker-2")
+
+    queue.finish(done.id, "deck.pptx")
+    queue.fail(failed.id, "model unavailable")
+
+    assert (queue.get(done.id).status, queue.get(done.id).output_path) == (DONE, "deck.pptx")
+    assert (queue.get(failed.id).status, queue.get(failed.id).error) == (FAILED, "model unavailable")
+    assert queue.counts() == {DONE: 1, FAILED: 1}
+    assert queue.claim("worker-3") is None
+
+
+def test_running_job_is_only_taken_over_after_its_lease(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), lease=60)
+    job = queue.submit("comprehensive", "Lesson")
+    queue.claim("server-a/worker-1")
+
+    # Another server on the same database leaves a live job alone
+    other = JobQueue(queue.path, lease=60)
+    assert other.claim("server-b/worker-1") is None
+
+    expire(queue, job.id)
+    taken = other.claim("server-b/worker-1")
+    assert (taken.id, taken.worker) == (job.id, "server-b/worker-1")
+    assert queue.get(job.id).worker == "server-b/worker-1"
+
+
+def test_renewed_job_is_not_taken_over(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), lease=60)
+    job = queue.submit("comprehensive", "Lesson")
+    queue.claim("worker-1")
+
+    expire(queue, job.id)
+    queue.renew(job.id)
+    assert queue.claim("worker-2") is None
+
+
+def test_database_without_heartbeats_is_upgraded(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, module TEXT NOT NULL, lesson_title TEXT NOT NULL, "
+        "options TEXT NOT NULL, status TEXT NOT NULL, worker TEXT, output_path TEXT, error TEXT, "
+        "created REAL NOT NULL, started REAL, finished REAL)"
+    )
+    conn.execute(
+        "INSERT INTO jobs (id, module, lesson_title, options, status, worker, created, started) "
+        "VALUES ('old', 'comprehensive', 'Lesson', '{}', ?, 'worker-1', 1.0, 1.0)", (RUNNING,)
+    )
+    conn.commit()
+    conn.close()
+
+    queue = JobQueue(path, lease=60)
+    # Left running by an old server long ago, so its lease has run out
+    assert queue.claim("worker-2").id == "old"
+    assert queue.submit("comprehensive", "New").status == QUEUED
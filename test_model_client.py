@@ -0,0 +1,161 @@
+import threading
+import time
+
+import pytest
+
+from model_client import DeadlineExceeded, ModelClient, SingleFlight
+from quota_scheduler import QuotaScheduler
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class BadRequest(Exception):
+    code = 400
+
+
+class Session:
+    def __init__(self, error):
+        self.error = error
+
+    def generate_content(self, contents, **kwargs):
+        raise self.error
+
+
+class Pool:
+    """Model-like stub whose sessions fail with a given error; plain calls echo the prompt"""
+    model_name = "stub"
+
+    def __init__(self, error):
+        self.error = error
+
+    def with_system_instruction(self, system_instruction):
+        return Session(self.error)
+
+    def generate_content(self, contents, **kwargs):
+        return Response(contents)
+
+
+def client(model):
+    return ModelClient(model, hedge=False, single_flight=None)
+
+
+@pytest.mark.parametrize("error", [
+    TypeError("GenerativeModel.__init__() got an unexpected keyword argument 'system_instruction'"),
+    BadRequest("400 Developer instruction is not enabled for models/gemini-pro"),
+])
+def test_unsupported_system_instruction_falls_back_to_inline(error):
+    model_client = client(Pool(error))
+    response = model_client.generate_content("prompt", system_instruction="rules")
+    assert response.text == "rules\n\nprompt"
+    assert not model_client.use_system_instruction
+
+
+@pytest.mark.parametrize("error", [
+    TypeError("'NoneType' object is not subscriptable"),
+    BadRequest("400 Request payload size exceeds the limit"),
+])
+def test_other_errors_keep_system_instructions(error):
+    model_client = client(Pool(error))
+    with pytest.raises(type(error)):
+        model_client.generate_content("prompt", system_instruction="rules")
+    assert model_client.use_system_instruction
+
+
+class SlowFirstCall:
+    """Model whose first call blocks until released; later calls answer at once"""
+    model_name = "stub"
+
+    def __init__(self, first_call_seconds=1.0):
+        self.first_call_seconds = first_call_seconds
+        self.calls = 0
+        self.started = threading.Event()
+        self.lock = threading.Lock()
+
+    def generate_content(self, contents, **kwargs):
+        with self.lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first:
+            self.started.set()
+            time.sleep(self.first_call_seconds)
+        return Response(f"answer to {contents}")
+
+
+def in_thread(call):
+    result = {}
+
+    def run():
+        try:
+            result["value"] = call()
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, result
+
+
+def test_clients_of_different_pools_do_not_share_calls():
+    flights = SingleFlight()
+    first, second = SlowFirstCall(0.3), SlowFirstCall(0.3)
+    leader, leader_result = in_thread(
+        lambda: ModelClient(first, hedge=False, single_flight=flights).generate_content("prompt"))
+    first.started.wait(5.0)
+    other = ModelClient(second, hedge=False, single_flight=flights)
+
+    assert other.generate_content("prompt").text == "answer to prompt"
+    leader.join(5.0)
+    assert leader_result["value"].text == "answer to prompt"
+    assert (first.calls, second.calls, other.coalesced_calls) == (1, 1, 0)
+
+
+def test_waiting_caller_calls_again_when_the_leader_runs_out_of_time():
+    flights = SingleFlight()
+    model = SlowFirstCall(1.0)
+    leader, leader_result = in_thread(
+        lambda: ModelClient(model, call_timeout=0.2, hedge=False, single_flight=flights).generate_content("prompt"))
+    model.started.wait(5.0)
+    follower = ModelClient(model, call_timeout=5.0, hedge=False, single_flight=flights)
+
+    assert follower.generate_content("prompt").text == "answer to prompt"
+    leader.join(5.0)
+    assert isinstance(leader_result["error"], DeadlineExceeded)
+    assert model.calls == 2
+
+
+class QuotaRecorder:
+    """Model recording how many quota slots are held while it answers; the second call is slow"""
+    model_name = "stub"
+
+    def __init__(self, quota):
+        self.quota = quota
+        self.in_use = []
+        self.lock = threading.Lock()
+
+    def generate_content(self, contents, **kwargs):
+        with self.lock:
+            self.in_use.append(self.quota.stats()["in_use"])
+            call = len(self.in_use)
+        if call == 2:
+            time.sleep(0.3)
+        return Response(f"answer to {contents}")
+
+
+def test_hedged_requests_hold_their_own_quota_slot():
+    quota = QuotaScheduler(max_concurrent=4)
+    model = QuotaRecorder(quota)
+    model_client = ModelClient(model, hedge=True, min_samples=1, single_flight=None, quota=quota)
+    model_client.generate_content("warm-up")
+
+    assert model_client.generate_content("prompt").text == "answer to prompt"
+    assert model_client.hedged_calls == 1
+    # The hedge was sent while the slow primary still held its slot
+    assert model.in_use == [1, 1, 2]
+
+    deadline = time.monotonic() + 5.0
+    while quota.stats()["in_use"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert quota.stats()["in_use"] == 0
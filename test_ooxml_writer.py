@@ -0,0 +1,46 @@
+import zipfile
+
+from lxml import etree
+from pptx import Presentation
+
+from ooxml_writer import NS, StreamingDeckWriter, TITLE_TYPES
+from template_config import get_formatting
+
+TEMPLATE_PATH = "Template-for-training-material.pptx"
+
+
+def title_layout(writer):
+    return next(i for i, layout in enumerate(writer.layouts)
+                if any(placeholder['type'] in TITLE_TYPES for placeholder in layout['placeholders']))
+
+
+def test_streamed_deck_lists_its_slides_in_order(tmp_path):
+    output_path = str(tmp_path / "deck.pptx")
+    titles = ["First slide", "Second slide", "Third slide"]
+    with StreamingDeckWriter(TEMPLATE_PATH, output_path) as writer:
+        layout_index = title_layout(writer)
+        for title in titles:
+            writer.add_slide(layout_index, title=(title, get_formatting('title')))
+
+    presentation = Presentation(output_path)
+    assert len(presentation.slides) == len(titles)
+    assert [slide.shapes.title.text for slide in presentation.slides] == titles
+
+    with zipfile.ZipFile(output_path) as package:
+        properties = etree.fromstring(package.read('docProps/app.xml'))
+    assert properties.findtext('ep:Slides', namespaces=NS) == str(len(titles))
+    parts = [part.text for part in properties.findall('ep:TitlesOfParts/vt:vector/vt:lpstr', NS)]
+    assert parts[-len(titles):] == titles
+    pairs = [variant[0].text for variant in properties.findall('ep:HeadingPairs/vt:vector/vt:variant', NS)]
+    assert pairs[pairs.index("Slide Titles") + 1] == str(len(titles))
+    assert int(properties.find('ep:TitlesOfParts/vt:vector', NS).get('size')) == len(parts)
+
+
+def test_writer_reads_the_template_from_memory(tmp_path):
+    with open(TEMPLATE_PATH, 'rb') as f:
+        template_data = f.read()
+    output_path = str(tmp_path / "deck.pptx")
+    with StreamingDeckWriter(str(tmp_path / "missing.pptx"), output_path, template_data) as writer:
+        writer.add_slide(title_layout(writer), title=("Only slide", get_formatting('title')))
+
+    assert [slide.shapes.title.text for slide in Presentation(output_path).slides] == ["Only slide"]
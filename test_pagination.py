@@ -0,0 +1,83 @@
+from gemini_content_generator import SlideContent, SlideType
+from pagination import CONTINUATION_SUFFIX, is_continuation
+from slide_generator import EnhancedSlideGenerator
+from template_config import BODY, OBJECT
+
+TEMPLATE_PATH = "Template-for-training-material.pptx"
+
+
+def long_slide(title="Topic 0.1", bullets=12):
+    return SlideContent(
+        title=title,
+        main_content="Overview of the topic. " * 20,
+        slide_type=SlideType.CONTENT,
+        bullet_points=[f"Bullet point number {i} with some explanation of the idea" for i in range(1, bullets + 1)]
+    )
+
+
+def body_text(slide):
+    return " ".join(
+        shape.text_frame.text for shape in slide.placeholders
+        if shape.placeholder_format.type in (BODY, OBJECT)
+    )
+
+
+def test_split_keeps_every_bullet_in_order():
+    generator = EnhancedSlideGenerator(TEMPLATE_PATH)
+    content = long_slide()
+    pages = generator.paginator._split(content)
+
+    assert len(pages) > 1
+    assert pages[0].title == content.title
+    assert all(page.title == content.title + CONTINUATION_SUFFIX for page in pages[1:])
+    assert [is_continuation(page) for page in pages] == [False] + [True] * (len(pages) - 1)
+    assert [point for page in pages for point in page.bullet_points or []] == content.bullet_points
+    assert all(generator.paginator.fits(page) for page in pages)
+
+
+def test_bullet_only_continuation_pages_keep_their_bullets():
+    generator = EnhancedSlideGenerator(TEMPLATE_PATH)
+    pages = generator.paginator._split(long_slide())
+    bullet_only = [page for page in pages if not page.main_content and page.bullet_points]
+    assert bullet_only
+
+    for page in bullet_only:
+        slide = generator.create_slide_with_layout(generator.renderers.layout_name(page))
+        generator.add_content_to_slide(slide, page)
+        text = body_text(slide)
+        assert all(point.split()[-1] in text for point in page.bullet_points)
+
+
+def test_examples_follow_every_third_original_slide():
+    generator = EnhancedSlideGenerator(TEMPLATE_PATH)
+    slides = [
+        SlideContent(title=f"Topic {i}", main_content="Short text", slide_type=SlideType.CONTENT)
+        for i in range(1, 4)
+    ]
+    pages = slides[:2] + generator.paginator._split(long_slide("Topic 3"))
+
+    numbered = list(generator._numbered_pages(pages))
+    assert [number for number, _, _ in numbered] == [1, 2] + [3] * (len(pages) - 2)
+    assert [last for _, _, last in numbered] == [True, True] + [False] * (len(pages) - 3) + [True]
+
+
+def test_split_keeps_bullet_levels_with_their_bullets():
+    generator = EnhancedSlideGenerator(TEMPLATE_PATH)
+    content = long_slide()
+    content.bullet_levels = [i % 2 for i in range(len(content.bullet_points))]
+    pages = generator.paginator._split(content)
+
+    assert len(pages) > 1
+    assert [level for page in pages for level in page.bullet_levels or []] == content.bullet_levels
+    assert all(len(page.bullet_levels or []) == len(page.bullet_points or []) for page in pages)
+
+
+def test_split_keeps_main_content_paragraphs_whole():
+    generator = EnhancedSlideGenerator(TEMPLATE_PATH)
+    paragraphs = [f"Paragraph {i}: " + "an explanation of this part of the topic. " * 4 for i in range(1, 9)]
+    paragraphs = [paragraph.strip() for paragraph in paragraphs]
+    content = SlideContent(title="Topic 0.2", main_content="\n".join(paragraphs), slide_type=SlideType.CONTENT)
+    pages = generator.paginator._split(content)
+
+    assert len(pages) > 1
+    assert [part for page in pages for part in page.main_content.split("\n")] == paragraphs
@@ -0,0 +1,36 @@
+from progress_events import PARSED, QUEUED, REGENERATING, ProgressTracker, TqdmSubscriber
+
+
+class Bar:
+    """Records what a tqdm bar would show"""
+
+    def __init__(self):
+        self.total = None
+        self.n = 0
+
+    def update(self, count):
+        self.n += count
+
+    def refresh(self):
+        pass
+
+    def set_postfix(self, **kwargs):
+        pass
+
+
+def test_regenerated_slides_do_not_grow_the_bar():
+    tracker = ProgressTracker()
+    bar = Bar()
+    tracker.subscribe(TqdmSubscriber(bar))
+    for key in ("0", "1"):
+        tracker.emit(QUEUED, key)
+    for key in ("0", "1"):
+        tracker.emit(PARSED, key)
+
+    tracker.emit(REGENERATING, "1")
+    assert tracker.snapshot().pending_calls == 1
+    assert (bar.total, bar.n) == (2, 2)
+
+    tracker.emit(PARSED, "1", regenerated=True)
+    assert tracker.snapshot().pending_calls == 0
+    assert (bar.total, bar.n) == (2, 2)
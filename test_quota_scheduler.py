@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from model_client import DeadlineExceeded
+from quota_scheduler import BATCH, INTERACTIVE, QuotaScheduler
+
+
+def wait_until_queued(scheduler, count, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while sum(scheduler.stats()["queued"].values()) < count:
+        assert time.monotonic() < deadline, "requests were not queued in time"
+        time.sleep(0.01)
+
+
+def start_request(scheduler, order, job, priority=BATCH):
+    def run():
+        with scheduler.slot(job, priority, timeout=5.0):
+            order.append(job)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_interactive_requests_go_before_queued_batch_requests():
+    scheduler = QuotaScheduler(max_concurrent=1)
+    order = []
+    scheduler.acquire("holder")
+
+    threads = [start_request(scheduler, order, "batch", BATCH)]
+    wait_until_queued(scheduler, 1)
+    threads.append(start_request(scheduler, order, "interactive", INTERACTIVE))
+    wait_until_queued(scheduler, 2)
+
+    scheduler.release("holder")
+    for thread in threads:
+        thread.join(5.0)
+
+    assert order == ["interactive", "batch"]
+    assert scheduler.stats()["granted"] == {"batch": 2, "interactive": 1}
+
+
+def test_job_holding_fewer_slots_goes_first():
+    scheduler = QuotaScheduler(max_concurrent=2)
+    order = []
+    scheduler.acquire("busy")
+    scheduler.acquire("other")
+
+    # "busy" asked first, but already holds a slot while "idle" holds none
+    threads = [start_request(scheduler, order, "busy")]
+    wait_until_queued(scheduler, 1)
+    threads.append(start_request(scheduler, order, "idle"))
+    wait_until_queued(scheduler, 2)
+
+    scheduler.release("other")
+    for thread in threads:
+        thread.join(5.0)
+
+    assert order == ["idle", "busy"]
+    scheduler.release("busy")
+    assert scheduler.stats()["in_use"] == 0
+
+
+def test_acquire_times_out_and_leaves_the_queue():
+    scheduler = QuotaScheduler(max_concurrent=1)
+    scheduler.acquire("holder")
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        scheduler.acquire("late", INTERACTIVE, timeout=0.1)
+    assert time.monotonic() - start < 2.0
+    assert scheduler.stats()["queued"] == {}
+
+    scheduler.release("holder")
+    with scheduler.slot("late", timeout=0.1):
+        assert scheduler.stats()["jobs"] == {"late": 1}
+
+
+def test_ensure_capacity_only_grows_and_wakes_waiting_requests():
+    scheduler = QuotaScheduler(max_concurrent=1)
+    order = []
+    scheduler.acquire("holder")
+    thread = start_request(scheduler, order, "waiting")
+    wait_until_queued(scheduler, 1)
+
+    scheduler.ensure_capacity(0)
+    assert scheduler.max_concurrent == 1
+    scheduler.ensure_capacity(2)
+    thread.join(5.0)
+
+    assert order == ["waiting"]
+    scheduler.release("holder")
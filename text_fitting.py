@@ -0,0 +1,247 @@
+"""Font-metric-aware text fitting for slide placeholders."""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from PIL import ImageFont
+
+logger = logging.getLogger(__name__)
+
+EMU_PER_POINT = 12700
+
+# Calibri advance widths in font units (units per em = 2048). Used when the
+# font file is not installed on the machine building the deck.
+CALIBRI_UNITS_PER_EM = 2048
+CALIBRI_ADVANCES = {
+    ' ': 463, '!': 546, '"': 821, '#': 1038, '$': 1038, '%': 1465, '&': 1407,
+    "'": 452, '(': 621, ')': 621, '*': 1038, '+': 1038, ',': 511, '-': 627,
+    '.': 517, '/': 791, ':': 548, ';': 548, '<': 1038, '=': 1038, '>': 1038,
+    '?': 925, '@': 1823, '[': 627, '\\': 791, ']': 627, '^': 1038, '_': 1024,
+    '`': 588, '{': 663, '|': 943, '}': 663, '~': 1038, '•': 1024, '✓': 1024,
+    'A': 1185, 'B': 1114, 'C': 1092, 'D': 1260, 'E': 1000, 'F': 941, 'G': 1292,
+    'H': 1276, 'I': 516, 'J': 653, 'K': 1064, 'L': 861, 'M': 1751, 'N': 1322,
+    'O': 1356, 'P': 1058, 'Q': 1378, 'R': 1112, 'S': 941, 'T': 998, 'U': 1314,
+    'V': 1162, 'W': 1822, 'X': 1063, 'Y': 998, 'Z': 959,
+    'a': 981, 'b': 1076, 'c': 866, 'd': 1076, 'e': 1019, 'f': 625, 'g': 964,
+    'h': 1076, 'i': 470, 'j': 490, 'k': 931, 'l': 470, 'm': 1636, 'n': 1076,
+    'o': 1080, 'p': 1076, 'q': 1076, 'r': 714, 's': 801, 't': 686, 'u': 1076,
+    'v': 925, 'w': 1464, 'x': 887, 'y': 927, 'z': 809,
+}
+CALIBRI_ADVANCES.update({str(d): 1038 for d in range(10)})
+DEFAULT_ADVANCE = 1000 / CALIBRI_UNITS_PER_EM
+
+# Characters measured up front when a real font file is available
+PRELOADED_CHARS = ''.join(chr(c) for c in range(32, 127)) + '•✓□👉'
+
+# Default text frame insets (python-pptx / PowerPoint defaults)
+DEFAULT_INSETS = {
+    'left': 91440,
+    'right': 91440,
+    'top': 45720,
+    'bottom': 45720
+}
+
+# Horizontal indentation per paragraph level
+INDENT_PER_LEVEL = 342900
+
+
+class GlyphMetrics:
+    """Cached glyph advance table for a single font, in em units"""
+
+    _cache: Dict[str, 'GlyphMetrics'] = {}
+
+    def __init__(self, font_name: str):
+        self.font_name = font_name
+        self.advances: Dict[str, float] = {}
+        self._font = self._load_font(font_name)
+
+        if self._font is not None:
+            for char in PRELOADED_CHARS:
+                self.advances[char] = self._measure(char)
+        else:
+            self.advances = {
+                char: width / CALIBRI_UNITS_PER_EM
+                for char, width in CALIBRI_ADVANCES.items()
+            }
+
+    @classmethod
+    def for_font(cls, font_name: str) -> 'GlyphMetrics':
+        """Get the shared metrics table for a font"""
+        key = font_name.lower()
+        if key not in cls._cache:
+            cls._cache[key] = cls(font_name)
+        return cls._cache[key]
+
+    def _load_font(self, font_name: str):
+        """Load the TrueType font used to build the advance table"""
+        for candidate in (f"{font_name}.ttf", f"{font_name.lower()}.ttf"):
+            try:
+                return ImageFont.truetype(candidate, 1000)
+            except OSError:
+                continue
+        logger.info(f"Font '{font_name}' not installed, using built-in Calibri metrics")
+        return None
+
+    def _measure(self, char: str) -> float:
+        """Measure a single character advance in em units"""
+        try:
+            return self._font.getlength(char) / 1000
+        except Exception:
+            return DEFAULT_ADVANCE
+
+    def advance(self, char: str) -> float:
+        """Get the advance width of a character in em units"""
+        width = self.advances.get(char)
+        if width is None:
+            width = self._measure(char) if self._font is not None else DEFAULT_ADVANCE
+            self.advances[char] = width
+        return width
+
+    def text_width(self, text: str) -> float:
+        """Get the width of a string in em units"""
+        return sum(self.advance(char) for char in text)
+
+
+@lru_cache(maxsize=4096)
+def break_lines(text: str, font_name: str, font_size: float, width: int) -> Tuple[str, ...]:
+    """Break text into lines that fit the given width (EMU) at a font size"""
+    metrics = GlyphMetrics.for_font(font_name)
+    emu_per_em = font_size * EMU_PER_POINT
+    space = metrics.advance(' ') * emu_per_em
+
+    lines = []
+    for source_line in text.split('\n'):
+        current = []
+        current_width = 0.0
+        for word in source_line.split():
+            word_width = metrics.text_width(word) * emu_per_em
+            needed = word_width if not current else current_width + space + word_width
+            if current and needed > width:
+                lines.append(' '.join(current))
+                current = [word]
+                current_width = word_width
+            else:
+                current.append(word)
+                current_width = needed
+        lines.append(' '.join(current))
+    return tuple(lines)
+
+
+@dataclass
+class ParagraphFit:
+    text: str
+    lines: List[str]
+    font_size: float
+    height: int
+
+
+@dataclass
+class FitResult:
+    action: str  # 'fit', 'shrink' or 'split'
+    scale: float
+    paragraphs: List[ParagraphFit] = field(default_factory=list)
+    height: int = 0
+    available_height: int = 0
+    split_index: Optional[int] = None  # First paragraph that does not fit
+
+    @property
+    def fits(self) -> bool:
+        return self.action != 'split'
+
+
+class TextFitter:
+    """Measures text against placeholder sizes and decides how to fit it"""
+
+    def __init__(self, min_font_size: float = 18, shrink_step: float = 0.05,
+                 line_height_factor: float = 1.2, insets: Optional[Dict[str, int]] = None):
+        self.min_font_size = min_font_size
+        self.shrink_step = shrink_step
+        self.line_height_factor = line_height_factor
+        self.insets = insets or DEFAULT_INSETS
+
+    def text_area(self, width: int, height: int) -> Tuple[int, int]:
+        """Get the usable text area of a placeholder in EMU"""
+        return (
+            max(int(width) - self.insets['left'] - self.insets['right'], 0),
+            max(int(height) - self.insets['top'] - self.insets['bottom'], 0)
+        )
+
+    def wrap(self, text: str, width: int, formatting: dict) -> List[str]:
+        """Wrap text to a text area width (EMU) using the paragraph formatting"""
+        font_size = formatting.get('font_size', self.min_font_size)
+        font_name = formatting.get('font_name', 'Calibri')
+        indent = formatting.get('indent_level', 0) * INDENT_PER_LEVEL
+        return list(break_lines(text, font_name, float(font_size), max(width - indent, 1)))
+
+    def _paragraph_height(self, line_count: int, formatting: dict, font_size: float) -> int:
+        """Get the height (EMU) of a paragraph with the given number of lines"""
+        line_spacing = formatting.get('line_spacing', 1.0)
+        points = line_count * font_size * line_spacing * self.line_height_factor
+        points += formatting.get('space_before', 0) + formatting.get('space_after', 0)
+        return int(points * EMU_PER_POINT)
+
+    def _layout(self, paragraphs: List[Tuple[str, dict]], width: int, scale: float) -> List[ParagraphFit]:
+        """Lay out all paragraphs at a given font scale"""
+        laid_out = []
+        for text, formatting in paragraphs:
+            font_size = round(formatting.get('font_size', self.min_font_size) * scale, 1)
+            scaled = dict(formatting, font_size=font_size)
+            lines = self.wrap(text, width, scaled)
+            laid_out.append(ParagraphFit(
+                text=text,
+                lines=lines,
+                font_size=font_size,
+                height=self._paragraph_height(len(lines), formatting, font_size)
+            ))
+        return laid_out
+
+    def _min_scale(self, paragraphs: List[Tuple[str, dict]]) -> float:
+        """Get the smallest scale that keeps every paragraph readable"""
+        smallest_min = min(
+            (formatting.get('font_size', self.min_font_size) for _, formatting in paragraphs),
+            default=self.min_font_size
+        )
+        return min(1.0, self.min_font_size / smallest_min)
+
+    def fit(self, paragraphs: List[Tuple[str, dict]], width: int, height: int) -> FitResult:
+        """Fit paragraphs into a placeholder, shrinking or splitting when needed"""
+        area_width, area_height = self.text_area(width, height)
+        if not paragraphs:
+            return FitResult(action='fit', scale=1.0, available_height=area_height)
+
+        min_scale = self._min_scale(paragraphs)
+        scale = 1.0
+        while True:
+            laid_out = self._layout(paragraphs, area_width, scale)
+            total = sum(p.height for p in laid_out)
+            if total <= area_height:
+                return FitResult(
+                    action='fit' if scale == 1.0 else 'shrink',
+                    scale=scale,
+                    paragraphs=laid_out,
+                    height=total,
+                    available_height=area_height
+                )
+            if scale <= min_scale:
+                break
+            scale = max(round(scale - self.shrink_step, 2), min_scale)
+
+        # Content does not fit even at the minimum readable size
+        used = 0
+        split_index = len(laid_out)
+        for index, paragraph in enumerate(laid_out):
+            if used + paragraph.height > area_height:
+                split_index = index
+                break
+            used += paragraph.height
+
+        return FitResult(
+            action='split',
+            scale=scale,
+            paragraphs=laid_out,
+            height=sum(p.height for p in laid_out),
+            available_height=area_height,
+            split_index=max(split_index, 1)
+        )
@@ -0,0 +1,119 @@
+"""Token and cost accounting for model calls."""
+
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Tuple
+import json
+import logging
+import math
+import threading
+
+logger = logging.getLogger(__name__)
+
+# USD per 1K tokens; override per deployment
+DEFAULT_PRICING = {
+    "input_per_1k": 0.0005,
+    "output_per_1k": 0.0015
+}
+
+CHARS_PER_TOKEN = 4  # Rough average for English technical text
+
+UNSCOPED = ("", "")
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimate the token count of a text without calling the API"""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+@dataclass
+class TokenUsage:
+    input_tokens: int = 0
+    output_tokens: int = 0
+    calls: int = 0
+    estimated_calls: int = 0  # Calls whose usage came from the local estimator
+
+    def add(self, other: 'TokenUsage'):
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.calls += other.calls
+        self.estimated_calls += other.estimated_calls
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def cost(self, pricing: Dict = None) -> float:
+        """Get the cost in USD under the given pricing"""
+        pricing = pricing or DEFAULT_PRICING
+        return (self.input_tokens * pricing["input_per_1k"] +
+                self.output_tokens * pricing["output_per_1k"]) / 1000
+
+
+def usage_from_response(prompt, response) -> TokenUsage:
+    """Get the usage of one call from response metadata, estimating it if missing"""
+    metadata = getattr(response, 'usage_metadata', None)
+    input_tokens = getattr(metadata, 'prompt_token_count', 0) if metadata else 0
+    output_tokens = getattr(metadata, 'candidates_token_count', 0) if metadata else 0
+    if input_tokens or output_tokens:
+        return TokenUsage(input_tokens, output_tokens, calls=1)
+
+    try:
+        text = response.text
+    except Exception:
+        text = ""
+    prompt_text = prompt if isinstance(prompt, str) else str(prompt)
+    return TokenUsage(estimate_tokens(prompt_text), estimate_tokens(text), calls=1, estimated_calls=1)
+
+
+class UsageLedger:
+    """Aggregates token usage per slide, section and deck"""
+
+    def __init__(self, pricing: Dict = None):
+        self.pricing = pricing or DEFAULT_PRICING
+        self.deck = TokenUsage()
+        self.sections: Dict[str, TokenUsage] = {}
+        self.slides: Dict[Tuple[str, str], TokenUsage] = {}
+        self._lock = threading.Lock()
+
+    def record(self, usage: TokenUsage, scope: Tuple[str, str] = UNSCOPED):
+        """Add the usage of one call under a (section, slide) scope"""
+        section, slide = scope
+        with self._lock:
+            self.deck.add(usage)
+            self.sections.setdefault(section, TokenUsage()).add(usage)
+            self.slides.setdefault((section, slide), TokenUsage()).add(usage)
+
+    def reset(self):
+        with self._lock:
+            self.deck = TokenUsage()
+            self.sections.clear()
+            self.slides.clear()
+
+    def report(self) -> Dict:
+        """Get usage and cost aggregated per deck, section and slide"""
+        def entry(usage: TokenUsage) -> Dict:
+            return dict(asdict(usage), cost=round(usage.cost(self.pricing), 6))
+
+        with self._lock:
+            return {
+                "deck": entry(self.deck),
+                "sections": {section or "unscoped": entry(usage) for section, usage in self.sections.items()},
+                "slides": [
+                    dict(entry(usage), section=section, slide=slide)
+                    for (section, slide), usage in self.slides.items()
+                ]
+            }
+
+    def save_report(self, path: str):
+        """Write the usage report as JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2, ensure_ascii=False)
+        logger.info(f"Token usage report saved to {path}")
+
+    def log_summary(self):
+        deck = self.deck
+        logger.info(f"Token usage: {deck.input_tokens} input, {deck.output_tokens} output over "
+                    f"{deck.calls} calls ({deck.estimated_calls} estimated), "
+                    f"cost ${deck.cost(self.pricing):.4f}")
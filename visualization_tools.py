@@ -1,10 +1,13 @@
 import matplotlib.pyplot as plt
+import numpy as np
 import seaborn as sns
 from PIL import Image, ImageDraw, ImageFont
 from typing import Dict, List, Optional, Tuple
 import os
 import logging
 
+from downsampling import lttb, min_max, bin_2d, reduce_matrix
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -23,6 +26,14 @@ class VisualizationTools:
         self.default_icon_size = (1, 1)
         self.default_colors = sns.color_palette("husl", 8).as_hex()
         
+        # Limits that keep rendering time bounded regardless of input size
+        self.max_line_points = 1000  # line and time series points, downsampled beyond
+        self.max_scatter_points = 5000  # scatter points, binned into hexagons beyond
+        self.hexbin_gridsize = 50
+        self.heatmap_bins = 50  # grid of heatmaps built from raw x/y points
+        self.max_heatmap_cells = (100, 100)  # rows, columns; larger matrices are summed in blocks
+        self.max_tick_labels = 30
+        
         # Icon mappings
         self.icon_map = {
             "warning": "⚠️",
@@ -68,16 +79,34 @@ class VisualizationTools:
                 plt.tight_layout()
             
             elif graph_type == "line":
-                plt.plot(data["labels"], data["values"], marker='o', color=colors[0])
-                plt.xticks(rotation=45, ha='right')
+                labels, values = data["labels"], np.asarray(data["values"], dtype=float)
+                if len(values) > self.max_line_points:
+                    keep = self._downsample(np.arange(len(values)), values, data.get("downsample", "lttb"))
+                    labels, values = [labels[i] for i in keep], values[keep]
+                # Markers only while points can still be told apart
+                marker = 'o' if len(values) <= 50 else None
+                plt.plot(range(len(values)), values, marker=marker, color=colors[0])
+                self._set_category_ticks(labels)
                 plt.grid(True, linestyle='--', alpha=0.7)
                 plt.tight_layout()
             
             elif graph_type == "scatter":
-                plt.scatter(data["x_values"], data["y_values"], c=colors[0])
+                x, y = np.asarray(data["x_values"], dtype=float), np.asarray(data["y_values"], dtype=float)
+                if len(x) > self.max_scatter_points:
+                    # Dense data: point density instead of overplotted points
+                    plt.hexbin(x, y, gridsize=self.hexbin_gridsize, cmap='Blues', mincnt=1)
+                    plt.colorbar(label='Points')
+                else:
+                    plt.scatter(x, y, c=colors[0])
                 plt.grid(True, linestyle='--', alpha=0.7)
                 plt.tight_layout()
             
+            elif graph_type == "timeseries":
+                self._plot_timeseries(data, colors[0])
+            
+            elif graph_type == "heatmap":
+                self._plot_heatmap(data)
+            
             else:
                 raise ValueError(f"Unsupported graph type: {graph_type}")
             
@@ -97,6 +126,55 @@ class VisualizationTools:
             plt.close()  # Make sure to close the figure in case of error
             raise
 
+    def _downsample(self, x: np.ndarray, y: np.ndarray, method: str) -> np.ndarray:
+        """Get the indices of the points to plot for a long series"""
+        if method == "min_max":
+            return min_max(y, self.max_line_points)
+        if method == "lttb":
+            return lttb(x, y, self.max_line_points)
+        raise ValueError(f"Unsupported downsampling method: {method}")
+
+    def _set_category_ticks(self, labels: List) -> None:
+        """Label at most max_tick_labels evenly spaced category positions"""
+        step = max(1, -(-len(labels) // self.max_tick_labels))
+        positions = range(0, len(labels), step)
+        plt.xticks(list(positions), [str(labels[i]) for i in positions], rotation=45, ha='right')
+
+    def _plot_timeseries(self, data: Dict[str, List], color: str) -> None:
+        """Plot values over time; takes "timestamps" (or "labels") and "values" """
+        times = np.asarray(data.get("timestamps", data.get("labels")), dtype='datetime64[ns]')
+        values = np.asarray(data["values"], dtype=float)
+        order = np.argsort(times, kind='stable')
+        times, values = times[order], values[order]
+        if len(values) > self.max_line_points:
+            # Min/max keeps the spikes an analyst looks for
+            keep = self._downsample(times.astype('int64').astype(float), values,
+                                    data.get("downsample", "min_max"))
+            times, values = times[keep], values[keep]
+        plt.plot(times, values, color=color, linewidth=1)
+        plt.gcf().autofmt_xdate()
+        plt.grid(True, linestyle='--', alpha=0.7)
+        plt.tight_layout()
+
+    def _plot_heatmap(self, data: Dict[str, List]) -> None:
+        """Plot a "matrix" with optional "x_labels"/"y_labels", or the density of "x_values"/"y_values" """
+        if "matrix" in data:
+            max_rows, max_cols = self.max_heatmap_cells
+            matrix, row_block, col_block = reduce_matrix(data["matrix"], max_rows, max_cols)
+            x_labels = list(data.get("x_labels", []))[::col_block]
+            y_labels = list(data.get("y_labels", []))[::row_block]
+            plt.imshow(matrix, aspect='auto', cmap='YlOrRd', interpolation='nearest')
+            if x_labels and len(x_labels) <= self.max_tick_labels:
+                plt.xticks(range(len(x_labels)), x_labels, rotation=45, ha='right')
+            if y_labels and len(y_labels) <= self.max_tick_labels:
+                plt.yticks(range(len(y_labels)), y_labels)
+        else:
+            counts, x_edges, y_edges = bin_2d(data["x_values"], data["y_values"], self.heatmap_bins)
+            plt.imshow(counts, aspect='auto', cmap='YlOrRd', origin='lower', interpolation='nearest',
+                       extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]))
+        plt.colorbar(label=data.get("value_label", "Count"))
+        plt.tight_layout()
+
     def add_icon(
         self,
         icon_name: str,